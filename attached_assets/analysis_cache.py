@@ -0,0 +1,111 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\analysis_cache.py
+import json
+import logging
+from django.conf import settings
+from .memo_cache import get_memo_cache
+from .morpheme_service import DESCRIBED_ATTRIBUTES
+from .analysis_result import AnalysisResult, to_plain
+from .compact_analysis import CompactMorphemeAnalysis
+
+logger = logging.getLogger(__name__)
+
+
+class CachedMorphemeAnalyzer:
+    """
+    MorphemeAnalyzer.analyze 메모이제이션 래퍼
+    - 키: (콘텐츠, 키워드, 사용자 지정 형태소, 분석기 버전, 목표 범위)의 해시
+    - 1단계: 프로세스 내 LRU, 2단계: Django 캐시 (TwoTierMemoCache, 네임스페이스 'morpheme_analysis')
+    - 저장된 콘텐츠의 압축 분석 레코드가 analyze 결과 그대로면 캐시 키를 함께 보관하여 다시 최적화할 때 Okt 분석을 건너뜀
+    - analyze 외의 속성/메서드는 감싼 분석기로 그대로 위임
+    """
+
+    def __init__(self, analyzer, memo_cache=None, version=None):
+        """
+        Args:
+            analyzer (MorphemeAnalyzer): 실제 분석기 (로컬 또는 사이드카 프록시)
+            memo_cache (TwoTierMemoCache): 사용할 캐시, None이면 'morpheme_analysis' 공용 캐시
+            version (str): 분석기 버전, None이면 settings.MORPHEME_ANALYZER_VERSION (분석 로직 변경 시 올려서 캐시 무효화)
+        """
+        self._analyzer = analyzer
+        self._memo_cache = memo_cache or get_memo_cache('morpheme_analysis')
+        self._version = version or getattr(settings, 'MORPHEME_ANALYZER_VERSION', 'v1')
+        self._range_signature = None
+
+    @property
+    def analyzer(self):
+        return self._analyzer
+
+    def analyze(self, content, keyword, custom_morphemes=None):
+        """
+        MorphemeAnalyzer.analyze와 동일 (같은 입력은 캐시된 결과 반환)
+
+        Returns:
+            AnalysisResult: 읽기 전용 분석 결과 (dict와 같은 방식으로 접근 가능, 복사 없이 공유)
+        """
+        key = self.cache_key(content, keyword, custom_morphemes)
+        cached = self._memo_cache.get(key)
+        if cached is not None:
+            return cached
+
+        analysis = AnalysisResult.from_dict(self._analyzer.analyze(content, keyword, custom_morphemes))
+        self._memo_cache.set(key, analysis)
+        return analysis
+
+    def cache_key(self, content, keyword, custom_morphemes=None):
+        return self._memo_cache.make_key(
+            content,
+            keyword,
+            json.dumps(list(custom_morphemes or []), ensure_ascii=False),
+            self._version,
+            self._ranges()
+        )
+
+    def cache_reference(self, content, keyword, custom_morphemes, analysis):
+        """
+        압축 분석 레코드에 함께 저장할 캐시 참조
+        - analysis가 analyze로 content 그대로를 분석해 캐시에 둔 결과일 때만 만듦 (여기서 다시 분석하지 않음)
+        - 참조 키는 분석한 텍스트 기준이므로 나중에 같은 텍스트를 analyze할 때만 재사용됨
+
+        Args:
+            content (str): analyze에 넘겼던 텍스트
+            keyword (str): 주요 키워드
+            custom_morphemes (list): 사용자 지정 형태소
+            analysis (dict): 저장하는 분석 결과
+
+        Returns:
+            dict: {'key': 캐시 키, 'version': 분석기 버전}, 캐시된 결과가 없거나 analysis와 다르면 None
+        """
+        key = self.cache_key(content, keyword, custom_morphemes)
+        cached = self._memo_cache.get(key)
+        if cached is None or (cached is not analysis and to_plain(cached) != to_plain(analysis)):
+            return None
+        return {'key': key, 'version': self._version}
+
+    def load_persisted(self, meta_data, content, keyword, custom_morphemes=None):
+        """
+        meta_data의 압축 분석 레코드가 현재 콘텐츠/키워드/버전의 analyze 결과면 캐시에 채워 넣음
+
+        Returns:
+            bool: 캐시에 채웠는지 여부
+        """
+        compact = CompactMorphemeAnalysis.from_meta_data(meta_data, keyword)
+        reference = compact.cache_reference if compact is not None else None
+        if not reference:
+            return False
+        key = self.cache_key(content, keyword, custom_morphemes)
+        if reference['key'] != key:
+            logger.debug("저장된 형태소 분석 결과가 현재 콘텐츠/버전과 달라 사용하지 않음")
+            return False
+        self._memo_cache.set(key, compact.to_analysis())
+        return True
+
+    def _ranges(self):
+        if self._range_signature is None:
+            # 목표 범위가 바뀌면 유효 여부가 달라지므로 키에 포함
+            self._range_signature = ",".join(str(getattr(self._analyzer, name)) for name in DESCRIBED_ATTRIBUTES)
+        return self._range_signature
+
+    def __getattr__(self, name):
+        if name.startswith('__') or name == '_analyzer':
+            raise AttributeError(name)
+        return getattr(self._analyzer, name)
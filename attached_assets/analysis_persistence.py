@@ -0,0 +1,87 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\analysis_persistence.py
+import logging
+from django.db import transaction
+from content.models import MorphemeAnalysis
+from .compact_analysis import COMPACT_ANALYSIS_META_KEY, encode_analysis, stores_rows, stores_compact
+
+logger = logging.getLogger(__name__)
+
+MORPHEME_ANALYSIS_FIELDS = ('count', 'is_valid', 'morpheme_type')
+
+
+def _analysis_values(info):
+    return {
+        'count': info.get('count', 0),
+        'is_valid': info.get('is_valid', False),
+        'morpheme_type': info.get('type', 'unknown')
+    }
+
+
+def _with_auto_now_fields(instance, update_fields):
+    """ update_fields 저장 시 auto_now 필드(수정 시각 등)도 함께 갱신되도록 추가 """
+    fields = list(update_fields)
+    for field in instance._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) and field.name not in fields:
+            fields.append(field.name)
+    return fields
+
+
+def save_content_analysis(blog_content, analysis, update_fields=None, fresh=False, cache_reference=None):
+    """
+    콘텐츠 저장과 형태소 분석 행 갱신을 한 트랜잭션에서 처리합니다.
+    기존 행과 비교하여 바뀐 행만 bulk_update, 새 형태소는 bulk_create, 사라진 형태소는 한 번에 삭제합니다.
+    MORPHEME_ANALYSIS_STORAGE 설정에 따라 압축 레코드를 meta_data에 함께 저장하거나 행 저장을 생략합니다.
+
+    Args:
+        blog_content (BlogContent): 저장할 콘텐츠
+        analysis (dict): MorphemeAnalyzer.analyze 형식의 분석 결과
+        update_fields (list): 콘텐츠에서 저장할 필드 (None이면 콘텐츠는 저장하지 않음)
+        fresh (bool): 방금 생성한 콘텐츠라 기존 행이 없음 (조회 생략)
+        cache_reference (dict): analysis가 analyze 결과 그대로일 때의 캐시 참조 (압축 레코드에 함께 저장)
+
+    Returns:
+        dict: {'created': 생성 수, 'updated': 갱신 수, 'deleted': 삭제 수}
+    """
+    counts = analysis.get('morpheme_analysis', {}).get('counts', {})
+    update_fields = list(update_fields or [])
+    if stores_compact():
+        record = encode_analysis(analysis, blog_content.keyword.keyword, cache_reference)
+        meta_data = blog_content.meta_data or {}
+        if meta_data.get(COMPACT_ANALYSIS_META_KEY) != record:
+            blog_content.meta_data = {**meta_data, COMPACT_ANALYSIS_META_KEY: record}
+            if 'meta_data' not in update_fields:
+                update_fields.append('meta_data')
+
+    with transaction.atomic():
+        if update_fields:
+            blog_content.save(update_fields=_with_auto_now_fields(blog_content, update_fields))
+
+        existing = {}
+        if not fresh:
+            existing = {row.morpheme: row for row in blog_content.morpheme_analyses.all()}
+        if not stores_rows():
+            # 압축 레코드만 저장하는 모드: 남아 있는 행은 정리
+            counts = {}
+        to_create = []
+        to_update = []
+        for morpheme, info in counts.items():
+            values = _analysis_values(info)
+            row = existing.pop(morpheme, None)
+            if row is None:
+                to_create.append(MorphemeAnalysis(content=blog_content, morpheme=morpheme, **values))
+            elif any(getattr(row, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(row, field, value)
+                to_update.append(row)
+
+        deleted = 0
+        if existing:
+            deleted, _ = MorphemeAnalysis.objects.filter(pk__in=[row.pk for row in existing.values()]).delete()
+        if to_create:
+            MorphemeAnalysis.objects.bulk_create(to_create)
+        if to_update:
+            MorphemeAnalysis.objects.bulk_update(to_update, MORPHEME_ANALYSIS_FIELDS)
+
+    result = {'created': len(to_create), 'updated': len(to_update), 'deleted': deleted}
+    logger.debug(f"형태소 분석 저장 (content_id={blog_content.pk}): {result}")
+    return result
@@ -0,0 +1,181 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\analysis_result.py
+from collections.abc import Mapping
+
+ANALYSIS_KEYS = ('char_count', 'is_valid_char_count', 'is_valid_morphemes', 'is_fully_optimized', 'morpheme_analysis')
+MORPHEME_INFO_KEYS = ('count', 'is_valid', 'type')
+
+
+class AnalysisResult(Mapping):
+    """
+    형태소 분석 결과 (MorphemeAnalyzer.analyze의 중첩 dict를 대신하는 읽기 전용 객체)
+    - 형태소별 횟수/유효 여부/유형을 형태소 순서의 튜플로 보관하고 형태소 -> 위치 색인을 공유
+    - 기존 호출부를 위해 dict와 같은 방식으로 접근 가능
+      (result['morpheme_analysis']['counts'][m]['count'], result.get(...), .items() 등)
+    - 변경하지 않으므로 캐시에서 꺼낼 때 복사하지 않아도 됨
+    """
+
+    __slots__ = (
+        'char_count', 'is_valid_char_count', 'is_valid_morphemes', 'is_fully_optimized',
+        'target_morphemes', 'morphemes', 'index', 'counts', 'valid', 'types', 'extra'
+    )
+
+    def __init__(self, char_count, is_valid_char_count, target_morphemes, morphemes, counts, valid, types, index=None, extra=None):
+        """
+        Args:
+            char_count (int): 글자수 (공백 제외)
+            is_valid_char_count (bool): 글자수 범위 충족 여부
+            target_morphemes (dict): {'base': [...], 'compound': [...], 'all_list': [...]}
+            morphemes (tuple): 형태소 순서
+            counts (tuple): 형태소 순서의 출현 횟수
+            valid (tuple): 형태소 순서의 유효 여부
+            types (tuple): 형태소 순서의 유형 ('base' | 'compound')
+            index (dict): 형태소 -> 위치 (같은 형태소 목록의 결과끼리 공유 가능)
+            extra (dict): 위에 없는 최상위 키 (분석기가 추가로 반환한 값)
+        """
+        self.char_count = char_count
+        self.is_valid_char_count = is_valid_char_count
+        self.is_valid_morphemes = all(valid)
+        self.is_fully_optimized = is_valid_char_count and self.is_valid_morphemes
+        self.target_morphemes = target_morphemes
+        self.morphemes = morphemes
+        self.index = index if index is not None else {m: i for i, m in enumerate(morphemes)}
+        self.counts = counts
+        self.valid = valid
+        self.types = types
+        self.extra = extra
+
+    @classmethod
+    def from_dict(cls, analysis):
+        """ MorphemeAnalyzer.analyze 형식의 dict를 변환 (이미 AnalysisResult면 그대로 반환) """
+        if isinstance(analysis, cls):
+            return analysis
+        morpheme_analysis = analysis.get('morpheme_analysis', {})
+        counts = morpheme_analysis.get('counts', {})
+        morphemes = tuple(counts)
+        extra = {k: v for k, v in analysis.items() if k not in ANALYSIS_KEYS} or None
+        result = cls(
+            analysis.get('char_count', 0),
+            analysis.get('is_valid_char_count', False),
+            morpheme_analysis.get('target_morphemes', {}),
+            morphemes,
+            tuple(counts[m].get('count', 0) for m in morphemes),
+            tuple(counts[m].get('is_valid', False) for m in morphemes),
+            tuple(counts[m].get('type', 'unknown') for m in morphemes),
+            extra=extra
+        )
+        # 분석기가 계산한 종합 판정을 그대로 유지
+        result.is_valid_morphemes = analysis.get('is_valid_morphemes', result.is_valid_morphemes)
+        result.is_fully_optimized = analysis.get('is_fully_optimized', result.is_fully_optimized)
+        return result
+
+    def to_dict(self):
+        """ MorphemeAnalyzer.analyze와 같은 구조의 일반 dict (JSON 저장용) """
+        analysis = {
+            'char_count': self.char_count,
+            'is_valid_char_count': self.is_valid_char_count,
+            'is_valid_morphemes': self.is_valid_morphemes,
+            'is_fully_optimized': self.is_fully_optimized,
+            'morpheme_analysis': {
+                'target_morphemes': self.target_morphemes,
+                'counts': {
+                    m: {'count': c, 'is_valid': v, 'type': t}
+                    for m, c, v, t in zip(self.morphemes, self.counts, self.valid, self.types)
+                }
+            }
+        }
+        if self.extra:
+            analysis.update(self.extra)
+        return analysis
+
+    def __getitem__(self, key):
+        if key == 'morpheme_analysis':
+            return _MorphemeAnalysisView(self)
+        if key in ANALYSIS_KEYS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self):
+        yield from ANALYSIS_KEYS
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return len(ANALYSIS_KEYS) + len(self.extra or ())
+
+    def __repr__(self):
+        return f"AnalysisResult(char_count={self.char_count}, is_fully_optimized={self.is_fully_optimized}, morphemes={len(self.morphemes)})"
+
+
+class _MorphemeAnalysisView(Mapping):
+    """ result['morpheme_analysis'] 호환 뷰 """
+
+    __slots__ = ('_result',)
+
+    def __init__(self, result):
+        self._result = result
+
+    def __getitem__(self, key):
+        if key == 'counts':
+            return _CountsView(self._result)
+        if key == 'target_morphemes':
+            return self._result.target_morphemes
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('target_morphemes', 'counts'))
+
+    def __len__(self):
+        return 2
+
+
+class _CountsView(Mapping):
+    """ result['morpheme_analysis']['counts'] 호환 뷰 (형태소 -> 정보) """
+
+    __slots__ = ('_result',)
+
+    def __init__(self, result):
+        self._result = result
+
+    def __getitem__(self, morpheme):
+        return _MorphemeInfo(self._result, self._result.index[morpheme])
+
+    def __iter__(self):
+        return iter(self._result.morphemes)
+
+    def __len__(self):
+        return len(self._result.morphemes)
+
+    def __contains__(self, morpheme):
+        return morpheme in self._result.index
+
+
+class _MorphemeInfo(Mapping):
+    """ counts[m] 호환 뷰 ({'count', 'is_valid', 'type'}) """
+
+    __slots__ = ('_result', '_position')
+
+    def __init__(self, result, position):
+        self._result = result
+        self._position = position
+
+    def __getitem__(self, key):
+        if key == 'count':
+            return self._result.counts[self._position]
+        if key == 'is_valid':
+            return self._result.valid[self._position]
+        if key == 'type':
+            return self._result.types[self._position]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(MORPHEME_INFO_KEYS)
+
+    def __len__(self):
+        return len(MORPHEME_INFO_KEYS)
+
+
+def to_plain(analysis):
+    """ JSON 저장/프롬프트 출력용 일반 dict (dict는 그대로 반환) """
+    return analysis.to_dict() if isinstance(analysis, AnalysisResult) else analysis
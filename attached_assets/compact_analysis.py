@@ -0,0 +1,317 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\compact_analysis.py
+"""
+콘텐츠당 한 건으로 저장하는 압축 형태소 분석 레코드 (BlogContent.meta_data)
+
+레코드 형식 ({'v': 2, 'kw': ..., 'i': ..., 'x': ..., 'c': ..., 'ok': ..., 'cp': ..., 'a': ...}):
+    kw: 키워드의 crc32 (id를 풀 때 쓰는 키워드가 저장 시점과 같은지 확인)
+    i: 키워드 기준으로 인터닝한 형태소 id (uint16 배열의 base64)
+       - EXTRA_ID_BASE 미만: 키워드 안의 위치와 길이 (start << SPAN_LENGTH_BITS | length)
+       - EXTRA_ID_BASE 이상: 키워드에 없는 형태소 (x 목록의 위치)
+    x: 키워드에 없는 형태소 목록 ("\\x1f"로 연결, 사용자 지정 형태소가 없으면 대부분 빈 문자열)
+    c: 형태소 순서의 출현 횟수 (uint16 배열의 base64)
+    ok: 유효 여부 비트마스크 (i번째 비트 = i번째 형태소)
+    cp: 복합 키워드 여부 비트마스크
+    a: (선택) 레코드가 analyze 결과 그대로일 때 분석 캐시 복원 정보
+       {'key': 캐시 키, 'version': 분석기 버전, 'n': 글자수, 'f': 판정 비트, 'tm': 목표 형태소, 'e': 기타 항목}
+       (tm은 형태소 목록/유형에서 만든 값과 다를 때만, e는 있을 때만 저장)
+
+같은 키워드/id 배열의 형태소 목록은 프로세스 내에서 하나의 튜플을 공유합니다.
+이전 형식(v1, 'm'에 형태소 문자열 목록)의 레코드도 읽을 수 있습니다.
+
+설정:
+    MORPHEME_ANALYSIS_STORAGE: 'compact' (압축 레코드만, 기본), 'rows' (MorphemeAnalysis 행만), 'both'
+"""
+import sys
+import zlib
+import base64
+import logging
+import functools
+from array import array
+from django.conf import settings
+from .analysis_result import ANALYSIS_KEYS, AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+COMPACT_ANALYSIS_META_KEY = 'morpheme_analysis_compact'
+COMPACT_ANALYSIS_VERSION = 2
+MORPHEME_SEPARATOR = "\x1f"
+MAX_STORED_COUNT = 0xFFFF
+
+SPAN_LENGTH_BITS = 7
+SPAN_LENGTH_MASK = (1 << SPAN_LENGTH_BITS) - 1
+EXTRA_ID_BASE = 0x8000
+MAX_SPAN_START = (EXTRA_ID_BASE >> SPAN_LENGTH_BITS) - 1
+
+# 'a'의 판정 비트
+VALID_CHAR_COUNT_FLAG = 1
+VALID_MORPHEMES_FLAG = 2
+FULLY_OPTIMIZED_FLAG = 4
+
+
+def storage_mode():
+    return getattr(settings, 'MORPHEME_ANALYSIS_STORAGE', 'compact')
+
+
+def stores_rows():
+    return storage_mode() in ('rows', 'both')
+
+
+def stores_compact():
+    return storage_mode() in ('compact', 'both')
+
+
+def _keyword_checksum(keyword):
+    return zlib.crc32((keyword or "").encode('utf-8'))
+
+
+def _pack(values):
+    packed = array('H', values)
+    if sys.byteorder == 'big':  # 저장은 항상 little-endian
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode('ascii')
+
+
+def _unpack(encoded):
+    values = array('H', base64.b64decode(encoded))
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+
+def _intern_ids(morphemes, keyword):
+    """ 형태소 -> 키워드 기준 id (키워드에 없는 형태소는 extras에 추가하고 그 위치로) """
+    ids = []
+    extras = []
+    for morpheme in morphemes:
+        start = keyword.find(morpheme) if morpheme else -1
+        if 0 <= start <= MAX_SPAN_START and len(morpheme) <= SPAN_LENGTH_MASK:
+            ids.append(start << SPAN_LENGTH_BITS | len(morpheme))
+        else:
+            ids.append(EXTRA_ID_BASE + len(extras))
+            extras.append(morpheme)
+    return ids, extras
+
+
+@functools.lru_cache(maxsize=1024)
+def _resolve_ids(encoded_ids, joined_extras, keyword):
+    """ 같은 키워드/id 배열의 형태소 목록은 하나의 튜플로 공유 """
+    extras = joined_extras.split(MORPHEME_SEPARATOR) if joined_extras else []
+    morphemes = []
+    for morpheme_id in _unpack(encoded_ids):
+        if morpheme_id >= EXTRA_ID_BASE:
+            morphemes.append(extras[morpheme_id - EXTRA_ID_BASE])
+        else:
+            start = morpheme_id >> SPAN_LENGTH_BITS
+            morphemes.append(keyword[start:start + (morpheme_id & SPAN_LENGTH_MASK)])
+    return tuple(morphemes)
+
+
+@functools.lru_cache(maxsize=1024)
+def _split_morphemes(joined):
+    """ v1 레코드의 형태소 목록 """
+    return tuple(joined.split(MORPHEME_SEPARATOR)) if joined else ()
+
+
+def _derived_target_morphemes(morphemes, types):
+    return {
+        'base': [m for m, t in zip(morphemes, types) if t != 'compound'],
+        'compound': [m for m, t in zip(morphemes, types) if t == 'compound'],
+        'all_list': list(morphemes)
+    }
+
+
+def encode_analysis(analysis, keyword, cache_reference=None):
+    """
+    MorphemeAnalyzer.analyze 형식의 분석 결과를 압축 레코드로 변환
+
+    Args:
+        analysis (dict): 분석 결과
+        keyword (str): 콘텐츠의 키워드 (형태소 id 인터닝 기준)
+        cache_reference (dict): analysis가 analyze 결과 그대로일 때의 {'key', 'version'}
+            (CachedMorphemeAnalyzer.cache_reference, 있으면 분석 캐시 복원 정보를 함께 저장)
+
+    Returns:
+        dict: JSON으로 저장 가능한 압축 레코드
+    """
+    counts = analysis.get('morpheme_analysis', {}).get('counts', {})
+    morphemes = list(counts)
+    ids, extras = _intern_ids(morphemes, keyword or "")
+    types = [counts[m].get('type', 'base') for m in morphemes]
+    valid_mask = 0
+    compound_mask = 0
+    for position, morpheme in enumerate(morphemes):
+        if counts[morpheme].get('is_valid', False):
+            valid_mask |= 1 << position
+        if types[position] == 'compound':
+            compound_mask |= 1 << position
+    record = {
+        'v': COMPACT_ANALYSIS_VERSION,
+        'kw': _keyword_checksum(keyword),
+        'i': _pack(ids),
+        'x': MORPHEME_SEPARATOR.join(extras),
+        'c': _pack(min(max(counts[m].get('count', 0), 0), MAX_STORED_COUNT) for m in morphemes),
+        'ok': valid_mask,
+        'cp': compound_mask
+    }
+    if cache_reference:
+        record['a'] = _analysis_summary(analysis, morphemes, types, cache_reference)
+    return record
+
+
+def _analysis_summary(analysis, morphemes, types, cache_reference):
+    flags = 0
+    if analysis.get('is_valid_char_count'):
+        flags |= VALID_CHAR_COUNT_FLAG
+    if analysis.get('is_valid_morphemes'):
+        flags |= VALID_MORPHEMES_FLAG
+    if analysis.get('is_fully_optimized'):
+        flags |= FULLY_OPTIMIZED_FLAG
+    summary = {'key': cache_reference['key'], 'version': cache_reference['version'], 'n': analysis.get('char_count', 0), 'f': flags}
+
+    target_morphemes = dict(analysis.get('morpheme_analysis', {}).get('target_morphemes', {}))
+    if target_morphemes != _derived_target_morphemes(morphemes, types):
+        summary['tm'] = target_morphemes
+    extra = {key: analysis[key] for key in analysis if key not in ANALYSIS_KEYS}
+    if extra:
+        summary['e'] = extra
+    return summary
+
+
+class CompactMorphemeAnalysis:
+    """
+    압축 레코드 읽기 전용 뷰
+    - 형태소 목록과 횟수 배열은 처음 접근할 때 디코딩
+    - 유효 여부/유형은 비트마스크에서 바로 계산
+    """
+
+    __slots__ = ('_record', '_keyword', '_morphemes', '_index', '_counts')
+
+    def __init__(self, record, keyword):
+        self._record = record
+        self._keyword = keyword or ""
+        self._morphemes = None
+        self._index = None
+        self._counts = None
+
+    @classmethod
+    def from_meta_data(cls, meta_data, keyword):
+        """ meta_data에 읽을 수 있는 압축 레코드가 있으면 뷰 반환, 없으면 None """
+        record = (meta_data or {}).get(COMPACT_ANALYSIS_META_KEY)
+        if not record:
+            return None
+        if record.get('v') == 1:
+            return cls(record, keyword)
+        if record.get('v') != COMPACT_ANALYSIS_VERSION:
+            return None
+        if record.get('kw') != _keyword_checksum(keyword):
+            logger.warning("압축 형태소 분석 레코드의 키워드가 현재 키워드와 달라 사용하지 않음")
+            return None
+        return cls(record, keyword)
+
+    @property
+    def morphemes(self):
+        if self._morphemes is None:
+            if 'm' in self._record:
+                self._morphemes = _split_morphemes(self._record['m'])
+            else:
+                self._morphemes = _resolve_ids(self._record['i'], self._record['x'], self._keyword)
+        return self._morphemes
+
+    @property
+    def all_valid(self):
+        """ 모든 형태소가 유효한지 (횟수 디코딩 없이 비트마스크로 판단) """
+        return self._record['ok'] == (1 << len(self.morphemes)) - 1
+
+    @property
+    def cache_reference(self):
+        """ analyze 결과 그대로 저장된 레코드면 {'key', 'version'}, 아니면 None """
+        summary = self._record.get('a')
+        if not summary:
+            return None
+        return {'key': summary['key'], 'version': summary['version']}
+
+    def __len__(self):
+        return len(self.morphemes)
+
+    def __contains__(self, morpheme):
+        return morpheme in self._position_index()
+
+    def count(self, morpheme):
+        return self._decoded_counts()[self._position_index()[morpheme]]
+
+    def is_valid(self, morpheme):
+        return bool(self._record['ok'] >> self._position_index()[morpheme] & 1)
+
+    def morpheme_type(self, morpheme):
+        return 'compound' if self._record['cp'] >> self._position_index()[morpheme] & 1 else 'base'
+
+    def items(self):
+        """ (형태소, 횟수, 유효 여부, 유형) 순회 """
+        counts = self._decoded_counts()
+        valid_mask = self._record['ok']
+        compound_mask = self._record['cp']
+        for position, morpheme in enumerate(self.morphemes):
+            yield (
+                morpheme,
+                counts[position],
+                bool(valid_mask >> position & 1),
+                'compound' if compound_mask >> position & 1 else 'base'
+            )
+
+    def as_rows(self):
+        """ MorphemeAnalysis 행과 같은 필드의 dict 목록 """
+        return [
+            {'morpheme': morpheme, 'count': count, 'is_valid': is_valid, 'morpheme_type': morpheme_type}
+            for morpheme, count, is_valid, morpheme_type in self.items()
+        ]
+
+    def to_analysis(self):
+        """
+        analyze 결과 그대로 저장된 레코드를 분석 결과로 복원
+
+        Returns:
+            AnalysisResult: 복원한 분석 결과, 복원 정보('a')가 없으면 None
+        """
+        summary = self._record.get('a')
+        if not summary:
+            return None
+        morphemes = self.morphemes
+        items = list(self.items())
+        types = tuple(morpheme_type for *_, morpheme_type in items)
+        result = AnalysisResult(
+            summary['n'],
+            bool(summary['f'] & VALID_CHAR_COUNT_FLAG),
+            summary.get('tm') or _derived_target_morphemes(morphemes, types),
+            morphemes,
+            tuple(count for _, count, _, _ in items),
+            tuple(is_valid for _, _, is_valid, _ in items),
+            types,
+            extra=summary.get('e')
+        )
+        result.is_valid_morphemes = bool(summary['f'] & VALID_MORPHEMES_FLAG)
+        result.is_fully_optimized = bool(summary['f'] & FULLY_OPTIMIZED_FLAG)
+        return result
+
+    def _position_index(self):
+        if self._index is None:
+            self._index = {m: i for i, m in enumerate(self.morphemes)}
+        return self._index
+
+    def _decoded_counts(self):
+        if self._counts is None:
+            self._counts = _unpack(self._record['c'])
+        return self._counts
+
+
+def load_morpheme_analysis(blog_content):
+    """
+    콘텐츠의 형태소 분석 결과 (대시보드/이력 화면용 읽기 API)
+    압축 레코드가 있으면 행 조회 없이 사용하고, 없으면 MorphemeAnalysis 행에서 읽음
+
+    Returns:
+        list: [{'morpheme', 'count', 'is_valid', 'morpheme_type'}, ...]
+    """
+    compact = CompactMorphemeAnalysis.from_meta_data(blog_content.meta_data, blog_content.keyword.keyword)
+    if compact is not None:
+        return compact.as_rows()
+    return list(blog_content.morpheme_analyses.values('morpheme', 'count', 'is_valid', 'morpheme_type'))
@@ -0,0 +1,135 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\count_matrix.py
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy가 없으면 array 기반으로 동작
+    np = None
+
+
+class SentenceCountMatrix:
+    """
+    문장 × 목표 형태소 출현 횟수 행렬
+    - 문서 전체를 한 번 탐색해 만들고, 문장이 바뀔 때 해당 행만 다시 계산
+    - 열 합계(형태소별 전체 횟수)를 편집과 함께 갱신
+    - 문장 점수/삭제 선택/과다 형태소 검사를 행렬 연산으로 처리 (numpy가 있으면 벡터화)
+    """
+
+    def __init__(self, automaton):
+        """
+        Args:
+            automaton (MorphemeAutomaton): 목표 형태소 오토마톤 (열 순서 = automaton.morphemes)
+        """
+        self.automaton = automaton
+        self.morphemes = automaton.morphemes
+        self.width = len(self.morphemes)
+        self._rows = {}  # 문장 ref -> 형태소별 횟수 벡터
+        self._totals = self._zeros()
+        self._vector_cache = {}
+
+    @classmethod
+    def from_document(cls, document, automaton):
+        """
+        Args:
+            document (ParsedDocument): 문서
+            automaton (MorphemeAutomaton): 목표 형태소 오토마톤
+
+        Returns:
+            SentenceCountMatrix: 문서의 모든 문장에 대한 행렬
+        """
+        matrix = cls(automaton)
+        scan, refs = document.scan(automaton)
+        index = automaton.index
+        for ref, sentence, per_sentence in zip(refs, scan.sentences, scan.sentence_counts):
+            vector = matrix._zeros()
+            for morpheme, count in per_sentence.items():
+                vector[index[morpheme]] = count
+            matrix._vector_cache.setdefault(sentence, vector)
+            matrix._add_row(ref, vector)
+        return matrix
+
+    def vector(self, text):
+        """ 텍스트의 형태소별 횟수 벡터 (같은 텍스트는 재계산하지 않음) """
+        vector = self._vector_cache.get(text)
+        if vector is None:
+            counts = self.automaton.count(text)
+            vector = self._from_list([counts[m] for m in self.morphemes])
+            if len(self._vector_cache) >= 4096:
+                self._vector_cache.pop(next(iter(self._vector_cache)))
+            self._vector_cache[text] = vector
+        return vector
+
+    def set_sentence(self, ref, text, counts=None):
+        """
+        문장 교체 시 해당 행 갱신 (빈 문자열이면 행 삭제)
+        counts({형태소: 횟수})가 주어지면 텍스트를 다시 탐색하지 않고 그대로 사용 (템플릿 레지스트리의 기여도 등)
+        """
+        previous = self._rows.pop(ref, None)
+        if previous is not None:
+            self._totals = self._subtract(self._totals, previous)
+        if text:
+            if counts is None:
+                vector = self.vector(text)
+            else:
+                vector = self._from_list([counts.get(m, 0) for m in self.morphemes])
+            self._add_row(ref, vector)
+
+    def row(self, ref):
+        vector = self._rows.get(ref)
+        return vector if vector is not None else self._zeros()
+
+    def exceeds(self, limits, inclusive=False):
+        """
+        Args:
+            limits (list): 열 순서의 형태소별 한도 (None은 무제한)
+            inclusive (bool): True면 한도 이상, False면 한도 초과
+
+        Returns:
+            list: 열 순서의 bool 마스크
+        """
+        mask = []
+        for total, limit in zip(self._totals, limits):
+            if limit is None:
+                mask.append(False)
+            else:
+                mask.append(total >= limit if inclusive else total > limit)
+        return mask
+
+    def row_hits(self, refs, mask):
+        """
+        여러 문장에 대해 마스크된 형태소 출현 여부를 한 번에 계산
+
+        Returns:
+            list: refs 순서의 bool 목록
+        """
+        if not refs:
+            return []
+        if np is not None:
+            block = np.vstack([self.row(ref) for ref in refs])
+            return [bool(v) for v in ((block > 0) & np.asarray(mask, dtype=bool)).any(axis=1)]
+        masked_columns = [i for i, flag in enumerate(mask) if flag]
+        return [any(self.row(ref)[i] > 0 for i in masked_columns) for ref in refs]
+
+    def _add_row(self, ref, vector):
+        self._rows[ref] = vector
+        self._totals = self._add(self._totals, vector)
+
+    def _zeros(self):
+        if np is not None:
+            return np.zeros(self.width, dtype=np.int32)
+        return array('i', [0]) * self.width
+
+    def _from_list(self, values):
+        if np is not None:
+            return np.array(values, dtype=np.int32)
+        return array('i', values)
+
+    def _add(self, left, right):
+        if np is not None:
+            return left + right
+        return array('i', (a + b for a, b in zip(left, right)))
+
+    def _subtract(self, left, right):
+        if np is not None:
+            return left - right
+        return array('i', (a - b for a, b in zip(left, right)))
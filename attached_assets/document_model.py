@@ -0,0 +1,213 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\document_model.py
+import re
+from .morpheme_automaton import MorphemeScan
+
+PARAGRAPH_SEPARATOR_PATTERN = re.compile(r'(\n\n+)')
+SENTENCE_SEPARATOR_PATTERN = re.compile(r'(?<=[.!?])(\s+)')
+REFERENCES_PATTERN = re.compile(r"(## 참고자료[\s\S]*)", re.MULTILINE)
+LIST_ITEM_PATTERN = re.compile(r'^(?:[-*+]\s|\d+\.\s)')
+
+
+def char_len(text):
+    """ 공백 제외 글자수 (optimizer의 len(text.replace(" ", ""))와 동일) """
+    return len(text.replace(" ", ""))
+
+
+def split_references(content):
+    """
+    본문과 '## 참고자료' 섹션 분리
+
+    Returns:
+        tuple: (참고자료 제외 본문(strip), 참고자료 섹션 또는 None)
+    """
+    refs_match = REFERENCES_PATTERN.search(content)
+    if refs_match:
+        return content[:refs_match.start()].strip(), refs_match.group(1)
+    return content.strip(), None
+
+
+def _block_kind(text):
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+    if not lines:
+        return 'empty'
+    if lines[0].startswith('#'):
+        return 'heading'
+    if all(LIST_ITEM_PATTERN.match(line) for line in lines):
+        return 'list'
+    return 'paragraph'
+
+
+class DocumentBlock:
+    """
+    빈 줄("\\n\\n")로 구분된 블록 (소제목, 문단, 목록)
+    - 문장과 문장 사이 공백을 그대로 보존하므로 수정하지 않으면 원문과 동일하게 직렬화
+    - 삭제된 문장은 None으로 표시하여 나머지 문장의 인덱스가 바뀌지 않음
+    """
+
+    def __init__(self, text):
+        self.set_text(text)
+
+    def set_text(self, text):
+        """ 블록 전체 텍스트를 교체하고 문장 단위로 다시 분할 """
+        parts = SENTENCE_SEPARATOR_PATTERN.split(text)
+        self.sentences = parts[0::2]
+        self.separators = parts[1::2]  # separators[i]: sentences[i]와 sentences[i+1] 사이 공백
+        self.kind = _block_kind(text)
+        self._refresh()
+
+    def replace_sentence(self, sentence_idx, text):
+        """ 문장 교체 (빈 문자열이면 삭제) """
+        self.sentences[sentence_idx] = text if text else None
+        self._refresh()
+
+    def insert_sentence(self, position, text, separator=" "):
+        """ position 위치에 문장 삽입 (position == 문장 수이면 끝에 추가), 삽입된 문장 인덱스 반환 """
+        if position >= len(self.sentences):
+            self.sentences.append(text)
+            self.separators.append(separator)
+            position = len(self.sentences) - 1
+        else:
+            self.sentences.insert(position, text)
+            self.separators.insert(position, separator)
+        self._refresh()
+        return position
+
+    def append_sentence(self, text, separator=" "):
+        """ 블록 끝(뒤쪽 공백 앞)에 문장 추가 """
+        position = len(self.sentences)
+        while position > 0 and self.sentences[position - 1] == "":
+            position -= 1
+        return self.insert_sentence(position, text, separator)
+
+    def live_sentence_indices(self):
+        return [i for i, s in enumerate(self.sentences) if s]
+
+    @property
+    def is_deleted(self):
+        return all(s is None for s in self.sentences)
+
+    def _refresh(self):
+        pieces = []
+        for i, sentence in enumerate(self.sentences):
+            if sentence is None:
+                continue
+            if pieces:
+                pieces.append(self.separators[i - 1])
+            pieces.append(sentence)
+        self.text = "".join(pieces)
+        self.char_count = char_len(self.text)
+
+
+class ParsedDocument:
+    """
+    최적화/생성 단계에서 공유하는 파싱된 문서 모델
+    - 블록(소제목/문단/목록) -> 문장 구조와 구분자를 보존
+    - 블록별 공백 제외 글자수를 유지하여 전체 글자수 계산 시 원문을 다시 훑지 않음
+    - 모든 편집은 모델을 수정하고, 직렬화는 마지막에 한 번만 수행
+    """
+
+    def __init__(self, blocks, separators, refs_section=None):
+        self.blocks = blocks
+        self.separators = separators  # separators[i]: blocks[i]와 blocks[i+1] 사이 구분자
+        self.refs_section = refs_section
+        self._sentence_counts_cache = {}
+
+    @classmethod
+    def parse(cls, content, split_refs=False):
+        """
+        Args:
+            content (str): 원문
+            split_refs (bool): '## 참고자료' 섹션을 본문에서 분리할지 여부
+
+        Returns:
+            ParsedDocument: 파싱된 문서
+        """
+        refs_section = None
+        if split_refs:
+            content, refs_section = split_references(content)
+        parts = PARAGRAPH_SEPARATOR_PATTERN.split(content)
+        return cls([DocumentBlock(p) for p in parts[0::2]], parts[1::2], refs_section)
+
+    def _live_blocks(self):
+        """ (블록 인덱스, 앞 구분자) 목록 - 삭제된 블록과 그 구분자는 제외 """
+        live = []
+        for i, block in enumerate(self.blocks):
+            if block.is_deleted:
+                continue
+            live.append((i, self.separators[i - 1] if live else ""))
+        return live
+
+    @property
+    def char_count(self):
+        """ 참고자료를 제외한 본문의 공백 제외 글자수 """
+        return sum(self.blocks[i].char_count + char_len(sep) for i, sep in self._live_blocks())
+
+    def serialize(self, include_refs=False):
+        body = "".join(sep + self.blocks[i].text for i, sep in self._live_blocks())
+        if include_refs and self.refs_section:
+            return body + "\n\n" + self.refs_section
+        return body
+
+    def content_block_indices(self, min_length=0, kinds=('paragraph',)):
+        """ 본문 블록 인덱스 (기본값은 소제목/목록을 제외한 일반 문단) """
+        return [
+            i for i, block in enumerate(self.blocks)
+            if block.kind in kinds and not block.is_deleted and len(block.text.strip()) > min_length
+        ]
+
+    def sentence_refs(self):
+        """ 살아 있는 모든 문장의 (블록 인덱스, 문장 인덱스) 목록 (문서 순서) """
+        return [
+            (block_idx, sentence_idx)
+            for block_idx, _ in self._live_blocks()
+            for sentence_idx in self.blocks[block_idx].live_sentence_indices()
+        ]
+
+    def sentence(self, ref):
+        block_idx, sentence_idx = ref
+        return self.blocks[block_idx].sentences[sentence_idx]
+
+    def replace_sentence(self, ref, text):
+        """ 문장 교체 (빈 문자열이면 삭제) """
+        block_idx, sentence_idx = ref
+        self.blocks[block_idx].replace_sentence(sentence_idx, text)
+
+    def scan(self, automaton):
+        """
+        문장 단위로 목표 형태소를 카운트 (변경되지 않은 문장은 캐시된 결과 재사용)
+
+        Args:
+            automaton (MorphemeAutomaton): 목표 형태소 오토마톤
+
+        Returns:
+            tuple: (MorphemeScan, 스캔 결과의 문장 인덱스에 대응하는 sentence_refs 목록)
+        """
+        refs = [ref for ref in self.sentence_refs() if self.sentence(ref).strip()]
+        sentences = [self.sentence(ref) for ref in refs]
+        counts = dict.fromkeys(automaton.morphemes, 0)
+        sentence_counts = []
+        hits = {m: [] for m in automaton.morphemes}
+        for idx, sentence in enumerate(sentences):
+            # 오토마톤 객체 자체를 키로 사용 (id()는 오토마톤이 해제된 뒤 재사용될 수 있음)
+            cache_key = (automaton, sentence)
+            per_sentence = self._sentence_counts_cache.get(cache_key)
+            if per_sentence is None:
+                per_sentence = {m: n for m, n in automaton.count(sentence).items() if n}
+                self._sentence_counts_cache[cache_key] = per_sentence
+            sentence_counts.append(per_sentence)
+            for morpheme, n in per_sentence.items():
+                counts[morpheme] += n
+                hits[morpheme].append(idx)
+        return MorphemeScan(counts, sentences, sentence_counts, hits), refs
+
+    def iter_lines(self, include_refs=True):
+        """ 직렬화 결과를 줄 단위로 순회 (전체 문자열을 다시 만들지 않음) """
+        for block_idx, block_separator in self._live_blocks():
+            for _ in range(block_separator.count('\n') - 1):
+                yield ""
+            for line in self.blocks[block_idx].text.split('\n'):
+                yield line
+        if include_refs and self.refs_section:
+            yield ""
+            for line in self.refs_section.split('\n'):
+                yield line
@@ -0,0 +1,329 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\edit_planner.py
+import re
+import logging
+from .document_model import char_len
+from .local_reducer import standalone_positions, substitute_word
+
+logger = logging.getLogger(__name__)
+
+# 의미를 크게 바꾸지 않고 글자수만 줄이는 수식어/군더더기 패턴
+SHORTEN_PATTERNS = [
+    (re.compile(r"매우\s+"), ""), (re.compile(r"정말\s+"), ""), (re.compile(r"아주\s+"), ""),
+    (re.compile(r"하는\s+것은"), ""), (re.compile(r"에\s+대하여"), ""), (re.compile(r"에\s+관한"), ""),
+    (re.compile(r"이라고\s+할\s+수\s+있다"), ""), (re.compile(r"라고\s+볼\s+수\s+있다"), ""),
+]
+
+# 글자수 1자 초과/미달을 형태소 1회 초과/미달의 몇 분의 1로 볼지 (20자 ≒ 형태소 1회)
+CHAR_PENALTY_DIVISOR = 20
+
+EDIT_DELETE = 'delete'
+EDIT_SHORTEN = 'shorten'
+EDIT_SUBSTITUTE = 'substitute'
+EDIT_INSERT = 'insert'
+
+
+class CandidateEdit:
+    """
+    후보 편집 하나와 그 효과
+    - char_delta: 공백 제외 글자수 변화
+    - deltas: 형태소별 출현 횟수 변화 (포함 관계 반영: '엔진오일' 삽입 시 '엔진', '오일'도 증가)
+    """
+
+    __slots__ = ('kind', 'ref', 'block_idx', 'text', 'char_delta', 'deltas', 'template')
+
+    def __init__(self, kind, char_delta, deltas, ref=None, block_idx=None, text="", template=None):
+        self.kind = kind
+        self.ref = ref                # 기존 문장 편집: (블록 인덱스, 문장 인덱스)
+        self.block_idx = block_idx    # 삽입: 대상 블록 인덱스 (계획 시 결정)
+        self.text = text              # 바뀐 문장 또는 삽입할 문장 (삭제는 빈 문자열)
+        self.char_delta = char_delta
+        self.deltas = deltas
+        self.template = template      # 삽입 후보의 원본 템플릿 (반복 사용 횟수 집계용)
+
+
+class EditPlan:
+    """ 계획된 편집 목록과 적용 후 예상 상태 """
+
+    def __init__(self, edits, char_count, counts, violations):
+        self.edits = edits
+        self.char_count = char_count
+        self.counts = counts
+        self.violations = violations
+
+    @property
+    def feasible(self):
+        return not self.violations
+
+    def summary(self):
+        kinds = {}
+        for edit in self.edits:
+            kinds[edit.kind] = kinds.get(edit.kind, 0) + 1
+        return {
+            'feasible': self.feasible,
+            'edits': kinds,
+            'char_count': self.char_count,
+            'violations': self.violations
+        }
+
+
+class EditPlanner:
+    """
+    글자수와 목표 형태소 횟수를 함께 만족하는 편집 계획 수립
+    - 문장 삭제/축약/단어 대체/템플릿 삽입 후보의 효과를 오토마톤으로 미리 계산
+    - 위반량(범위를 벗어난 정도)의 합을 가장 크게 줄이는 편집을 하나씩 선택
+    - 한 문장에는 편집을 하나만 적용하고, 위반량이 0이 되거나 더 줄일 수 없으면 종료
+    - 같은 템플릿(채우는 단어만 다른 문형 포함)은 문서 전체에서 MAX_TEMPLATE_USES회, 한 블록에는 한 번만 삽입
+      (이미 문서에 있는 템플릿 문장도 사용 횟수에 포함)
+    - 남은 위반은 violations로 보고 (조건을 동시에 만족할 수 없음)
+    """
+
+    MAX_REPAIR_EDITS = 3
+    MAX_TEMPLATE_USES = 2
+
+    def __init__(self, automaton, ranges, char_range, substitutions=None, template_registry=None, max_edits=200):
+        """
+        Args:
+            automaton (MorphemeAutomaton): 목표 형태소 오토마톤
+            ranges (dict): 형태소별 (최소, 최대) 횟수
+            char_range (tuple): (최소, 최대) 글자수 (공백 제외)
+            substitutions (callable): 형태소 -> 대체어 목록
+            template_registry (TemplateRegistry): 기여도가 미리 계산된 삽입 문장 레지스트리
+            max_edits (int): 최대 편집 수
+        """
+        self.automaton = automaton
+        self.ranges = ranges
+        self.char_range = char_range
+        self.substitutions = substitutions
+        self.template_registry = template_registry
+        self.max_edits = max_edits
+
+    def plan(self, document):
+        """
+        Args:
+            document (ParsedDocument): 편집 대상 문서 (변경하지 않음)
+
+        Returns:
+            EditPlan: 편집 계획
+        """
+        scan, refs = document.scan(self.automaton)
+        counts = {m: scan.counts.get(m, 0) for m in self.ranges}
+        char_count = document.char_count
+
+        target_blocks = document.content_block_indices()
+        if not target_blocks:
+            target_blocks = document.content_block_indices(kinds=('paragraph', 'list'))
+        live_per_block = {}
+        for block_idx, _ in refs:
+            live_per_block[block_idx] = live_per_block.get(block_idx, 0) + 1
+
+        # 소제목은 편집하지 않음
+        editable_blocks = set(document.content_block_indices(kinds=('paragraph', 'list')))
+        sentence_candidates = self._sentence_candidates(scan, refs, counts, editable_blocks)
+        insert_candidates = self._insert_candidates() if target_blocks and self.template_registry else []
+
+        edits = []
+        used_refs = set()
+        inserts_per_block = dict.fromkeys(target_blocks, 0)
+        # 문서에 이미 있는 템플릿 문장도 사용 횟수에 포함 (이전 최적화에서 삽입된 문장 등)
+        template_of = {edit.text: edit.template for edit in insert_candidates}
+        template_uses = {}
+        block_templates = {block_idx: set() for block_idx in target_blocks}
+        for (block_idx, _), sentence in zip(refs, scan.sentences):
+            template = template_of.get(sentence.strip())
+            if template is not None:
+                template_uses[template] = template_uses.get(template, 0) + 1
+                block_templates.setdefault(block_idx, set()).add(template)
+        penalty = self._penalty(counts, char_count)
+
+        while penalty > 0 and len(edits) < self.max_edits:
+            best = None
+            best_key = None
+            available_inserts = [
+                edit for edit in insert_candidates
+                if template_uses.get(edit.template, 0) < self.MAX_TEMPLATE_USES
+                and self._insert_block(edit.template, target_blocks, inserts_per_block, block_templates) is not None
+            ]
+            for edit in sentence_candidates:
+                if edit.ref in used_refs:
+                    continue
+                if edit.kind == EDIT_DELETE and live_per_block.get(edit.ref[0], 0) <= 1:
+                    continue
+                gain = penalty - self._penalty_after(penalty, counts, char_count, edit)
+                if gain <= 0:
+                    continue
+                key = (gain, -len(edit.deltas), 0)
+                if best_key is None or key > best_key:
+                    best, best_key = edit, key
+            for edit in available_inserts:
+                gain = penalty - self._penalty_after(penalty, counts, char_count, edit)
+                if gain <= 0:
+                    continue
+                key = (gain, -len(edit.deltas), -template_uses.get(edit.template, 0))
+                if best_key is None or key > best_key:
+                    best, best_key = edit, key
+
+            if best is None:
+                # 단독으로는 개선이 없을 때 (예: '엔진오일' 삽입이 이미 최대인 '엔진', '오일'을 늘림)
+                # 삽입과 기존 문장 편집을 묶어서 교환
+                selected = self._best_exchange(penalty, counts, char_count, sentence_candidates, available_inserts, used_refs, live_per_block)
+                if selected is None:
+                    break
+            else:
+                selected = [best]
+
+            for best in selected:
+                if best.kind == EDIT_INSERT:
+                    block_idx = self._insert_block(best.template, target_blocks, inserts_per_block, block_templates)
+                    inserts_per_block[block_idx] += 1
+                    block_templates[block_idx].add(best.template)
+                    template_uses[best.template] = template_uses.get(best.template, 0) + 1
+                    best = CandidateEdit(EDIT_INSERT, best.char_delta, best.deltas, block_idx=block_idx, text=best.text, template=best.template)
+                else:
+                    used_refs.add(best.ref)
+                    if best.kind == EDIT_DELETE:
+                        live_per_block[best.ref[0]] -= 1
+
+                for morpheme, delta in best.deltas.items():
+                    counts[morpheme] += delta
+                char_count += best.char_delta
+                edits.append(best)
+            penalty = self._penalty(counts, char_count)
+
+        plan = EditPlan(edits, char_count, counts, self._violations(counts, char_count))
+        logger.info(f"편집 계획: {plan.summary()}")
+        return plan
+
+    def _insert_block(self, template, target_blocks, inserts_per_block, block_templates):
+        """ 템플릿이 아직 없는 블록 중 삽입이 가장 적은 블록 (없으면 None) """
+        blocks = [idx for idx in target_blocks if template not in block_templates[idx]]
+        if not blocks:
+            return None
+        return min(blocks, key=lambda idx: (inserts_per_block[idx], idx))
+
+    def _best_exchange(self, penalty, counts, char_count, sentence_candidates, insert_candidates, used_refs, live_per_block):
+        """
+        부족한 형태소를 늘리는 삽입 1개 + 그 때문에 넘치는 형태소를 되돌리는 기존 문장 편집(최대 MAX_REPAIR_EDITS개)
+        묶음 중 전체 위반량을 가장 많이 줄이는 묶음
+        """
+        deficient = {m for m, count in counts.items() if count < self.ranges[m][0]}
+        inserts = [edit for edit in insert_candidates if deficient.intersection(edit.deltas)]
+
+        best_bundle = None
+        best_penalty = penalty
+        for insert_edit in inserts:
+            bundle = [insert_edit]
+            bundle_counts = dict(counts)
+            for morpheme, delta in insert_edit.deltas.items():
+                bundle_counts[morpheme] += delta
+            bundle_chars = char_count + insert_edit.char_delta
+            bundle_penalty = self._penalty(bundle_counts, bundle_chars)
+            bundle_refs = set()
+            for _ in range(self.MAX_REPAIR_EDITS):
+                repair = None
+                repair_penalty = bundle_penalty
+                for edit in sentence_candidates:
+                    if edit.ref in used_refs or edit.ref in bundle_refs:
+                        continue
+                    if edit.kind == EDIT_DELETE and live_per_block.get(edit.ref[0], 0) <= 1:
+                        continue
+                    edit_penalty = self._penalty_after(bundle_penalty, bundle_counts, bundle_chars, edit)
+                    if edit_penalty < repair_penalty:
+                        repair, repair_penalty = edit, edit_penalty
+                if repair is None:
+                    break
+                bundle.append(repair)
+                bundle_refs.add(repair.ref)
+                for morpheme, delta in repair.deltas.items():
+                    bundle_counts[morpheme] += delta
+                bundle_chars += repair.char_delta
+                bundle_penalty = repair_penalty
+            if bundle_penalty < best_penalty:
+                best_bundle, best_penalty = bundle, bundle_penalty
+        return best_bundle
+
+    def apply(self, document, plan):
+        """ 계획을 문서에 적용 (기존 문장 편집 후 삽입 순서로 적용하여 문장 인덱스를 유지) """
+        for edit in plan.edits:
+            if edit.kind != EDIT_INSERT:
+                document.replace_sentence(edit.ref, edit.text)
+        for edit in plan.edits:
+            if edit.kind == EDIT_INSERT:
+                document.blocks[edit.block_idx].append_sentence(edit.text)
+        return document
+
+    def _sentence_candidates(self, scan, refs, counts, editable_blocks):
+        candidates = []
+        for idx, (ref, sentence) in enumerate(zip(refs, scan.sentences)):
+            if ref[0] not in editable_blocks:
+                continue
+            sentence_counts = scan.sentence_counts[idx]
+            removed = {m: -n for m, n in sentence_counts.items() if m in self.ranges}
+            candidates.append(CandidateEdit(EDIT_DELETE, -char_len(sentence), removed, ref=ref))
+
+            shortened = sentence
+            for pattern, replacement in SHORTEN_PATTERNS:
+                shortened = pattern.sub(replacement, shortened)
+            if shortened != sentence and shortened.strip():
+                candidates.append(self._rewrite_candidate(EDIT_SHORTEN, ref, sentence, shortened, sentence_counts))
+
+            if not self.substitutions:
+                continue
+            for morpheme in sentence_counts:
+                # 독립된 단어로 쓰인 첫 출현만 대체 ('엔진가격', '엔진오일'처럼 다른 단어의 일부는 건드리지 않음)
+                positions = standalone_positions(sentence, morpheme)
+                if not positions:
+                    continue
+                for substitute in [s for s in self.substitutions(morpheme) if s][:5]:
+                    rewritten = substitute_word(sentence, morpheme, positions[0], substitute)
+                    if rewritten and rewritten.strip():
+                        candidates.append(self._rewrite_candidate(EDIT_SUBSTITUTE, ref, sentence, rewritten, sentence_counts))
+        return candidates
+
+    def _rewrite_candidate(self, kind, ref, sentence, rewritten, sentence_counts):
+        new_counts = self.automaton.count(rewritten)
+        deltas = {}
+        for morpheme in self.ranges:
+            delta = new_counts.get(morpheme, 0) - sentence_counts.get(morpheme, 0)
+            if delta:
+                deltas[morpheme] = delta
+        return CandidateEdit(kind, char_len(rewritten) - char_len(sentence), deltas, ref=ref, text=rewritten)
+
+    def _insert_candidates(self):
+        # 레지스트리에 미리 계산된 기여도를 그대로 사용 (삽입 후보마다 다시 탐색하지 않음)
+        candidates = []
+        seen = set()
+        for entry in self.template_registry.insertion_entries():
+            if entry.text in seen:
+                continue
+            seen.add(entry.text)
+            deltas = {m: n for m, n in entry.contribution.items() if m in self.ranges}
+            candidates.append(CandidateEdit(EDIT_INSERT, entry.char_count, deltas, text=entry.text, template=entry.template))
+        return candidates
+
+    def _morpheme_violation(self, morpheme, count):
+        low, high = self.ranges[morpheme]
+        return max(low - count, 0) + max(count - high, 0)
+
+    def _char_violation(self, char_count):
+        low, high = self.char_range
+        return (max(low - char_count, 0) + max(char_count - high, 0)) / CHAR_PENALTY_DIVISOR
+
+    def _penalty(self, counts, char_count):
+        return sum(self._morpheme_violation(m, c) for m, c in counts.items()) + self._char_violation(char_count)
+
+    def _penalty_after(self, penalty, counts, char_count, edit):
+        penalty += self._char_violation(char_count + edit.char_delta) - self._char_violation(char_count)
+        for morpheme, delta in edit.deltas.items():
+            penalty += self._morpheme_violation(morpheme, counts[morpheme] + delta) - self._morpheme_violation(morpheme, counts[morpheme])
+        return penalty
+
+    def _violations(self, counts, char_count):
+        violations = []
+        low, high = self.char_range
+        if not low <= char_count <= high:
+            violations.append(f"글자수 {char_count}자 (목표 {low}-{high}자)")
+        for morpheme, count in counts.items():
+            low, high = self.ranges[morpheme]
+            if not low <= count <= high:
+                violations.append(f"'{morpheme}' {count}회 (목표 {low}-{high}회)")
+        return violations
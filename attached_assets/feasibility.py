@@ -0,0 +1,165 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\feasibility.py
+import logging
+from .document_model import char_len
+
+logger = logging.getLogger(__name__)
+
+
+class FeasibilityReport:
+    """
+    목표 형태소 범위의 동시 달성 가능 여부
+    - ranges: 형태소별 달성 가능한 (최소, 최대) 횟수 (충돌 시 가장 가까운 달성 가능 범위로 조정됨)
+    - requested_ranges: 원래 요청된 범위
+    - containment: {포함하는 형태소: {포함된 형태소: 횟수}} ('엔진오일' -> {'엔진': 1, '오일': 1})
+    - conflicts: 원래 범위로는 달성할 수 없는 이유 목록
+    """
+
+    def __init__(self, ranges, requested_ranges, containment, conflicts, min_required_chars):
+        self.ranges = ranges
+        self.requested_ranges = requested_ranges
+        self.containment = containment
+        self.conflicts = conflicts
+        self.min_required_chars = min_required_chars
+
+    @property
+    def feasible(self):
+        return not self.conflicts
+
+    def adjusted_morphemes(self):
+        """ 범위가 조정된 형태소 목록 """
+        return [m for m, r in self.ranges.items() if r != self.requested_ranges[m]]
+
+    def summary(self):
+        """ 결과 메타데이터에 남길 충돌 사유와 조정된 범위 """
+        return {
+            'feasible': self.feasible,
+            'conflicts': self.conflicts,
+            'adjusted_ranges': {m: list(self.ranges[m]) for m in self.adjusted_morphemes()},
+        }
+
+
+def build_containment(automaton, morphemes):
+    """
+    각 목표 형태소의 텍스트 안에 다른 목표 형태소가 몇 번 들어 있는지 계산
+    (복합 키워드 1회 출현은 포함된 기본 형태소도 그만큼 증가시킴)
+
+    Returns:
+        dict: {포함하는 형태소: {포함된 형태소: 횟수}}
+    """
+    containment = {}
+    for container in morphemes:
+        inner_counts = automaton.count(container)
+        contained = {m: n for m, n in inner_counts.items() if n and m != container and m in morphemes}
+        if contained:
+            containment[container] = contained
+    return containment
+
+
+def _propagate(low, high, containers_of, max_rounds):
+    """ 포함 관계에 따른 최소/최대치 전파 (변화가 없을 때까지) """
+    for _ in range(max_rounds + 1):
+        changed = False
+        for morpheme, containers in containers_of.items():
+            forced_low = sum(multiplicity * low[c] for c, multiplicity in containers.items())
+            if forced_low > low[morpheme]:
+                low[morpheme] = forced_low
+                changed = True
+            for container, multiplicity in containers.items():
+                others = sum(k * low[c] for c, k in containers.items() if c != container)
+                container_high = max((high[morpheme] - others) // multiplicity, 0)
+                if container_high < high[container]:
+                    high[container] = container_high
+                    changed = True
+        if not changed:
+            break
+
+
+def analyze_feasibility(automaton, ranges, char_range=None):
+    """
+    포함 관계를 고려하여 목표 범위를 동시에 만족할 수 있는지 검사하고 달성 가능한 범위를 계산
+
+    - 포함된 형태소의 최소치: 포함하는 형태소들의 최소치가 강제하는 횟수 이상
+    - 포함하는 형태소의 최대치: 포함된 형태소의 최대치를 넘기지 않는 횟수 이하
+    - 충돌(최소 > 최대)이 있으면 포함된 형태소의 최대치를 강제 최소치까지 올려 가장 가까운 달성 가능 범위로 조정
+
+    Args:
+        automaton (MorphemeAutomaton): 목표 형태소 오토마톤
+        ranges (dict): 형태소별 요청 (최소, 최대) 횟수
+        char_range (tuple): (최소, 최대) 글자수, 주어지면 최소 출현에 필요한 글자수도 검사
+
+    Returns:
+        FeasibilityReport: 검사 결과
+    """
+    morphemes = list(ranges)
+    containment = build_containment(automaton, set(morphemes))
+    low = {m: ranges[m][0] for m in morphemes}
+    high = {m: ranges[m][1] for m in morphemes}
+    conflicts = []
+
+    # 포함된 형태소 -> {포함하는 형태소: 횟수}
+    containers_of = {}
+    for container, contained in containment.items():
+        for morpheme, multiplicity in contained.items():
+            containers_of.setdefault(morpheme, {})[container] = multiplicity
+
+    _propagate(low, high, containers_of, len(morphemes))
+
+    # 포함하는 형태소의 최소 출현만으로 최대치를 넘는 형태소: 최대치를 강제 최소치까지 허용 (가장 가까운 달성 가능 목표)
+    relaxed_high = {m: ranges[m][1] for m in morphemes}
+    for morpheme, containers in containers_of.items():
+        if low[morpheme] <= high[morpheme]:
+            continue
+        names = ", ".join(f"'{c}'" for c in containers)
+        conflicts.append(f"'{morpheme}' 최대 {ranges[morpheme][1]}회는 {names} 최소 출현만으로 {low[morpheme]}회가 되어 달성 불가")
+        relaxed_high[morpheme] = low[morpheme]
+    if conflicts:
+        low = {m: ranges[m][0] for m in morphemes}
+        high = relaxed_high
+        _propagate(low, high, containers_of, len(morphemes))
+
+    for morpheme in morphemes:
+        if low[morpheme] > high[morpheme]:
+            conflicts.append(f"'{morpheme}' 범위 {ranges[morpheme][0]}-{ranges[morpheme][1]}회가 포함 관계 때문에 달성 불가")
+            low[morpheme] = high[morpheme]
+
+    # 최소 출현만으로 필요한 글자수 (포함된 출현은 포함하는 형태소 안에서 이미 셈)
+    min_required_chars = 0
+    for morpheme in morphemes:
+        forced = sum(k * low[c] for c, k in containers_of.get(morpheme, {}).items())
+        min_required_chars += max(low[morpheme] - forced, 0) * char_len(morpheme)
+    if char_range and min_required_chars > char_range[1]:
+        conflicts.append(f"목표 형태소 최소 출현에만 {min_required_chars}자가 필요하여 최대 글자수 {char_range[1]}자 초과")
+
+    report = FeasibilityReport(
+        {m: (low[m], high[m]) for m in morphemes},
+        dict(ranges),
+        containment,
+        conflicts,
+        min_required_chars
+    )
+    if conflicts:
+        logger.warning(f"목표 범위 충돌 {len(conflicts)}건: {'; '.join(conflicts)}")
+    elif report.adjusted_morphemes():
+        logger.info(f"포함 관계로 좁아진 목표 범위: { {m: report.ranges[m] for m in report.adjusted_morphemes()} }")
+    return report
+
+
+def target_ranges(morpheme_analyzer, morpheme_types):
+    """
+    MorphemeAnalyzer의 유형별 목표 범위를 형태소별 범위로 변환
+
+    Args:
+        morpheme_analyzer (MorphemeAnalyzer): 범위 속성을 가진 분석기
+        morpheme_types (dict): {형태소: 'base' | 'compound'}
+
+    Returns:
+        dict: {형태소: (최소, 최대)}
+    """
+    ma = morpheme_analyzer
+    ranges = {}
+    for morpheme, morpheme_type in morpheme_types.items():
+        if morpheme_type == 'compound':
+            ranges[morpheme] = (ma.target_min_compound_count, ma.target_max_compound_count)
+        else:
+            ranges[morpheme] = (ma.target_min_base_count, ma.target_max_base_count)
+    return ranges
@@ -3,17 +3,29 @@ import re
 import json
 import logging
 import time
+import random
+import asyncio
 import traceback
 from urllib.parse import urlparse
-from django.conf import settings
-from konlpy.tag import Okt
-from anthropic import Anthropic
+from django.db import transaction
+from asgiref.sync import sync_to_async
+import anthropic
 from research.models import ResearchSource, StatisticData
 from key_word.models import Keyword, Subtopic
-from content.models import BlogContent, MorphemeAnalysis
+from content.models import BlogContent
 from accounts.models import User
 from .substitution_generator import SubstitutionGenerator
-from .morpheme_analyzer import MorphemeAnalyzer 
+from .document_model import ParsedDocument, char_len
+from .morpheme_service import get_tokenizer, get_morpheme_analyzer
+from .analysis_persistence import save_content_analysis
+from .compact_analysis import COMPACT_ANALYSIS_META_KEY, encode_analysis, stores_compact
+from .morpheme_automaton import get_automaton
+from .llm_clients import get_client_registry
+from .rate_limiter import get_rate_limiter
+from .llm_router import HedgedRouter, complete_text, acomplete_text
+from .model_tiers import TieredModelRouter, TierResponseRejected
+from .job_budget import JobBudget, BudgetExhausted, JOB_BUDGET_META_KEY, activate_budget, current_budget, budget_allows, begin_llm_call, record_llm_usage
+from .llm_streaming import StreamAborted, streaming_enabled, build_stream_guard, correction_note, hedge_stream_guard, stream_anthropic_text, astream_anthropic_text
 
 logger = logging.getLogger(__name__)
 
@@ -24,19 +36,29 @@ class ContentGenerator:
     - 생성과 동시에 최적화 조건을 만족하는 콘텐츠 생성
     """
     
-    def __init__(self):
-        self.anthropic_api_key = settings.ANTHROPIC_API_KEY
+    def __init__(self, client_registry=None):
+        """
+        Args:
+            client_registry (LLMClientRegistry): LLM 클라이언트 레지스트리 (None이면 프로세스 공용, 테스트 시 스텁 서버용 주입)
+        """
+        self.client_registry = client_registry or get_client_registry()
         self.model = "claude-sonnet-4-20250514" # Model updated
-        self.client = Anthropic(api_key=self.anthropic_api_key)
-        self.okt = Okt()
+        self.client = self.client_registry.anthropic()
+        self.okt = get_tokenizer()
         self.max_retries = 3 # API 호출 재시도 횟수
         self.retry_delay = 5 # 재시도 간격 (초)
         self.substitution_generator = SubstitutionGenerator()
-        self.morpheme_analyzer = MorphemeAnalyzer() # Instance of the new MorphemeAnalyzer
+        self.morpheme_analyzer = get_morpheme_analyzer()
+
+    @property
+    def async_client(self):
+        """ agenerate_content용 AsyncAnthropic 클라이언트 (현재 이벤트 루프의 공용 클라이언트) """
+        return self.client_registry.async_anthropic()
     
-    def generate_content(self, keyword_id, user_id, target_audience=None, business_info=None, custom_morphemes=None, subtopics_list=None):
+    def generate_content(self, keyword_id, user_id, target_audience=None, business_info=None, custom_morphemes=None, subtopics_list=None, budget=None):
         """
         키워드 기반 블로그 콘텐츠 생성 (최적화 조건 충족)
+        작업 예산이 다하면 추가 최적화/재시도를 건너뛰고 그때까지의 결과를 저장 (종료 사유는 meta_data에 기록)
         
         Args:
             keyword_id (int): 키워드 ID
@@ -45,10 +67,18 @@ class ContentGenerator:
             business_info (dict): 사업자 정보
             custom_morphemes (list): 사용자 지정 형태소 목록
             subtopics_list (list): 명시적으로 전달된 소제목 목록 (기본값 None)
+            budget (JobBudget): 작업 예산 (None이면 LLM_JOB_BUDGETS['generation'])
             
         Returns:
             int: 생성된 BlogContent 객체의 ID, 실패 시 None
         """
+        with activate_budget(budget or JobBudget.for_job('generation')):
+            return self._generate_content(keyword_id, user_id, target_audience, business_info, custom_morphemes, subtopics_list)
+
+    def _generate_content(self, keyword_id, user_id, target_audience, business_info, custom_morphemes, subtopics_list):
+        keyword_text = None
+        existing_content = None
+        stream_correction = None # 제약 초과로 중단된 직전 응답에 대한 교정 지시
         for attempt in range(self.max_retries):
             try:
                 keyword_obj = Keyword.objects.get(id=keyword_id)
@@ -59,56 +89,31 @@ class ContentGenerator:
                 if current_subtopics is None:
                     current_subtopics = list(keyword_obj.subtopics.order_by('order').values_list('title', flat=True))
                 
-                news_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='news')
-                academic_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='academic')
-                general_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='general')
-                statistics = StatisticData.objects.filter(source__keyword=keyword_obj)
-                
                 existing_content = BlogContent.objects.filter(
                     keyword=keyword_obj, 
                     user=user, 
                     title__contains="(생성 중...)"
                 ).order_by('-created_at').first()
                 
-                data_for_prompt = {
-                    "keyword": keyword_text,
-                    "subtopics": current_subtopics,
-                    "target_audience": target_audience or {
-                        "primary": keyword_obj.main_intent or "일반 사용자",
-                        "pain_points": keyword_obj.pain_points or ["정보 부족"]
-                    },
-                    "business_info": business_info or {
-                        "name": user.username,
-                        "expertise": user.profile.expertise if hasattr(user, 'profile') and hasattr(user.profile, 'expertise') else "관련 분야 전문가"
-                    },
-                    "custom_morphemes": custom_morphemes, 
-                    "research_data": self._format_research_data(
-                        news_sources, academic_sources, general_sources, statistics
-                    )
-                }
+                data_for_prompt = self._build_prompt_data(keyword_obj, user, current_subtopics, target_audience, business_info, custom_morphemes)
                 
                 logger.info(f"콘텐츠 생성 API 호출 시작 (시도 {attempt+1}/{self.max_retries}): 키워드={keyword_text}, 사용자={user.username}")
                 logger.info(f"콘텐츠 생성에 사용되는 소제목: {current_subtopics}")
 
                 prompt = self._create_optimized_content_prompt(data_for_prompt)
+                if stream_correction:
+                    prompt += stream_correction
                 
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=4096,
-                    temperature=0.7,
-                    messages=[{"role": "user", "content": prompt}]
-                )
+                generated_content_text = self._create_message(prompt, 0.7, keyword_text, custom_morphemes)
                 
                 logger.info("콘텐츠 생성 API 호출 완료")
                 
-                generated_content_text = response.content[0].text
-                
                 initial_analysis = self.morpheme_analyzer.analyze(generated_content_text, keyword_text, custom_morphemes)
                 
                 final_content_to_save = generated_content_text
                 final_analysis_for_db = initial_analysis
 
-                if not initial_analysis['is_fully_optimized']:
+                if not initial_analysis['is_fully_optimized'] and budget_allows('verification_rewrite'):
                     logger.info("1차 생성 콘텐츠 최적화 필요. 추가 최적화 시도.")
                     logger.info(f"1차 검증 결과: 글자수={initial_analysis['char_count']} (유효: {initial_analysis['is_valid_char_count']}), 목표형태소 유효={initial_analysis['is_valid_morphemes']}")
                     
@@ -119,65 +124,51 @@ class ContentGenerator:
                         initial_analysis
                     )
                     
-                    optimization_response = self.client.messages.create(
-                        model=self.model,
-                        max_tokens=4096,
-                        temperature=0.5,
-                        messages=[{"role": "user", "content": optimization_prompt}]
+                    try:
+                        optimized_content_after_verify_prompt = self._create_message(optimization_prompt, 0.5, keyword_text, custom_morphemes, task='verification_rewrite')
+                        analysis_after_verify_prompt = self.morpheme_analyzer.analyze(optimized_content_after_verify_prompt, keyword_text, custom_morphemes)
+                        logger.info(f"추가 최적화 시도 후 결과: 글자수={analysis_after_verify_prompt['char_count']}, 목표형태소 유효={analysis_after_verify_prompt['is_valid_morphemes']}")
+                    except StreamAborted as e:
+                        logger.warning(f"추가 최적화 응답 중단: {e.reason}")
+                        optimized_content_after_verify_prompt = None
+                        analysis_after_verify_prompt = None
+                    except BudgetExhausted as e:
+                        logger.warning(f"추가 최적화 생략: {e}")
+                        optimized_content_after_verify_prompt = None
+                        analysis_after_verify_prompt = None
+
+                    final_content_to_save, final_analysis_for_db = self._choose_verified_content(
+                        generated_content_text, initial_analysis,
+                        optimized_content_after_verify_prompt, analysis_after_verify_prompt
                     )
-                    
-                    optimized_content_after_verify_prompt = optimization_response.content[0].text
-                    analysis_after_verify_prompt = self.morpheme_analyzer.analyze(optimized_content_after_verify_prompt, keyword_text, custom_morphemes)
-                    
-                    logger.info(f"추가 최적화 시도 후 결과: 글자수={analysis_after_verify_prompt['char_count']}, 목표형태소 유효={analysis_after_verify_prompt['is_valid_morphemes']}")
-
-                    if self.morpheme_analyzer.is_better_optimization(analysis_after_verify_prompt, initial_analysis):
-                        final_content_to_save = optimized_content_after_verify_prompt
-                        final_analysis_for_db = analysis_after_verify_prompt
-                        logger.info("추가 최적화된 콘텐츠 사용: 더 나은 결과")
-                    else:
-                        logger.info("1차 생성 콘텐츠 사용: 추가 최적화 후 개선되지 않음")
                 
-                content_with_references = self._add_references(final_content_to_save, data_for_prompt['research_data'])
-                mobile_formatted_content = self._format_for_mobile(content_with_references)
-                references_list = self._extract_references(content_with_references)
-                
-                if existing_content:
-                    existing_content.delete()
-                
-                blog_content = BlogContent.objects.create(
-                    user=user,
-                    keyword=keyword_obj,
-                    title=f"{keyword_text} 완벽 가이드", 
-                    content=content_with_references,
-                    mobile_formatted_content=mobile_formatted_content,
-                    references=references_list,
-                    char_count=final_analysis_for_db['char_count'],
-                    is_optimized=final_analysis_for_db['is_fully_optimized'] 
+                blog_content = self._save_generated_content(
+                    user, keyword_obj, existing_content, final_content_to_save, final_analysis_for_db,
+                    custom_morphemes, data_for_prompt['research_data']
                 )
                 
-                logger.info("형태소 분석 결과 저장 시작")
-                if 'morpheme_analysis' in final_analysis_for_db and 'counts' in final_analysis_for_db['morpheme_analysis']:
-                    for morpheme, info in final_analysis_for_db['morpheme_analysis']['counts'].items():
-                        MorphemeAnalysis.objects.create(
-                            content=blog_content,
-                            morpheme=morpheme,
-                            count=info.get('count', 0),
-                            is_valid=info.get('is_valid', False),
-                            morpheme_type=info.get('type', 'unknown') # Save morpheme type
-                        )
-                
                 logger.info(f"콘텐츠 생성 완료: ID={blog_content.id}")
                 return blog_content.id
                     
+            except StreamAborted as e:
+                logger.warning(f"콘텐츠 생성 응답 중단 (시도 {attempt+1}/{self.max_retries}): {e.reason}")
+                if attempt >= self.max_retries - 1:
+                    logger.error("최대 재시도 횟수 초과. 제약을 넘는 응답이 반복되어 콘텐츠 생성 실패.")
+                    self._mark_generation_failed(existing_content, keyword_text, e.reason)
+                    return None
+                # 같은 프롬프트에 교정 지시를 덧붙여 바로 다시 생성
+                stream_correction = correction_note(e.reason, self.morpheme_analyzer)
+
+            except BudgetExhausted as e:
+                logger.error(f"콘텐츠 생성 중단: {e}")
+                self._mark_generation_failed(existing_content, keyword_text, str(e))
+                return None
+
             except anthropic.OverloadedError as e:
                 logger.warning(f"Anthropic API 과부하 (시도 {attempt+1}/{self.max_retries}). 오류: {e}")
                 if attempt >= self.max_retries - 1:
                     logger.error("최대 재시도 횟수 초과. API 과부하가 지속됩니다.")
-                    if existing_content:
-                        existing_content.title = f"{keyword_text} (생성 실패)"
-                        existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {str(e)}"
-                        existing_content.save()
+                    self._mark_generation_failed(existing_content, keyword_text, str(e))
                     return None
                 
                 # Exponential backoff: 1s, 2s, 4s, ... + random jitter
@@ -190,22 +181,322 @@ class ContentGenerator:
                 traceback.print_exc()
                 if attempt >= self.max_retries - 1:
                     logger.error("최대 재시도 횟수 초과. API 오류로 콘텐츠 생성 실패.")
-                    if existing_content:
-                        existing_content.title = f"{keyword_text} (생성 실패)"
-                        existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {str(e)}"
-                        existing_content.save()
+                    self._mark_generation_failed(existing_content, keyword_text, str(e))
                     return None
                 time.sleep(self.retry_delay) # Fixed delay for other API errors
 
             except Exception as e:
                 logger.error(f"콘텐츠 생성 중 예기치 않은 오류 발생: {e}")
                 traceback.print_exc()
-                if existing_content:
-                    existing_content.title = f"{keyword_text} (생성 실패)"
-                    existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {str(e)}"
-                    existing_content.save()
+                self._mark_generation_failed(existing_content, keyword_text, str(e))
                 return None # For unexpected errors, fail fast
+
+    async def agenerate_content(self, keyword_id, user_id, target_audience=None, business_info=None, custom_morphemes=None, subtopics_list=None, budget=None):
+        """
+        generate_content의 비동기 버전
+        - Claude 호출은 AsyncAnthropic, 재시도 대기는 asyncio.sleep, 단건 조회는 Django 비동기 ORM 사용
+        - 형태소 분석과 트랜잭션 저장은 sync_to_async로 한 스레드에서 실행 (Okt/트랜잭션을 스레드 간에 공유하지 않음)
+        - LLM 응답을 기다리는 동안 같은 워커가 다른 작업을 진행할 수 있음
+
+        Args/Returns: generate_content와 동일
+        """
+        with activate_budget(budget or JobBudget.for_job('generation')):
+            return await self._agenerate_content(keyword_id, user_id, target_audience, business_info, custom_morphemes, subtopics_list)
+
+    async def _agenerate_content(self, keyword_id, user_id, target_audience, business_info, custom_morphemes, subtopics_list):
+        analyze = sync_to_async(self.morpheme_analyzer.analyze)
+        keyword_text = None
+        existing_content = None
+        stream_correction = None
+        for attempt in range(self.max_retries):
+            try:
+                keyword_obj = await Keyword.objects.aget(id=keyword_id)
+                keyword_text = keyword_obj.keyword
+                user = await User.objects.aget(id=user_id)
+
+                current_subtopics = subtopics_list
+                if current_subtopics is None:
+                    current_subtopics = [
+                        title async for title in keyword_obj.subtopics.order_by('order').values_list('title', flat=True)
+                    ]
+
+                existing_content = await BlogContent.objects.filter(
+                    keyword=keyword_obj,
+                    user=user,
+                    title__contains="(생성 중...)"
+                ).order_by('-created_at').afirst()
+
+                # 프로필/참고자료 조회는 연관 객체 접근이 많아 동기 함수를 그대로 사용
+                data_for_prompt = await sync_to_async(self._build_prompt_data)(
+                    keyword_obj, user, current_subtopics, target_audience, business_info, custom_morphemes
+                )
+
+                logger.info(f"콘텐츠 생성 API 비동기 호출 시작 (시도 {attempt+1}/{self.max_retries}): 키워드={keyword_text}, 사용자={user.username}")
+
+                prompt = await sync_to_async(self._create_optimized_content_prompt)(data_for_prompt)
+                if stream_correction:
+                    prompt += stream_correction
+
+                generated_content_text = await self._acreate_message(prompt, 0.7, keyword_text, custom_morphemes)
+                logger.info("콘텐츠 생성 API 비동기 호출 완료")
+
+                initial_analysis = await analyze(generated_content_text, keyword_text, custom_morphemes)
+                final_content_to_save = generated_content_text
+                final_analysis_for_db = initial_analysis
+
+                if not initial_analysis['is_fully_optimized'] and budget_allows('verification_rewrite'):
+                    logger.info("1차 생성 콘텐츠 최적화 필요. 추가 최적화 시도.")
+                    optimization_prompt = await sync_to_async(self._create_verification_optimization_prompt)(
+                        generated_content_text, keyword_text, custom_morphemes, initial_analysis
+                    )
+                    try:
+                        optimized_content_after_verify_prompt = await self._acreate_message(optimization_prompt, 0.5, keyword_text, custom_morphemes, task='verification_rewrite')
+                        analysis_after_verify_prompt = await analyze(optimized_content_after_verify_prompt, keyword_text, custom_morphemes)
+                    except StreamAborted as e:
+                        logger.warning(f"추가 최적화 응답 중단: {e.reason}")
+                        optimized_content_after_verify_prompt = None
+                        analysis_after_verify_prompt = None
+                    except BudgetExhausted as e:
+                        logger.warning(f"추가 최적화 생략: {e}")
+                        optimized_content_after_verify_prompt = None
+                        analysis_after_verify_prompt = None
+
+                    final_content_to_save, final_analysis_for_db = self._choose_verified_content(
+                        generated_content_text, initial_analysis,
+                        optimized_content_after_verify_prompt, analysis_after_verify_prompt
+                    )
+
+                blog_content = await sync_to_async(self._save_generated_content)(
+                    user, keyword_obj, existing_content, final_content_to_save, final_analysis_for_db,
+                    custom_morphemes, data_for_prompt['research_data']
+                )
+
+                logger.info(f"콘텐츠 비동기 생성 완료: ID={blog_content.id}")
+                return blog_content.id
+
+            except StreamAborted as e:
+                logger.warning(f"콘텐츠 생성 응답 중단 (시도 {attempt+1}/{self.max_retries}): {e.reason}")
+                if attempt >= self.max_retries - 1:
+                    logger.error("최대 재시도 횟수 초과. 제약을 넘는 응답이 반복되어 콘텐츠 생성 실패.")
+                    await sync_to_async(self._mark_generation_failed)(existing_content, keyword_text, e.reason)
+                    return None
+                stream_correction = correction_note(e.reason, self.morpheme_analyzer)
+
+            except BudgetExhausted as e:
+                logger.error(f"콘텐츠 생성 중단: {e}")
+                await sync_to_async(self._mark_generation_failed)(existing_content, keyword_text, str(e))
+                return None
+
+            except anthropic.OverloadedError as e:
+                logger.warning(f"Anthropic API 과부하 (시도 {attempt+1}/{self.max_retries}). 오류: {e}")
+                if attempt >= self.max_retries - 1:
+                    logger.error("최대 재시도 횟수 초과. API 과부하가 지속됩니다.")
+                    await sync_to_async(self._mark_generation_failed)(existing_content, keyword_text, str(e))
+                    return None
+                wait_time = (2 ** attempt) + random.random()
+                logger.info(f"{wait_time:.2f}초 후 재시도합니다.")
+                await asyncio.sleep(wait_time)
+
+            except anthropic.APIError as e:
+                logger.error(f"콘텐츠 생성 중 API 오류 발생 (시도 {attempt+1}/{self.max_retries}): {e}")
+                if attempt >= self.max_retries - 1:
+                    logger.error("최대 재시도 횟수 초과. API 오류로 콘텐츠 생성 실패.")
+                    await sync_to_async(self._mark_generation_failed)(existing_content, keyword_text, str(e))
+                    return None
+                await asyncio.sleep(self.retry_delay)
+
+            except Exception as e:
+                logger.error(f"콘텐츠 생성 중 예기치 않은 오류 발생: {e}")
+                logger.error(traceback.format_exc())
+                await sync_to_async(self._mark_generation_failed)(existing_content, keyword_text, str(e))
+                return None
+
+    def _build_prompt_data(self, keyword_obj, user, subtopics, target_audience, business_info, custom_morphemes):
+        """ 프롬프트 생성용 데이터 (타겟 독자, 사업자 정보, 참고자료) """
+        news_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='news')
+        academic_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='academic')
+        general_sources = ResearchSource.objects.filter(keyword=keyword_obj, source_type='general')
+        statistics = StatisticData.objects.filter(source__keyword=keyword_obj)
+
+        return {
+            "keyword": keyword_obj.keyword,
+            "subtopics": subtopics,
+            "target_audience": target_audience or {
+                "primary": keyword_obj.main_intent or "일반 사용자",
+                "pain_points": keyword_obj.pain_points or ["정보 부족"]
+            },
+            "business_info": business_info or {
+                "name": user.username,
+                "expertise": user.profile.expertise if hasattr(user, 'profile') and hasattr(user.profile, 'expertise') else "관련 분야 전문가"
+            },
+            "custom_morphemes": custom_morphemes, 
+            "research_data": self._format_research_data(
+                news_sources, academic_sources, general_sources, statistics
+            )
+        }
+
+    def _choose_verified_content(self, initial_content, initial_analysis, verified_content, verified_analysis):
+        """
+        1차 생성본과 추가 최적화본 중 저장할 콘텐츠 선택
+
+        Returns:
+            tuple: (콘텐츠, 분석 결과)
+        """
+        if verified_analysis is None:
+            logger.info("1차 생성 콘텐츠 사용: 추가 최적화 응답이 제약을 넘어 중단됨")
+            return initial_content, initial_analysis
+        if self.morpheme_analyzer.is_better_optimization(verified_analysis, initial_analysis):
+            logger.info("추가 최적화된 콘텐츠 사용: 더 나은 결과")
+            return verified_content, verified_analysis
+        logger.info("1차 생성 콘텐츠 사용: 추가 최적화 후 개선되지 않음")
+        return initial_content, initial_analysis
+
+    def _save_generated_content(self, user, keyword_obj, existing_content, content, analysis, custom_morphemes, research_data):
+        """
+        참고자료/모바일 서식을 붙여 새 콘텐츠로 저장
+
+        Returns:
+            BlogContent: 생성된 콘텐츠
+        """
+        keyword_text = keyword_obj.keyword
+        budget = current_budget()
+        content_with_references = self._add_references(content, research_data)
+        parsed_document = ParsedDocument.parse(content_with_references, split_refs=True)
+        mobile_formatted_content = self._format_for_mobile(parsed_document)
+        references_list = self._extract_references(parsed_document.refs_section)
+        
+        meta_data = {
+            JOB_BUDGET_META_KEY: budget.summary() if budget else None
+        }
+        # 최적화 단계에서 같은 본문을 다시 형태소 분석하지 않도록 압축 레코드에 캐시 참조를 함께 보관
+        # (analysis는 참고자료를 붙이기 전 본문의 analyze 결과이므로 그 본문 기준)
+        cache_reference = self.morpheme_analyzer.cache_reference(content, keyword_text, custom_morphemes, analysis)
+        if stores_compact():
+            # 생성 시 함께 넣어 save_content_analysis가 meta_data를 다시 저장하지 않도록 함
+            meta_data[COMPACT_ANALYSIS_META_KEY] = encode_analysis(analysis, keyword_text, cache_reference)
+
+        # 임시 콘텐츠 삭제, 새 콘텐츠 생성, 형태소 분석 저장을 한 트랜잭션으로 처리
+        with transaction.atomic():
+            if existing_content:
+                existing_content.delete()
+
+            blog_content = BlogContent.objects.create(
+                user=user,
+                keyword=keyword_obj,
+                title=f"{keyword_text} 완벽 가이드", 
+                content=content_with_references,
+                mobile_formatted_content=mobile_formatted_content,
+                references=references_list,
+                char_count=analysis['char_count'],
+                is_optimized=analysis['is_fully_optimized'],
+                meta_data=meta_data
+            )
+
+            logger.info("형태소 분석 결과 저장 시작")
+            save_content_analysis(blog_content, analysis, fresh=True, cache_reference=cache_reference)
+        return blog_content
+
+    def _mark_generation_failed(self, existing_content, keyword_text, message):
+        """ 생성 중 표시해 둔 임시 콘텐츠를 실패 상태로 변경 """
+        if existing_content:
+            existing_content.title = f"{keyword_text} (생성 실패)"
+            existing_content.content = f"콘텐츠 생성 중 최종 오류 발생: {message}"
+            existing_content.save()
                     
+    def _message_kwargs(self, prompt, temperature):
+        return {
+            'model': self.model,
+            'max_tokens': 4096,
+            'temperature': temperature,
+            'messages': [{"role": "user", "content": prompt}],
+            # 호출당 타임아웃 (작업 예산의 남은 시간으로 제한)
+            'timeout': self.client_registry.timeout('anthropic')
+        }
+
+    def _create_stream_guard(self, keyword_text, custom_morphemes):
+        # 목표 형태소는 키워드 기준이므로 빈 본문 분석(캐시됨)으로 확인
+        target_morphemes = self.morpheme_analyzer.analyze("", keyword_text, custom_morphemes)['morpheme_analysis']['target_morphemes']
+        return build_stream_guard(self.morpheme_analyzer, get_automaton(target_morphemes['base'], target_morphemes['compound']))
+
+    def _create_message(self, prompt, temperature, keyword_text, custom_morphemes, task='article_generation'):
+        """
+        Claude 호출 후 응답 텍스트 반환
+        LLM_STREAMING_GUARD 설정 시 스트리밍으로 받으며 글자수/형태소 한도를 넘으면 StreamAborted 발생
+        LLM_HEDGE_ALTERNATES['generation'] 설정 시 응답이 늦거나 실패하면 대체 제공자로 헤지/장애 조치
+        LLM_TASK_TIERS[task] 설정 시 지정한 등급의 모델부터 시도하고 글자수 범위를 벗어나면 상향
+
+        Args:
+            task (str): 'article_generation' (본문 생성) 또는 'verification_rewrite' (검증 후 재작성)
+        """
+        router = HedgedRouter('generation', ('anthropic', self.model))
+        try:
+            return TieredModelRouter(task, self.client_registry).call(
+                prompt, temperature, 4096,
+                validate=self._is_valid_char_count,
+                default_call=lambda: router.call(
+                    lambda provider, model: self._call_generation_route(provider, model, prompt, temperature, keyword_text, custom_morphemes),
+                    validate=bool
+                )
+            )
+        except TierResponseRejected as e:
+            # 글자수 범위를 벗어난 본문도 이후 형태소 분석/추가 최적화 단계에서 다루므로 그대로 사용
+            return e.text
+
+    async def _acreate_message(self, prompt, temperature, keyword_text, custom_morphemes, task='article_generation'):
+        """ _create_message의 비동기 버전 (AsyncAnthropic, 늦은 쪽 요청은 취소) """
+        router = HedgedRouter('generation', ('anthropic', self.model))
+        try:
+            return await TieredModelRouter(task, self.client_registry).acall(
+                prompt, temperature, 4096,
+                validate=self._is_valid_char_count,
+                default_call=lambda: router.acall(
+                    lambda provider, model: self._acall_generation_route(provider, model, prompt, temperature, keyword_text, custom_morphemes),
+                    validate=bool
+                )
+            )
+        except TierResponseRejected as e:
+            return e.text
+
+    def _is_valid_char_count(self, text):
+        """ 모델 등급 응답 검증 (형태소 분석 없이 글자수 범위만 확인) """
+        return self.morpheme_analyzer.target_min_chars <= char_len(text) <= self.morpheme_analyzer.target_max_chars
+
+    def _call_generation_route(self, provider, model, prompt, temperature, keyword_text, custom_morphemes):
+        """ 기본 경로(Claude)는 스트리밍 검사를 포함하여 호출, 대체 경로는 단순 호출 """
+        if (provider, model) != ('anthropic', self.model):
+            return complete_text(self.client_registry, provider, model, prompt, temperature, 4096)
+
+        begin_llm_call('generation')
+        message_kwargs = self._message_kwargs(prompt, temperature)
+        guard = self._create_stream_guard(keyword_text, custom_morphemes) if streaming_enabled() else hedge_stream_guard()
+        response = None
+        # 모든 워커 프로세스가 공유하는 속도/동시 실행 한도 안에서 호출
+        with get_rate_limiter().slot('anthropic', self.model):
+            if guard is None:
+                response = self.client.messages.create(**message_kwargs)
+                text = response.content[0].text
+            else:
+                text = stream_anthropic_text(self.client, guard, **message_kwargs)
+        record_llm_usage(prompt, text, response)
+        return text
+
+    async def _acall_generation_route(self, provider, model, prompt, temperature, keyword_text, custom_morphemes):
+        if (provider, model) != ('anthropic', self.model):
+            return await acomplete_text(self.client_registry, provider, model, prompt, temperature, 4096)
+
+        begin_llm_call('generation')
+        message_kwargs = self._message_kwargs(prompt, temperature)
+        guard = await sync_to_async(self._create_stream_guard)(keyword_text, custom_morphemes) if streaming_enabled() else None
+        response = None
+        async with get_rate_limiter().aslot('anthropic', self.model):
+            if guard is None:
+                response = await self.async_client.messages.create(**message_kwargs)
+                text = response.content[0].text
+            else:
+                text = await astream_anthropic_text(self.async_client, guard, **message_kwargs)
+        record_llm_usage(prompt, text, response)
+        return text
+
     def _format_research_data(self, news_sources, academic_sources, general_sources, statistics):
         research_data = {'news': [], 'academic': [], 'general': [], 'statistics': []}
         
@@ -523,10 +814,9 @@ class ContentGenerator:
         
         return content.strip() + reference_section_text
 
-    def _extract_references(self, content_with_refs):
+    def _extract_references(self, refs_section_text):
         extracted_refs = []
-        if "## 참고자료" in content_with_refs:
-            refs_section_text = content_with_refs.split("## 참고자료", 1)[1]
+        if refs_section_text:
             link_pattern = re.compile(r'\[(.*?)\]\((.*?)\)(?: - (.*?))?\n')
             matches = link_pattern.findall(refs_section_text)
             
@@ -537,12 +827,11 @@ class ContentGenerator:
                 })
         return extracted_refs
 
-    def _format_for_mobile(self, content):
-        lines = content.split('\n')
+    def _format_for_mobile(self, document):
         formatted_lines = []
         in_code_block = False
 
-        for line in lines:
+        for line in document.iter_lines():
             stripped_line = line.strip()
             if stripped_line.startswith('```'):
                 in_code_block = not in_code_block
@@ -1,15 +1,23 @@
 # title/services/generator.py
 import re
 import logging
-from anthropic import Anthropic
-from openai import OpenAI
-from django.conf import settings
+import asyncio
 from backend.content.models import BlogContent
+from backend.content.services.llm_clients import get_client_registry
+from backend.content.services.rate_limiter import get_rate_limiter
+from backend.content.services.llm_router import HedgedRouter, complete_text, acomplete_text
+from backend.content.services.model_tiers import TieredModelRouter, TierResponseRejected
+from backend.content.services.job_budget import JobBudget, BudgetExhausted, activate_budget, current_budget, begin_llm_call, record_llm_usage
+from backend.content.services.llm_streaming import hedge_stream_guard, stream_anthropic_text, stream_openai_text
 from backend.title.models import TitleSuggestion
 import time
 
 logger = logging.getLogger(__name__)
 
+TITLE_BUDGET_META_KEY = 'title_job_budget'
+
+TITLE_SYSTEM_PROMPT = "당신은 상위 1%의 블로그 제목 생성 전문가입니다. SEO에 최적화되면서도 독자의 클릭을 유도하는 매력적인 제목을 생성해야 합니다."
+
 class TitleGenerator:
     """
     블로그 콘텐츠 기반 제목 생성 서비스
@@ -28,39 +36,52 @@ class TitleGenerator:
         'benefit': '효과 제시형'
     }
     
-    def __init__(self, use_openai=True):
+    def __init__(self, use_openai=True, client_registry=None):
         """
         제목 생성 서비스 초기화
         
         Args:
             use_openai (bool): OpenAI API 사용 여부 (False면 Claude API 사용)
+            client_registry (LLMClientRegistry): LLM 클라이언트 레지스트리 (None이면 프로세스 공용)
         """
         self.use_openai = use_openai
+        self.client_registry = client_registry or get_client_registry()
         
         if use_openai:
-            self.openai_api_key = settings.OPENAI_API_KEY
-            self.client = OpenAI(api_key=self.openai_api_key)
+            self.client = self.client_registry.openai()
             self.model = "gpt-4"  # GPT-4 사용
         else:
-            self.anthropic_api_key = settings.ANTHROPIC_API_KEY
-            self.client = Anthropic(api_key=self.anthropic_api_key)
+            self.client = self.client_registry.anthropic()
             self.model = "claude-3-7-sonnet-20250219"  # Claude 최신 모델 사용
         
         # 재시도 설정
         self.max_retries = 3
         self.retry_delay = 2
     
-    def generate_titles(self, content_id):
+    @property
+    def async_client(self):
+        """ agenerate_titles용 비동기 클라이언트 (현재 이벤트 루프의 공용 클라이언트) """
+        if self.use_openai:
+            return self.client_registry.async_openai()
+        return self.client_registry.async_anthropic()
+    
+    def generate_titles(self, content_id, budget=None):
         """
         블로그 콘텐츠 기반 제목 생성
         모든 유형의 제목을 생성하여 저장
+        작업 예산이 다하면 기본 제목을 저장하고 종료 사유를 콘텐츠 meta_data에 기록
         
         Args:
             content_id (int): BlogContent 모델의 ID
+            budget (JobBudget): 작업 예산 (None이면 LLM_JOB_BUDGETS['titles'])
             
         Returns:
             dict: 생성된 제목 정보
         """
+        with activate_budget(budget or JobBudget.for_job('titles')):
+            return self._generate_titles(content_id)
+    
+    def _generate_titles(self, content_id):
         for attempt in range(self.max_retries):
             try:
                 # 블로그 콘텐츠 정보 가져오기
@@ -112,6 +133,8 @@ class TitleGenerator:
                             'title': suggestion
                         })
                 
+                self._record_budget(blog_content)
+                
                 # 첫 번째 제목을 콘텐츠의 제목으로 설정
                 if titles and titles.get('general') and titles['general']:
                     blog_content.title = titles['general'][0]['title']
@@ -134,6 +157,84 @@ class TitleGenerator:
                     logger.error("최대 재시도 횟수를 초과했습니다.")
                     return None
     
+    async def agenerate_titles(self, content_id, budget=None):
+        """
+        generate_titles의 비동기 버전
+        - AsyncOpenAI/AsyncAnthropic 호출, asyncio.sleep 재시도 대기, Django 비동기 ORM 사용
+        
+        Args:
+            content_id (int): BlogContent 모델의 ID
+            budget (JobBudget): 작업 예산 (None이면 LLM_JOB_BUDGETS['titles'])
+            
+        Returns:
+            dict: 생성된 제목 정보
+        """
+        with activate_budget(budget or JobBudget.for_job('titles')):
+            return await self._agenerate_titles(content_id)
+    
+    async def _agenerate_titles(self, content_id):
+        for attempt in range(self.max_retries):
+            try:
+                blog_content = await BlogContent.objects.select_related('keyword').aget(id=content_id)
+                keyword = blog_content.keyword.keyword
+                content = blog_content.content
+                
+                # 이미 생성된 제목이 있으면 한 번의 조회로 유형별 정리
+                existing_titles = [t async for t in TitleSuggestion.objects.filter(content=blog_content)]
+                if existing_titles:
+                    titles = {
+                        title_type: [
+                            {'id': t.id, 'title': t.suggestion}
+                            for t in existing_titles if t.title_type == title_type
+                        ]
+                        for title_type in self.TITLE_TYPES.keys()
+                    }
+                    
+                    selected_title = next((t for t in existing_titles if t.selected), None)
+                    if selected_title:
+                        blog_content.title = selected_title.suggestion
+                        await blog_content.asave()
+                    
+                    return titles
+                
+                titles = {}
+                all_titles = await self._agenerate_title_suggestions(keyword, content)
+                
+                for title_type, title_suggestions in all_titles.items():
+                    titles[title_type] = []
+                    
+                    for suggestion in title_suggestions:
+                        title = await TitleSuggestion.objects.acreate(
+                            content=blog_content,
+                            title_type=title_type,
+                            suggestion=suggestion
+                        )
+                        titles[title_type].append({
+                            'id': title.id,
+                            'title': suggestion
+                        })
+                
+                self._record_budget(blog_content)
+                
+                if titles and titles.get('general') and titles['general']:
+                    blog_content.title = titles['general'][0]['title']
+                    await blog_content.asave()
+                
+                return titles
+                
+            except BlogContent.DoesNotExist:
+                logger.error(f"블로그 콘텐츠 ID {content_id}를 찾을 수 없습니다.")
+                return None
+            except Exception as e:
+                logger.error(f"제목 생성 중 오류 (시도 {attempt+1}/{self.max_retries}): {str(e)}")
+                if attempt < self.max_retries - 1:
+                    delay = self.retry_delay * (2 ** attempt)
+                    logger.info(f"{delay}초 후 재시도합니다...")
+                    await asyncio.sleep(delay)
+                else:
+                    logger.error("최대 재시도 횟수를 초과했습니다.")
+                    return None
+    
     def _generate_title_suggestions(self, keyword, content):
         """
         키워드와 콘텐츠 기반 제목 추천 생성
@@ -152,45 +253,136 @@ class TitleGenerator:
             # 프롬프트 생성
             prompt = self._create_title_prompt(keyword, extracted_info)
             
-            # API에 따른 응답 생성
-            if self.use_openai:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": "당신은 상위 1%의 블로그 제목 생성 전문가입니다. SEO에 최적화되면서도 독자의 클릭을 유도하는 매력적인 제목을 생성해야 합니다."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.7,
-                    timeout=120  # 타임아웃 추가 (120초)
-                )
-                
-                response_text = response.choices[0].message.content
-            else:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=1500,
-                    temperature=0.7,
-                    messages=[
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                
-                response_text = response.content[0].text
+            # LLM_TASK_TIERS['title_generation']에 빠른 모델 등급을 두면 먼저 생성하고 유형별 제목이 모두 파싱되지 않으면 다음 등급으로 상향
+            # 설정된 API 호출은 LLM_HEDGE_ALTERNATES['titles'] 설정 시 대체 제공자로 헤지/장애 조치
+            hedged_router = HedgedRouter('titles', (self._provider, self.model))
+            response_text = TieredModelRouter('title_generation', self.client_registry).call(
+                prompt, 0.7, 1500,
+                validate=self._is_complete_title_response,
+                default_call=lambda: hedged_router.call(lambda provider, model: self._call_title_route(provider, model, prompt), validate=bool),
+                system=TITLE_SYSTEM_PROMPT
+            )
             
             # 응답 파싱
             return self._parse_title_response(response_text)
         
+        except TierResponseRejected as e:
+            # 파싱되지 않은 유형만 기본 제목으로 보완
+            return self._parse_title_response(e.text or "")
+        
+        except BudgetExhausted as e:
+            logger.warning(f"제목 추천 생성 중단, 기본 제목 사용: {e}")
+            return self._default_titles(keyword)
+        
         except Exception as e:
             logger.error(f"제목 추천 생성 중 오류: {str(e)}")
             # 오류 발생 시 기본 제목 목록 반환
-            default_titles = {}
-            for title_type in self.TITLE_TYPES.keys():
-                if title_type == 'general':
-                    default_titles[title_type] = [f"{keyword} 완벽 가이드", f"{keyword} 기본 원리", f"{keyword} 마스터하기"]
-                else:
-                    default_titles[title_type] = [f"{keyword} 알아보기", f"{keyword} 이해하기", f"{keyword} 분석"]
+            return self._default_titles(keyword)
+    
+    async def _agenerate_title_suggestions(self, keyword, content):
+        """ _generate_title_suggestions의 비동기 버전 """
+        try:
+            extracted_info = self._extract_key_info(content)
+            prompt = self._create_title_prompt(keyword, extracted_info)
+            
+            hedged_router = HedgedRouter('titles', (self._provider, self.model))
+            response_text = await TieredModelRouter('title_generation', self.client_registry).acall(
+                prompt, 0.7, 1500,
+                validate=self._is_complete_title_response,
+                default_call=lambda: hedged_router.acall(lambda provider, model: self._acall_title_route(provider, model, prompt), validate=bool),
+                system=TITLE_SYSTEM_PROMPT
+            )
             
-            return default_titles
+            return self._parse_title_response(response_text)
+        
+        except TierResponseRejected as e:
+            return self._parse_title_response(e.text or "")
+        
+        except BudgetExhausted as e:
+            logger.warning(f"제목 추천 생성 중단, 기본 제목 사용: {e}")
+            return self._default_titles(keyword)
+        
+        except Exception as e:
+            logger.error(f"제목 추천 생성 중 오류: {str(e)}")
+            return self._default_titles(keyword)
+    
+    @property
+    def _provider(self):
+        return 'openai' if self.use_openai else 'anthropic'
+    
+    def _call_title_route(self, provider, model, prompt):
+        """ 기본 경로는 설정된 API 그대로, 대체 경로는 같은 시스템 지시로 단순 호출 """
+        if (provider, model) != (self._provider, self.model):
+            return complete_text(self.client_registry, provider, model, prompt, 0.7, 1500, system=TITLE_SYSTEM_PROMPT)
+        begin_llm_call('titles')
+        # 헤지 경로 안에서는 스트리밍으로 받아 다른 경로가 먼저 응답하면 중단하고 슬롯 반환
+        guard = hedge_stream_guard()
+        response = None
+        with get_rate_limiter().slot(provider, model):
+            if guard is not None:
+                stream_text = stream_openai_text if self.use_openai else stream_anthropic_text
+                text = stream_text(self.client, guard, **self._request_kwargs(prompt))
+            elif self.use_openai:
+                response = self.client.chat.completions.create(**self._request_kwargs(prompt))
+                text = response.choices[0].message.content
+            else:
+                response = self.client.messages.create(**self._request_kwargs(prompt))
+                text = response.content[0].text
+        record_llm_usage(prompt, text, response)
+        return text
+    
+    async def _acall_title_route(self, provider, model, prompt):
+        if (provider, model) != (self._provider, self.model):
+            return await acomplete_text(self.client_registry, provider, model, prompt, 0.7, 1500, system=TITLE_SYSTEM_PROMPT)
+        begin_llm_call('titles')
+        async with get_rate_limiter().aslot(provider, model):
+            if self.use_openai:
+                response = await self.async_client.chat.completions.create(**self._request_kwargs(prompt))
+                text = response.choices[0].message.content
+            else:
+                response = await self.async_client.messages.create(**self._request_kwargs(prompt))
+                text = response.content[0].text
+        record_llm_usage(prompt, text, response)
+        return text
+    
+    def _request_kwargs(self, prompt):
+        """ 사용하는 API(OpenAI/Claude)에 맞는 호출 인자 """
+        if self.use_openai:
+            return {
+                'model': self.model,
+                'messages': [
+                    {"role": "system", "content": TITLE_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                'temperature': 0.7,
+                'timeout': self.client_registry.timeout('openai')  # 호출당 타임아웃 (LLM_CLIENT_SETTINGS, 작업 예산의 남은 시간으로 제한)
+            }
+        return {
+            'model': self.model,
+            'max_tokens': 1500,
+            'temperature': 0.7,
+            'messages': [
+                {"role": "user", "content": prompt}
+            ],
+            'timeout': self.client_registry.timeout('anthropic')
+        }
+    
+    def _record_budget(self, blog_content):
+        """ 작업 예산이 소진되어 제목 생성이 중단되었으면 종료 사유를 meta_data에 기록 (저장은 호출 측) """
+        budget = current_budget()
+        if budget and budget.stopped_by:
+            blog_content.meta_data = dict(blog_content.meta_data or {}, **{TITLE_BUDGET_META_KEY: budget.summary()})
+    
+    def _default_titles(self, keyword):
+        """ API 오류 시 사용할 기본 제목 목록 """
+        default_titles = {}
+        for title_type in self.TITLE_TYPES.keys():
+            if title_type == 'general':
+                default_titles[title_type] = [f"{keyword} 완벽 가이드", f"{keyword} 기본 원리", f"{keyword} 마스터하기"]
+            else:
+                default_titles[title_type] = [f"{keyword} 알아보기", f"{keyword} 이해하기", f"{keyword} 분석"]
+        
+        return default_titles
     
     def _extract_key_info(self, content):
         """
@@ -316,6 +508,24 @@ class TitleGenerator:
         Returns:
             dict: 유형별 제목 추천 목록
         """
+        titles = self._extract_titles(response_text)
+        
+        # 각 유형별 결과 개수 확인 및 보완
+        for title_type in titles:
+            # 유형별 제목이 없는 경우 기본값 설정
+            if not titles[title_type]:
+                titles[title_type] = self._get_default_titles(title_type)
+            # 최대 3개로 제한
+            titles[title_type] = titles[title_type][:3]
+        
+        return titles
+    
+    def _is_complete_title_response(self, response_text):
+        """ 모든 유형의 제목이 응답에서 파싱되는지 (기본 제목으로 보완할 필요가 없는지) """
+        return all(self._extract_titles(response_text).values())
+    
+    def _extract_titles(self, response_text):
+        """ 응답에서 유형별 번호 제목 추출 (없는 유형은 빈 목록) """
         titles = {
             'general': [],
             'approval': [],
@@ -351,14 +561,6 @@ class TitleGenerator:
                             title = title.strip('"\'')
                             titles[current_type].append(title)
         
-        # 각 유형별 결과 개수 확인 및 보완
-        for title_type in titles:
-            # 유형별 제목이 없는 경우 기본값 설정
-            if not titles[title_type]:
-                titles[title_type] = self._get_default_titles(title_type)
-            # 최대 3개로 제한
-            titles[title_type] = titles[title_type][:3]
-        
         return titles
     
     def _get_default_titles(self, title_type):
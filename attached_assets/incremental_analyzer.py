@@ -0,0 +1,181 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\incremental_analyzer.py
+import re
+import difflib
+import logging
+from .morpheme_automaton import get_automaton
+from .analysis_result import AnalysisResult
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalMorphemeAnalyzer:
+    """
+    문단/문장 단위 형태소 및 글자수 집계를 유지하는 증분 분석기
+    - 목표 형태소 확정을 위해 최초 1회만 MorphemeAnalyzer.analyze 호출
+    - 이후에는 이전 버전과 문단 단위로 diff하여 변경된 문단만 다시 카운트
+    - 반환값은 MorphemeAnalyzer.analyze와 같은 방식으로 접근 가능한 AnalysisResult
+    """
+
+    PARAGRAPH_SPLIT_PATTERN = re.compile(r'(\n\n+)')
+    MAX_CACHED_PARAGRAPHS = 512
+
+    def __init__(self, morpheme_analyzer, keyword, custom_morphemes=None, ranges=None):
+        """
+        Args:
+            morpheme_analyzer (MorphemeAnalyzer): 목표 형태소/범위를 제공하는 분석기
+            keyword (str): 주요 키워드
+            custom_morphemes (list): 사용자 지정 형태소
+            ranges (dict): 최적화 조정에 쓸 형태소별 (최소, 최대) 횟수
+                (유효성 판정은 항상 분석기의 유형별 요청 범위 기준)
+        """
+        self.morpheme_analyzer = morpheme_analyzer
+        self.keyword = keyword
+        self.custom_morphemes = custom_morphemes
+        self.ranges = ranges or {}
+        self.feasibility = None
+        self.target_morphemes = None
+        self.morpheme_types = {}
+        self.automaton = None
+        self.paragraphs = []  # 문단별 집계 (텍스트, 글자수, 형태소 카운트, 문장별 집계)
+        self.separators = []  # 문단 사이 구분자 ("\n\n" 등)
+        self.reanalyzed_paragraphs = 0  # 마지막 update에서 다시 카운트한 문단 수
+        self._morpheme_order = ()
+        self._type_order = ()
+        self._morpheme_index = {}
+        self._paragraph_cache = {}
+
+    def update(self, content):
+        """
+        새 버전의 콘텐츠로 집계를 갱신하고 전체 분석 결과를 반환
+
+        Args:
+            content (str): 최신 콘텐츠
+
+        Returns:
+            AnalysisResult: MorphemeAnalyzer.analyze와 같은 방식으로 접근 가능한 분석 결과
+        """
+        if self.target_morphemes is None:
+            self._load_target_morphemes(content)
+
+        paragraph_texts, separators = self._split_paragraphs(content)
+        previous_texts = [p['text'] for p in self.paragraphs]
+
+        new_paragraphs = []
+        reanalyzed = 0
+        matcher = difflib.SequenceMatcher(None, previous_texts, paragraph_texts, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == 'equal':
+                new_paragraphs.extend(self.paragraphs[i1:i2])
+                continue
+            for text in paragraph_texts[j1:j2]:
+                stats = self._paragraph_cache.get(text)
+                if stats is None:
+                    stats = self._analyze_paragraph(text)
+                    self._remember_paragraph(stats)
+                    reanalyzed += 1
+                new_paragraphs.append(stats)
+
+        self.paragraphs = new_paragraphs
+        self.separators = separators
+        self.reanalyzed_paragraphs = reanalyzed
+        logger.debug(f"증분 분석: 전체 {len(paragraph_texts)}개 문단 중 {reanalyzed}개 재분석")
+        return self.get_analysis()
+
+    def get_analysis(self):
+        """
+        현재 집계로부터 분석 결과를 조립
+
+        Returns:
+            AnalysisResult: MorphemeAnalyzer.analyze와 같은 방식으로 접근 가능한 분석 결과
+        """
+        ma = self.morpheme_analyzer
+        char_count = sum(p['char_count'] for p in self.paragraphs)
+        char_count += sum(len(sep.replace(" ", "")) for sep in self.separators)
+
+        counts = tuple(sum(p['counts'][m] for p in self.paragraphs) for m in self._morpheme_order)
+        valid = tuple(
+            low <= count <= high
+            for count, (low, high) in zip(counts, self._valid_ranges())
+        )
+        is_valid_char_count = ma.target_min_chars <= char_count <= ma.target_max_chars
+
+        return AnalysisResult(
+            char_count,
+            is_valid_char_count,
+            self.target_morphemes,
+            self._morpheme_order,
+            counts,
+            valid,
+            self._type_order,
+            index=self._morpheme_index
+        )
+
+    def _valid_ranges(self):
+        # 형태소 순서의 요청 (최소, 최대) 범위 (저장/보고되는 유효성은 조정된 범위와 무관하게 이 기준)
+        ma = self.morpheme_analyzer
+        ranges = []
+        for morpheme_type in self._type_order:
+            if morpheme_type == 'base':
+                ranges.append((ma.target_min_base_count, ma.target_max_base_count))
+            else:
+                ranges.append((ma.target_min_compound_count, ma.target_max_compound_count))
+        return ranges
+
+    def set_feasibility(self, feasibility):
+        """ 실행 가능성 검사 결과를 지정하고, 조정된 범위를 이후 최적화 조정에 사용 """
+        self.feasibility = feasibility
+        self.ranges = feasibility.ranges
+
+    def morphemes_within_ranges(self, analysis):
+        """ 최적화 진행 판단용: 모든 목표 형태소가 조정된 범위(없으면 요청 범위) 안에 있는지 """
+        if not self.ranges:
+            return analysis['is_valid_morphemes']
+        counts = analysis['morpheme_analysis']['counts']
+        return all(low <= counts[m]['count'] <= high for m, (low, high) in self.ranges.items() if m in counts)
+
+    def meets_targets(self, analysis):
+        """ 최적화 진행 판단용: 글자수와 조정된 범위 기준 형태소 조건을 모두 충족하는지 """
+        return analysis['is_valid_char_count'] and self.morphemes_within_ranges(analysis)
+
+    def _load_target_morphemes(self, content):
+        full_analysis = self.morpheme_analyzer.analyze(content, self.keyword, self.custom_morphemes)
+        self.target_morphemes = full_analysis['morpheme_analysis']['target_morphemes']
+        compound_morphemes = set(self.target_morphemes['compound'])
+        self.morpheme_types = {
+            m: ('compound' if m in compound_morphemes else 'base')
+            for m in self.target_morphemes['all_list']
+        }
+        self.automaton = get_automaton(self.target_morphemes['base'], self.target_morphemes['compound'])
+        # 분석 결과 간에 공유하는 형태소 순서/유형/색인
+        self._morpheme_order = tuple(self.target_morphemes['all_list'])
+        self._type_order = tuple(self.morpheme_types[m] for m in self._morpheme_order)
+        self._morpheme_index = {m: i for i, m in enumerate(self._morpheme_order)}
+
+    def _split_paragraphs(self, content):
+        parts = self.PARAGRAPH_SPLIT_PATTERN.split(content)
+        return parts[0::2], parts[1::2]
+
+    def _analyze_paragraph(self, text):
+        # 문단 한 번의 탐색으로 문장 분할과 모든 목표 형태소 카운트를 함께 계산
+        scan = self.automaton.scan(text)
+        sentences = []
+        for sentence, sentence_counts in zip(scan.sentences, scan.sentence_counts):
+            if not sentence:
+                continue
+            sentences.append({
+                'text': sentence,
+                'char_count': len(sentence.replace(" ", "")),
+                'counts': {m: sentence_counts.get(m, 0) for m in self.morpheme_types}
+            })
+
+        return {
+            'text': text,
+            'char_count': len(text.replace(" ", "")),
+            'counts': {m: scan.counts.get(m, 0) for m in self.morpheme_types},
+            'sentences': sentences
+        }
+
+    def _remember_paragraph(self, stats):
+        if len(self._paragraph_cache) >= self.MAX_CACHED_PARAGRAPHS:
+            self._paragraph_cache.pop(next(iter(self._paragraph_cache)))
+        self._paragraph_cache[stats['text']] = stats
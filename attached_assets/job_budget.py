@@ -0,0 +1,264 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\job_budget.py
+"""
+작업(콘텐츠 생성/최적화/제목 생성) 단위 실행 예산
+
+- 마감 시각, 최대 LLM 호출 수, 최대 토큰 수를 하나의 JobBudget으로 묶어 작업 전체에 전달
+- 작업 진입 시 activate_budget으로 현재 컨텍스트에 설정하면 하위 단계와 LLM 호출부에서 current_budget()으로 확인
+  (asyncio 태스크와 sync_to_async는 컨텍스트를 그대로 이어받고, 스레드 풀에는 contextvars.copy_context()로 전달)
+- LLM 호출 직전 begin_llm_call이 한도를 확인하고 BudgetExhausted를 발생시키며, 호출 타임아웃은 남은 시간으로 제한
+- 반복 단계는 budget_allows로 확인하여 예산이 다하면 그때까지의 최선의 결과로 종료
+- 처음 한도에 걸린 단계와 사유(deadline/llm_calls/tokens)를 기록하여 결과 메타데이터에 남김
+- 동기 헤지 호출의 각 경로는 cancellable_call로 중단 신호(threading.Event)를 받으며,
+  예산 예약/속도 제한 대기/스트리밍 수신 중에 check_call_cancelled로 확인하여 CallCancelled로 빠져나옴
+
+설정:
+    LLM_JOB_BUDGETS = {작업: {
+        'deadline': 작업 전체 제한 시간 (초, None이면 제한 없음),
+        'max_llm_calls': 최대 LLM 호출 수 (헤지/장애 조치 재요청 포함),
+        'max_tokens': 최대 토큰 수 (입력+출력, 응답에 사용량이 없으면 글자수로 추정),
+    }}
+        작업: 'generation', 'optimization', 'titles'
+"""
+import time
+import logging
+import threading
+import contextlib
+import contextvars
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_BUDGETS = {
+    'generation': {'deadline': 600, 'max_llm_calls': 20, 'max_tokens': 200000},
+    'optimization': {'deadline': 600, 'max_llm_calls': 120, 'max_tokens': 400000},
+    'titles': {'deadline': 120, 'max_llm_calls': 6, 'max_tokens': 30000},
+}
+
+REASON_DEADLINE = 'deadline'
+REASON_LLM_CALLS = 'llm_calls'
+REASON_TOKENS = 'tokens'
+
+JOB_BUDGET_META_KEY = 'job_budget'
+
+# 사용량이 없는 응답(스트리밍 텍스트 등)의 토큰 추정치 (한국어 기준)
+CHARS_PER_TOKEN = 1.5
+# 남은 시간이 이보다 짧으면 새 LLM 호출을 시작하지 않음
+MIN_CALL_SECONDS = 1
+
+
+class BudgetExhausted(Exception):
+    """ 작업 예산(마감/LLM 호출 수/토큰 수)이 다하여 LLM 호출을 시작할 수 없음 """
+
+    def __init__(self, reason, stage=None):
+        self.reason = reason
+        self.stage = stage
+        super().__init__(f"작업 예산 소진 ({reason}, 단계: {stage})")
+
+
+class CallCancelled(Exception):
+    """ 헤지 호출에서 다른 경로가 먼저 끝나 이 경로의 호출을 중단함 """
+
+
+class JobBudget:
+    """
+    작업 하나의 마감/LLM 호출 수/토큰 수 한도와 사용량 (스레드 안전)
+    """
+
+    def __init__(self, deadline=None, max_llm_calls=None, max_tokens=None):
+        """
+        Args:
+            deadline (float): 작업 제한 시간 (초, None이면 제한 없음)
+            max_llm_calls (int): 최대 LLM 호출 수 (None이면 제한 없음)
+            max_tokens (int): 최대 토큰 수 (None이면 제한 없음)
+        """
+        self.started_at = time.monotonic()
+        self.deadline = deadline
+        self.max_llm_calls = max_llm_calls
+        self.max_tokens = max_tokens
+        self.llm_calls = 0
+        self.tokens = 0
+        self.stopped_by = None
+        self.stopped_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_job(cls, job):
+        """ LLM_JOB_BUDGETS[job] 설정(없으면 기본값)으로 새 예산 생성 """
+        options = dict(DEFAULT_JOB_BUDGETS.get(job, {}))
+        options.update(getattr(settings, 'LLM_JOB_BUDGETS', {}).get(job, {}))
+        return cls(options.get('deadline'), options.get('max_llm_calls'), options.get('max_tokens'))
+
+    def remaining_seconds(self):
+        if self.deadline is None:
+            return None
+        return self.deadline - (time.monotonic() - self.started_at)
+
+    def exceeded_limit(self, needs_llm=True):
+        """
+        Args:
+            needs_llm (bool): False면 마감만 확인 (LLM 없이 진행하는 로컬 단계)
+
+        Returns:
+            str: 먼저 걸린 한도 (REASON_*), 여유가 있으면 None
+        """
+        remaining = self.remaining_seconds()
+        if remaining is not None and remaining < (MIN_CALL_SECONDS if needs_llm else 0):
+            return REASON_DEADLINE
+        if not needs_llm:
+            return None
+        if self.max_llm_calls is not None and self.llm_calls >= self.max_llm_calls:
+            return REASON_LLM_CALLS
+        if self.max_tokens is not None and self.tokens >= self.max_tokens:
+            return REASON_TOKENS
+        return None
+
+    def allows(self, stage, needs_llm=True):
+        """ stage를 계속 진행할 수 있는지 확인 (소진되면 처음 걸린 단계와 사유를 기록) """
+        reason = self.exceeded_limit(needs_llm)
+        if reason is None:
+            return True
+        self._record_stop(reason, stage)
+        return False
+
+    def begin_llm_call(self, stage):
+        """ LLM 호출 한 번을 예약 (한도를 넘으면 BudgetExhausted) """
+        with self._lock:
+            reason = self.exceeded_limit()
+            if reason is None:
+                self.llm_calls += 1
+                return
+        self._record_stop(reason, stage)
+        raise BudgetExhausted(reason, stage)
+
+    def add_tokens(self, tokens):
+        with self._lock:
+            self.tokens += tokens
+
+    def call_timeout(self, timeout):
+        """ 호출 타임아웃을 남은 시간으로 제한 """
+        remaining = self.remaining_seconds()
+        if remaining is None:
+            return timeout
+        remaining = max(remaining, MIN_CALL_SECONDS)
+        return remaining if timeout is None else min(timeout, remaining)
+
+    def summary(self):
+        """ 결과 메타데이터에 남길 사용량과 종료 사유 """
+        return {
+            'elapsed': round(time.monotonic() - self.started_at, 2),
+            'llm_calls': self.llm_calls,
+            'tokens': self.tokens,
+            'deadline': self.deadline,
+            'max_llm_calls': self.max_llm_calls,
+            'max_tokens': self.max_tokens,
+            'stopped_by': self.stopped_by,
+            'stopped_at': self.stopped_at,
+        }
+
+    def _record_stop(self, reason, stage):
+        with self._lock:
+            if self.stopped_by is not None:
+                return
+            self.stopped_by = reason
+            self.stopped_at = stage
+        logger.warning(f"작업 예산 소진: {reason} (단계: {stage}, LLM 호출 {self.llm_calls}회, 토큰 {self.tokens}개)")
+
+
+_current_budget = contextvars.ContextVar('llm_job_budget', default=None)
+
+
+def current_budget():
+    """ 현재 컨텍스트의 작업 예산 (없으면 None) """
+    return _current_budget.get()
+
+
+@contextlib.contextmanager
+def activate_budget(budget):
+    """ with activate_budget(budget): 블록 안의 모든 단계와 LLM 호출에 budget 적용 """
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+def budget_allows(stage, needs_llm=True):
+    """ 현재 예산으로 stage를 계속할 수 있는지 (예산이 없으면 항상 True) """
+    budget = current_budget()
+    return budget is None or budget.allows(stage, needs_llm)
+
+
+def begin_llm_call(stage):
+    """ 현재 예산에서 LLM 호출 한 번을 예약 (중단된 헤지 경로는 예약하지 않고 CallCancelled) """
+    check_call_cancelled()
+    budget = current_budget()
+    if budget is not None:
+        budget.begin_llm_call(stage)
+
+
+def call_timeout(timeout):
+    """ 현재 예산의 남은 시간으로 제한한 호출 타임아웃 (예산이 없으면 그대로) """
+    budget = current_budget()
+    return timeout if budget is None else budget.call_timeout(timeout)
+
+
+_call_cancel_event = contextvars.ContextVar('llm_call_cancel_event', default=None)
+
+
+@contextlib.contextmanager
+def cancellable_call(event):
+    """ with cancellable_call(event): 블록 안의 LLM 호출은 event가 설정되면 CallCancelled로 중단 """
+    token = _call_cancel_event.set(event)
+    try:
+        yield event
+    finally:
+        _call_cancel_event.reset(token)
+
+
+def call_cancellable():
+    """ 현재 호출이 중단 신호를 받는지 (동기 헤지 호출의 경로 안인지) """
+    return _call_cancel_event.get() is not None
+
+
+def check_call_cancelled():
+    """ 중단 신호가 설정되었으면 CallCancelled """
+    event = _call_cancel_event.get()
+    if event is not None and event.is_set():
+        raise CallCancelled("다른 경로가 먼저 응답하여 호출 중단")
+
+
+def sleep_unless_cancelled(seconds):
+    """ seconds 동안 대기하되 중단 신호가 오면 바로 CallCancelled """
+    event = _call_cancel_event.get()
+    if event is None:
+        time.sleep(seconds)
+        return
+    event.wait(seconds)
+    check_call_cancelled()
+
+
+def usage_tokens(response):
+    """ Anthropic/OpenAI/Gemini 응답의 토큰 사용량 (입력+출력, 알 수 없으면 None) """
+    usage = getattr(response, 'usage', None)
+    if usage is not None:
+        total = getattr(usage, 'total_tokens', None)
+        if isinstance(total, int):
+            return total
+        input_tokens = getattr(usage, 'input_tokens', None)
+        output_tokens = getattr(usage, 'output_tokens', None)
+        if isinstance(input_tokens, int) and isinstance(output_tokens, int):
+            return input_tokens + output_tokens
+    metadata = getattr(response, 'usage_metadata', None)
+    total = getattr(metadata, 'total_token_count', None) if metadata is not None else None
+    return total if isinstance(total, int) else None
+
+
+def record_llm_usage(prompt, text, response=None):
+    """ 현재 예산에 호출 사용량 반영 (응답에 사용량이 없으면 프롬프트와 응답 글자수로 추정) """
+    budget = current_budget()
+    if budget is None:
+        return
+    tokens = usage_tokens(response) if response is not None else None
+    if tokens is None:
+        tokens = int((len(prompt or "") + len(text or "")) / CHARS_PER_TOKEN)
+    budget.add_tokens(tokens)
@@ -0,0 +1,205 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\llm_clients.py
+"""
+프로세스 공용 LLM 클라이언트 레지스트리
+
+- Anthropic/OpenAI: 연결 풀과 keep-alive를 설정한 httpx 클라이언트를 제공자별로 하나만 만들어 모든 서비스가 공유
+  (SDK 클라이언트는 모델과 무관하므로 모델은 호출 시 지정)
+- 비동기 클라이언트는 이벤트 루프마다 따로 보관 (httpx.AsyncClient는 생성한 루프에서만 사용 가능)
+- Gemini: genai.configure는 프로세스에서 한 번만 호출하고 모델별 GenerativeModel을 재사용 (gRPC 채널 공유)
+
+설정:
+    LLM_CLIENT_SETTINGS = {
+        'anthropic' | 'openai' | 'gemini': {
+            'base_url': 엔드포인트 (기본 None: 공식 엔드포인트, 테스트 시 로컬 스텁 서버 주소),
+            'max_connections': 연결 풀 크기 (기본 20),
+            'max_keepalive_connections': 유지할 유휴 연결 수 (기본 10),
+            'keepalive_expiry': 유휴 연결 유지 시간 (초, 기본 30),
+            'connect_timeout': 연결 타임아웃 (초, 기본 10),
+            'timeout': 호출당 타임아웃 (초, 기본 120),
+            'max_retries': SDK 자체 재시도 횟수 (기본 2, Gemini 제외),
+        }
+    }
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from django.conf import settings
+from .job_budget import call_timeout
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CLIENT_OPTIONS = {
+    'base_url': None,
+    'max_connections': 20,
+    'max_keepalive_connections': 10,
+    'keepalive_expiry': 30,
+    'connect_timeout': 10,
+    'timeout': 120,
+    'max_retries': 2,
+}
+
+
+def client_options(provider):
+    """ 제공자별 설정 (LLM_CLIENT_SETTINGS[provider]가 기본값을 덮어씀) """
+    options = dict(DEFAULT_CLIENT_OPTIONS)
+    options.update(getattr(settings, 'LLM_CLIENT_SETTINGS', {}).get(provider, {}))
+    return options
+
+
+def _http_client_kwargs(options):
+    import httpx
+    return {
+        'limits': httpx.Limits(
+            max_connections=options['max_connections'],
+            max_keepalive_connections=options['max_keepalive_connections'],
+            keepalive_expiry=options['keepalive_expiry']
+        ),
+        'timeout': httpx.Timeout(options['timeout'], connect=options['connect_timeout'])
+    }
+
+
+class LLMClientRegistry:
+    """
+    제공자(및 Gemini 모델)별 LLM 클라이언트 캐시
+    - 동기 클라이언트는 스레드 간에 공유 (httpx.Client는 스레드 안전)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._async_clients = weakref.WeakKeyDictionary()
+        self._gemini_configured = False
+
+    def anthropic(self):
+        return self._get(self._clients, 'anthropic', self._create_anthropic)
+
+    def openai(self):
+        return self._get(self._clients, 'openai', self._create_openai)
+
+    def async_anthropic(self):
+        """ 현재 이벤트 루프의 AsyncAnthropic (코루틴 안에서 호출) """
+        return self._get(self._loop_clients(), 'anthropic', self._create_async_anthropic)
+
+    def async_openai(self):
+        """ 현재 이벤트 루프의 AsyncOpenAI (코루틴 안에서 호출) """
+        return self._get(self._loop_clients(), 'openai', self._create_async_openai)
+
+    def gemini(self, model_name):
+        """ 모델별 GenerativeModel (genai.configure는 처음 한 번만 호출) """
+        return self._get(self._clients, ('gemini', model_name), lambda: self._create_gemini(model_name))
+
+    def timeout(self, provider):
+        """ 호출당 타임아웃 (초, 현재 작업 예산이 있으면 남은 시간으로 제한) """
+        return call_timeout(client_options(provider)['timeout'])
+
+    def gemini_request_options(self):
+        """ generate_content에 전달할 호출 옵션 (타임아웃) """
+        return {'timeout': self.timeout('gemini')}
+
+    def close(self):
+        """ 동기 클라이언트의 연결 풀을 닫고 캐시 비움 (테스트/설정 변경 시) """
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            self._async_clients = weakref.WeakKeyDictionary()
+            self._gemini_configured = False
+        for client in clients.values():
+            close = getattr(client, 'close', None)
+            if close:
+                try:
+                    close()
+                except Exception as e:
+                    logger.warning(f"LLM 클라이언트 종료 실패: {e}")
+
+    def _get(self, clients, key, factory):
+        client = clients.get(key)
+        if client is None:
+            with self._lock:
+                client = clients.get(key)
+                if client is None:
+                    client = factory()
+                    clients[key] = client
+        return client
+
+    def _loop_clients(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.get(loop)
+            if clients is None:
+                clients = {}
+                self._async_clients[loop] = clients
+        return clients
+
+    def _create_anthropic(self):
+        import httpx
+        from anthropic import Anthropic
+        options = client_options('anthropic')
+        logger.info("Anthropic 공용 클라이언트 생성")
+        return Anthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            base_url=options['base_url'],
+            max_retries=options['max_retries'],
+            http_client=httpx.Client(**_http_client_kwargs(options))
+        )
+
+    def _create_async_anthropic(self):
+        import httpx
+        from anthropic import AsyncAnthropic
+        options = client_options('anthropic')
+        return AsyncAnthropic(
+            api_key=settings.ANTHROPIC_API_KEY,
+            base_url=options['base_url'],
+            max_retries=options['max_retries'],
+            http_client=httpx.AsyncClient(**_http_client_kwargs(options))
+        )
+
+    def _create_openai(self):
+        import httpx
+        from openai import OpenAI
+        options = client_options('openai')
+        logger.info("OpenAI 공용 클라이언트 생성")
+        return OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=options['base_url'],
+            max_retries=options['max_retries'],
+            http_client=httpx.Client(**_http_client_kwargs(options))
+        )
+
+    def _create_async_openai(self):
+        import httpx
+        from openai import AsyncOpenAI
+        options = client_options('openai')
+        return AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=options['base_url'],
+            max_retries=options['max_retries'],
+            http_client=httpx.AsyncClient(**_http_client_kwargs(options))
+        )
+
+    def _create_gemini(self, model_name):
+        import google.generativeai as genai
+        # _get이 잠금을 잡은 상태에서 호출되므로 configure는 한 번만 실행됨
+        if not self._gemini_configured:
+            options = client_options('gemini')
+            configure_kwargs = {'api_key': settings.GOOGLE_API_KEY}
+            if options['base_url']:
+                configure_kwargs['transport'] = 'rest'
+                configure_kwargs['client_options'] = {'api_endpoint': options['base_url']}
+            genai.configure(**configure_kwargs)
+            self._gemini_configured = True
+            logger.info("Gemini 공용 설정 완료")
+        return genai.GenerativeModel(model_name)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_client_registry():
+    """ 프로세스 공용 LLMClientRegistry 반환 """
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = LLMClientRegistry()
+    return _registry
@@ -0,0 +1,420 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\llm_router.py
+"""
+LLM 호출 라우팅: 헤지 요청, 제공자 장애 조치, 서킷 브레이커
+
+- 기본 경로(서비스가 원래 쓰던 제공자/모델)로 먼저 호출하고, 응답이 관측된 p95 지연 시간 안에 오지 않으면
+  대체 경로로 같은 요청을 한 번 더 보냄 (먼저 도착한 유효한 응답 사용)
+- 비동기 호출은 늦은 쪽 태스크를 취소하여 HTTP 요청을 끊음
+- 동기 호출은 경로마다 중단 신호(job_budget.cancellable_call)를 두고 응답을 스트리밍으로 받아,
+  늦은 쪽은 예산 예약/슬롯 대기 전에 멈추거나 조각 사이에서 연결을 닫고 속도 제한 슬롯을 반환
+- 한 경로가 실패하면 남은 대체 경로로 바로 넘어감
+  (StreamAborted/BudgetExhausted 등 제공자 장애가 아닌 예외는 넘어가지 않고 호출부로 그대로 전달)
+- 연속 실패가 기준을 넘은 경로는 reset_timeout 동안 건너뜀 (이후 한 번 시험 호출하여 성공하면 복구)
+- 대체 경로가 설정되지 않은 작업은 기본 경로를 그대로 호출
+
+설정:
+    LLM_HEDGE_ALTERNATES = {작업: [(제공자, 모델), ...]}
+        작업: 'generation' (콘텐츠 생성), 'optimization' (최적화 재작성), 'titles' (제목 생성)
+        예: {'generation': [('openai', 'gpt-4o')], 'titles': [('anthropic', 'claude-3-7-sonnet-20250219')]}
+    LLM_HEDGE_SETTINGS = {
+        'percentile': 헤지 지연 기준 백분위 (기본 0.95),
+        'default_delay': 관측치가 부족할 때의 헤지 지연 (초, 기본 30),
+        'min_delay': 헤지 지연 하한 (초, 기본 2),
+        'min_samples': 백분위를 쓰기 위한 최소 관측 수 (기본 20),
+        'failure_threshold': 서킷을 여는 연속 실패 수 (기본 5),
+        'reset_timeout': 서킷을 연 뒤 다시 시험할 때까지의 시간 (초, 기본 60),
+    }
+"""
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from django.conf import settings
+from .rate_limiter import get_rate_limiter
+from .job_budget import BudgetExhausted, CallCancelled, begin_llm_call, call_timeout, cancellable_call, record_llm_usage
+from .llm_streaming import StreamAborted, hedge_stream_guard, stream_anthropic_text, stream_gemini_text, stream_openai_text
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HEDGE_OPTIONS = {
+    'percentile': 0.95,
+    'default_delay': 30,
+    'min_delay': 2,
+    'min_samples': 20,
+    'failure_threshold': 5,
+    'reset_timeout': 60,
+}
+LATENCY_WINDOW = 200
+
+
+def hedge_options():
+    options = dict(DEFAULT_HEDGE_OPTIONS)
+    options.update(getattr(settings, 'LLM_HEDGE_SETTINGS', {}))
+    return options
+
+
+class InvalidResponse(Exception):
+    """ 응답은 받았으나 검증을 통과하지 못함 """
+
+
+class CircuitBreaker:
+    """ 경로별 서킷 브레이커 (closed -> open -> half-open -> closed) """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        """ 호출 가능 여부 (open 상태에서는 reset_timeout이 지나고 진행 중인 시험 호출이 없을 때만) """
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            return not self.trial_in_flight and time.monotonic() - self.opened_at >= self.reset_timeout
+
+    def begin_attempt(self):
+        """ 실제로 호출을 시작할 때 (open 상태면 시험 호출로 표시) """
+        with self._lock:
+            if self.opened_at is not None:
+                self.trial_in_flight = True
+
+    def cancel_attempt(self):
+        """ 호출이 결과 없이 취소됨 (시험 호출 표시 해제) """
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+_breakers = {}
+_latencies = {}
+_state_lock = threading.Lock()
+
+
+def get_breaker(route_key):
+    with _state_lock:
+        breaker = _breakers.get(route_key)
+        if breaker is None:
+            options = hedge_options()
+            breaker = CircuitBreaker(options['failure_threshold'], options['reset_timeout'])
+            _breakers[route_key] = breaker
+        return breaker
+
+
+def record_latency(route_key, seconds):
+    with _state_lock:
+        _latencies.setdefault(route_key, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def hedge_delay(route_key):
+    """ 기본 경로의 관측 지연 시간 백분위 (관측치가 부족하면 default_delay) """
+    options = hedge_options()
+    with _state_lock:
+        samples = sorted(_latencies.get(route_key, ()))
+    if len(samples) < options['min_samples']:
+        return options['default_delay']
+    position = min(int(len(samples) * options['percentile']), len(samples) - 1)
+    return max(samples[position], options['min_delay'])
+
+
+def route_key(route):
+    return f"{route[0]}:{route[1]}"
+
+
+def _call_kwargs(system, timeout):
+    kwargs = {}
+    if system:
+        kwargs['system'] = system
+    if timeout:
+        kwargs['timeout'] = timeout
+    return kwargs
+
+
+def _openai_messages(prompt, system):
+    return ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+
+
+def _stream_text(client_registry, guard, provider, model, prompt, temperature, max_tokens, system, timeout):
+    """ complete_text를 스트리밍으로 받음 (동기 헤지 경로 안에서 조각마다 중단 신호 확인) """
+    if provider == 'anthropic':
+        return stream_anthropic_text(
+            client_registry.anthropic(), guard, model=model, max_tokens=max_tokens, temperature=temperature,
+            messages=[{"role": "user", "content": prompt}], **_call_kwargs(system, timeout)
+        )
+    if provider == 'openai':
+        return stream_openai_text(
+            client_registry.openai(), guard, model=model, max_tokens=max_tokens, temperature=temperature,
+            messages=_openai_messages(prompt, system), **_call_kwargs(None, timeout)
+        )
+    if provider == 'gemini':
+        import google.generativeai as genai
+        return stream_gemini_text(
+            client_registry.gemini(model), f"{system}\n\n{prompt}" if system else prompt,
+            genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens), guard, {'timeout': timeout}
+        )
+    raise ValueError(f"지원하지 않는 LLM 제공자: {provider}")
+
+
+def complete_text(client_registry, provider, model, prompt, temperature, max_tokens, system=None, timeout=None):
+    """
+    제공자와 무관한 단일 텍스트 생성 호출 (공유 속도 제한기 안에서 실행)
+    timeout이 None이면 LLM_CLIENT_SETTINGS의 호출당 타임아웃 사용 (작업 예산의 남은 시간으로 제한)
+    동기 헤지 경로 안에서는 스트리밍으로 받아 다른 경로가 먼저 응답하면 중단
+
+    Returns:
+        str: 응답 텍스트
+    """
+    begin_llm_call(route_key((provider, model)))
+    timeout = call_timeout(timeout) if timeout else client_registry.timeout(provider)
+    guard = hedge_stream_guard()
+    response = None
+    with get_rate_limiter().slot(provider, model):
+        if guard is not None:
+            text = _stream_text(client_registry, guard, provider, model, prompt, temperature, max_tokens, system, timeout)
+        elif provider == 'anthropic':
+            response = client_registry.anthropic().messages.create(
+                model=model, max_tokens=max_tokens, temperature=temperature,
+                messages=[{"role": "user", "content": prompt}], **_call_kwargs(system, timeout)
+            )
+            text = response.content[0].text
+        elif provider == 'openai':
+            response = client_registry.openai().chat.completions.create(
+                model=model, max_tokens=max_tokens, temperature=temperature, messages=_openai_messages(prompt, system), **_call_kwargs(None, timeout)
+            )
+            text = response.choices[0].message.content
+        elif provider == 'gemini':
+            import google.generativeai as genai
+            response = client_registry.gemini(model).generate_content(
+                f"{system}\n\n{prompt}" if system else prompt,
+                generation_config=genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens),
+                request_options={'timeout': timeout}
+            )
+            text = response.text
+        else:
+            raise ValueError(f"지원하지 않는 LLM 제공자: {provider}")
+    record_llm_usage(prompt, text, response)
+    return text
+
+
+async def acomplete_text(client_registry, provider, model, prompt, temperature, max_tokens, system=None, timeout=None):
+    """ complete_text의 비동기 버전 """
+    begin_llm_call(route_key((provider, model)))
+    timeout = call_timeout(timeout) if timeout else client_registry.timeout(provider)
+    async with get_rate_limiter().aslot(provider, model):
+        if provider == 'anthropic':
+            response = await client_registry.async_anthropic().messages.create(
+                model=model, max_tokens=max_tokens, temperature=temperature,
+                messages=[{"role": "user", "content": prompt}], **_call_kwargs(system, timeout)
+            )
+            text = response.content[0].text
+        elif provider == 'openai':
+            response = await client_registry.async_openai().chat.completions.create(
+                model=model, max_tokens=max_tokens, temperature=temperature, messages=_openai_messages(prompt, system), **_call_kwargs(None, timeout)
+            )
+            text = response.choices[0].message.content
+        elif provider == 'gemini':
+            import google.generativeai as genai
+            response = await client_registry.gemini(model).generate_content_async(
+                f"{system}\n\n{prompt}" if system else prompt,
+                generation_config=genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens),
+                request_options={'timeout': timeout}
+            )
+            text = response.text
+        else:
+            raise ValueError(f"지원하지 않는 LLM 제공자: {provider}")
+    record_llm_usage(prompt, text, response)
+    return text
+
+
+class HedgedRouter:
+    """
+    작업 하나의 LLM 호출 경로 (기본 경로 + LLM_HEDGE_ALTERNATES의 대체 경로)
+
+    call_route(provider, model)는 해당 경로로 호출하여 응답 텍스트를 반환하는 함수
+    (acall에는 코루틴 함수)이며, validate(text)가 False면 그 응답은 실패로 처리합니다.
+    ignored_errors에 해당하는 예외는 경로 장애가 아니므로 다른 경로로 넘어가지 않고 그대로 다시 발생합니다.
+    """
+
+    def __init__(self, task, primary, ignored_errors=()):
+        """
+        Args:
+            task (str): 작업 이름 ('generation', 'optimization', 'titles')
+            primary (tuple): 기본 경로 (제공자, 모델)
+            ignored_errors (tuple): 제공자 장애로 보지 않는 예외 (서킷 실패로 세지 않고 장애 조치 없이 호출부로 전달)
+                StreamAborted(스트리밍 제약 위반)와 BudgetExhausted(작업 예산 소진)는 항상 포함
+        """
+        self.task = task
+        self.primary = tuple(primary)
+        alternates = getattr(settings, 'LLM_HEDGE_ALTERNATES', {}).get(task, [])
+        self.routes = [self.primary] + [tuple(route) for route in alternates if tuple(route) != self.primary]
+        self.ignored_errors = tuple(ignored_errors) + (StreamAborted, BudgetExhausted)
+
+    def call(self, call_route, validate=None):
+        """ 동기 헤지 호출 (스레드로 경로를 동시에 실행, 끝나면 남은 경로에 중단 신호) """
+        if len(self.routes) == 1:
+            return call_route(*self.primary)
+
+        routes = self._available_routes()
+        delay = hedge_delay(route_key(self.primary))
+        executor = ThreadPoolExecutor(max_workers=len(routes), thread_name_prefix=f'llm-{self.task}')
+        futures = {}
+        errors = {}
+        cancel_events = []
+
+        def submit(route):
+            cancel_events.append(threading.Event())
+            # 경로별 스레드에도 호출 측 컨텍스트(작업 예산)를 전달
+            futures[executor.submit(contextvars.copy_context().run, self._attempt, route, call_route, validate, cancel_events[-1])] = route
+
+        try:
+            submit(routes[0])
+            remaining = routes[1:]
+            while futures:
+                done, _ = wait(futures, timeout=delay if remaining else None, return_when=FIRST_COMPLETED)
+                if not done:
+                    route = remaining.pop(0)
+                    logger.info(f"LLM 헤지 요청 ({self.task}): {delay:.1f}초 내 응답 없음, {route_key(route)} 동시 호출")
+                    submit(route)
+                    continue
+                for future in done:
+                    route = futures.pop(future)
+                    try:
+                        return future.result()
+                    except self.ignored_errors:
+                        raise
+                    except Exception as e:
+                        errors[route] = e
+                if not futures and remaining:
+                    route = remaining.pop(0)
+                    logger.warning(f"LLM 장애 조치 ({self.task}): {route_key(route)}로 재요청")
+                    submit(route)
+        finally:
+            # 진행 중인 경로는 중단 신호를 받아 예산/슬롯을 잡기 전이나 다음 응답 조각에서 멈춤 (기다리지 않음)
+            for event in cancel_events:
+                event.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+        raise self._final_error(errors)
+
+    async def acall(self, call_route, validate=None):
+        """ 비동기 헤지 호출 (먼저 유효한 응답이 오면 나머지 태스크 취소) """
+        if len(self.routes) == 1:
+            return await call_route(*self.primary)
+
+        routes = self._available_routes()
+        delay = hedge_delay(route_key(self.primary))
+        tasks = {}
+        errors = {}
+        try:
+            tasks[asyncio.ensure_future(self._aattempt(routes[0], call_route, validate))] = routes[0]
+            remaining = routes[1:]
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=delay if remaining else None, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    route = remaining.pop(0)
+                    logger.info(f"LLM 헤지 요청 ({self.task}): {delay:.1f}초 내 응답 없음, {route_key(route)} 동시 호출")
+                    tasks[asyncio.ensure_future(self._aattempt(route, call_route, validate))] = route
+                    continue
+                for task in done:
+                    route = tasks.pop(task)
+                    try:
+                        return task.result()
+                    except self.ignored_errors:
+                        raise
+                    except Exception as e:
+                        errors[route] = e
+                if not tasks and remaining:
+                    route = remaining.pop(0)
+                    logger.warning(f"LLM 장애 조치 ({self.task}): {route_key(route)}로 재요청")
+                    tasks[asyncio.ensure_future(self._aattempt(route, call_route, validate))] = route
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise self._final_error(errors)
+
+    def _available_routes(self):
+        routes = [route for route in self.routes if get_breaker(route_key(route)).allow()]
+        if not routes:
+            # 모든 서킷이 열려 있으면 기본 경로로 시도
+            logger.warning(f"LLM 경로 서킷 모두 열림 ({self.task}): 기본 경로로 호출")
+            return [self.primary]
+        if routes[0] != self.primary:
+            logger.warning(f"LLM 기본 경로 서킷 열림 ({self.task}): {route_key(routes[0])}로 장애 조치")
+        return routes
+
+    def _attempt(self, route, call_route, validate, cancel_event):
+        get_breaker(route_key(route)).begin_attempt()
+        started = time.monotonic()
+        try:
+            with cancellable_call(cancel_event):
+                text = call_route(*route)
+            if validate is not None and not validate(text):
+                raise InvalidResponse(f"{route_key(route)} 응답 검증 실패")
+        except CallCancelled:
+            # 다른 경로가 먼저 응답하여 중단됨 (경로 실패가 아님)
+            get_breaker(route_key(route)).cancel_attempt()
+            raise
+        except Exception as e:
+            self._record_failure(route, e)
+            raise
+        self._record_success(route, time.monotonic() - started)
+        return text
+
+    async def _aattempt(self, route, call_route, validate):
+        get_breaker(route_key(route)).begin_attempt()
+        started = time.monotonic()
+        try:
+            text = await call_route(*route)
+            if validate is not None and not validate(text):
+                raise InvalidResponse(f"{route_key(route)} 응답 검증 실패")
+        except asyncio.CancelledError:
+            # 다른 경로가 먼저 응답하여 취소됨 (경로 실패가 아님)
+            get_breaker(route_key(route)).cancel_attempt()
+            raise
+        except Exception as e:
+            self._record_failure(route, e)
+            raise
+        self._record_success(route, time.monotonic() - started)
+        return text
+
+    def _record_success(self, route, seconds):
+        key = route_key(route)
+        get_breaker(key).record_success()
+        record_latency(key, seconds)
+
+    def _record_failure(self, route, error):
+        if isinstance(error, self.ignored_errors):
+            get_breaker(route_key(route)).cancel_attempt()
+            return
+        key = route_key(route)
+        breaker = get_breaker(key)
+        breaker.record_failure()
+        logger.warning(f"LLM 경로 실패 ({self.task}, {key}, 연속 {breaker.failures}회): {error}")
+        if breaker.is_open:
+            logger.error(f"LLM 경로 서킷 열림: {key}")
+
+    def _final_error(self, errors):
+        # 호출부의 예외 처리(과부하 재시도, 스트리밍 중단 등)가 그대로 동작하도록 기본 경로의 예외를 우선
+        if self.primary in errors:
+            return errors[self.primary]
+        return next(iter(errors.values()))
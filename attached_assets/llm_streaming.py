@@ -0,0 +1,206 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\llm_streaming.py
+"""
+LLM 스트리밍 응답 수신 중 글자수/목표 형태소 제약 검사
+(동기 헤지 호출의 경로 안에서는 조각마다 중단 신호도 확인하여, 다른 경로가 먼저 응답하면 연결을 닫고 슬롯을 반환)
+
+설정:
+    LLM_STREAMING_GUARD: True면 생성기/최적화기가 스트리밍으로 응답을 받고 제약을 넘으면 즉시 중단 (기본 False)
+    LLM_STREAM_CHAR_MARGIN: 최대 글자수 대비 허용 여유 비율 (기본 0.2, 최대 글자수의 120%를 넘으면 중단)
+    LLM_STREAM_MAX_MORPHEME_COUNT: 목표 형태소 절대 최대 횟수 (기본 20, 최종 검증 기준과 동일)
+"""
+import logging
+from django.conf import settings
+from .document_model import char_len
+from .job_budget import call_cancellable, check_call_cancelled
+
+logger = logging.getLogger(__name__)
+
+
+class StreamAborted(Exception):
+    """ 스트리밍 응답이 제약을 넘어 중단됨 (partial_text: 중단 시점까지 받은 텍스트) """
+
+    def __init__(self, reason, partial_text):
+        super().__init__(reason)
+        self.reason = reason
+        self.partial_text = partial_text
+
+
+class StreamingConstraintGuard:
+    """
+    스트리밍으로 들어오는 텍스트의 글자수와 목표 형태소 횟수를 누적 집계
+    - 완성된 문단("\\n\\n" 이전)은 한 번만 세고, 작성 중인 마지막 문단만 조각마다 다시 셈
+    - 글자수가 한도를 넘거나 형태소가 절대 최대 횟수를 넘으면 위반 사유를 반환
+    """
+
+    def __init__(self, automaton=None, max_chars=None, max_morpheme_count=None):
+        """
+        Args:
+            automaton (MorphemeAutomaton): 목표 형태소 오토마톤 (None이면 글자수만 검사)
+            max_chars (int): 중단 기준 글자수 (공백 제외, None이면 검사하지 않음)
+            max_morpheme_count (int): 중단 기준 형태소 횟수 (None이면 검사하지 않음)
+        """
+        self.automaton = automaton
+        self.max_chars = max_chars
+        self.max_morpheme_count = max_morpheme_count
+        self.char_count = 0
+        self.counts = {}
+        self._parts = []
+        self._completed_counts = dict.fromkeys(automaton.morphemes, 0) if automaton else {}
+        self._tail = ""
+
+    @property
+    def text(self):
+        return "".join(self._parts)
+
+    def feed(self, chunk):
+        """
+        Args:
+            chunk (str): 새로 받은 텍스트 조각
+
+        Returns:
+            str: 위반 사유 (위반이 없으면 None)
+        """
+        if not chunk:
+            return None
+        self._parts.append(chunk)
+        self.char_count += char_len(chunk)
+        if self.max_chars is not None and self.char_count > self.max_chars:
+            return f"글자수 {self.char_count}자가 {self.max_chars}자 초과"
+
+        if self.automaton is None or self.max_morpheme_count is None:
+            return None
+        self._tail += chunk
+        if "\n\n" in self._tail:
+            completed, self._tail = self._tail.rsplit("\n\n", 1)
+            for morpheme, count in self.automaton.count(completed).items():
+                self._completed_counts[morpheme] += count
+        tail_counts = self.automaton.count(self._tail)
+        self.counts = {m: count + tail_counts[m] for m, count in self._completed_counts.items()}
+        over = [m for m, count in self.counts.items() if count > self.max_morpheme_count]
+        if over:
+            return f"형태소 {', '.join(over)} {self.max_morpheme_count}회 초과"
+        return None
+
+
+def streaming_enabled():
+    return getattr(settings, 'LLM_STREAMING_GUARD', False)
+
+
+def build_stream_guard(morpheme_analyzer, automaton=None):
+    """ 분석기의 최대 글자수와 설정된 여유/절대 최대 횟수로 검사기 생성 """
+    margin = getattr(settings, 'LLM_STREAM_CHAR_MARGIN', 0.2)
+    return StreamingConstraintGuard(
+        automaton,
+        max_chars=int(morpheme_analyzer.target_max_chars * (1 + margin)),
+        max_morpheme_count=getattr(settings, 'LLM_STREAM_MAX_MORPHEME_COUNT', 20)
+    )
+
+
+def hedge_stream_guard():
+    """
+    LLM_STREAMING_GUARD를 쓰지 않을 때의 검사기
+    동기 헤지 호출의 경로 안이면 중단 신호를 조각마다 확인하도록 제약 없는 검사기로 스트리밍, 그 외에는 None
+    """
+    return StreamingConstraintGuard() if call_cancellable() else None
+
+
+def correction_note(reason, morpheme_analyzer, max_morpheme_count=None):
+    """ 중단된 응답 다음 시도의 프롬프트에 덧붙일 교정 지시 """
+    max_morpheme_count = max_morpheme_count or getattr(settings, 'LLM_STREAM_MAX_MORPHEME_COUNT', 20)
+    return (
+        f"\n\n[중요] 이전 응답은 {reason}하여 중단되었습니다. "
+        f"전체 글자수(공백 제외)는 {morpheme_analyzer.target_min_chars}~{morpheme_analyzer.target_max_chars}자로 맞추고, "
+        f"각 목표 형태소는 {max_morpheme_count}회를 넘지 않도록 작성해주세요."
+    )
+
+
+def stream_gemini_text(model, prompt, generation_config, guard, request_options=None):
+    """
+    Gemini 응답을 스트리밍으로 받으며 검사 (request_options: 타임아웃 등 호출 옵션)
+
+    Returns:
+        str: 전체 응답 텍스트
+
+    Raises:
+        StreamAborted: 제약 위반으로 수신을 중단한 경우
+    """
+    response = model.generate_content(prompt, generation_config=generation_config, stream=True, request_options=request_options)
+    for chunk in response:
+        check_call_cancelled()
+        reason = guard.feed(chunk.text)
+        if reason:
+            logger.warning(f"Gemini 스트리밍 중단: {reason}")
+            raise StreamAborted(reason, guard.text)
+    return guard.text
+
+
+def stream_anthropic_text(client, guard, **message_kwargs):
+    """
+    Anthropic 응답을 스트리밍으로 받으며 검사 (중단 시 스트림 연결을 닫아 생성을 멈춤)
+
+    Args:
+        client (Anthropic): Anthropic 클라이언트
+        guard (StreamingConstraintGuard): 제약 검사기
+        **message_kwargs: messages.stream에 전달할 인자 (model, max_tokens, temperature, messages)
+
+    Returns:
+        str: 전체 응답 텍스트
+
+    Raises:
+        StreamAborted: 제약 위반으로 수신을 중단한 경우
+    """
+    with client.messages.stream(**message_kwargs) as stream:
+        for text in stream.text_stream:
+            check_call_cancelled()
+            reason = guard.feed(text)
+            if reason:
+                logger.warning(f"Anthropic 스트리밍 중단: {reason}")
+                raise StreamAborted(reason, guard.text)
+    return guard.text
+
+
+def stream_openai_text(client, guard, **completion_kwargs):
+    """
+    OpenAI 응답을 스트리밍으로 받으며 검사 (중단 시 스트림 연결을 닫아 생성을 멈춤)
+
+    Args:
+        client (OpenAI): OpenAI 클라이언트
+        guard (StreamingConstraintGuard): 제약 검사기
+        **completion_kwargs: chat.completions.create에 전달할 인자 (model, messages, temperature 등)
+
+    Returns:
+        str: 전체 응답 텍스트
+
+    Raises:
+        StreamAborted: 제약 위반으로 수신을 중단한 경우
+    """
+    with client.chat.completions.create(stream=True, **completion_kwargs) as stream:
+        for chunk in stream:
+            check_call_cancelled()
+            reason = guard.feed(chunk.choices[0].delta.content if chunk.choices else None)
+            if reason:
+                logger.warning(f"OpenAI 스트리밍 중단: {reason}")
+                raise StreamAborted(reason, guard.text)
+    return guard.text
+
+
+async def astream_gemini_text(model, prompt, generation_config, guard, request_options=None):
+    """ stream_gemini_text의 비동기 버전 (generate_content_async) """
+    response = await model.generate_content_async(prompt, generation_config=generation_config, stream=True, request_options=request_options)
+    async for chunk in response:
+        reason = guard.feed(chunk.text)
+        if reason:
+            logger.warning(f"Gemini 스트리밍 중단: {reason}")
+            raise StreamAborted(reason, guard.text)
+    return guard.text
+
+
+async def astream_anthropic_text(client, guard, **message_kwargs):
+    """ stream_anthropic_text의 비동기 버전 (client: AsyncAnthropic) """
+    async with client.messages.stream(**message_kwargs) as stream:
+        async for text in stream.text_stream:
+            reason = guard.feed(text)
+            if reason:
+                logger.warning(f"Anthropic 스트리밍 중단: {reason}")
+                raise StreamAborted(reason, guard.text)
+    return guard.text
@@ -0,0 +1,135 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\local_reducer.py
+"""
+규칙 기반 로컬 문장 축소
+
+- LLM 호출 전에 형태소 출현을 기계적으로 줄일 수 있는 문장을 먼저 처리 (밀리초 단위)
+- 시도 순서: 우리가 삽입한 템플릿 문장 삭제 -> 삽입한 앞/뒤 구문 제거 -> 수식어 위치의 형태소 삭제
+  -> 대체어(_get_enhanced_substitutions)로 교체하며 뒤따르는 조사를 받침에 맞게 조정
+- 모든 결과는 오토마톤으로 다시 세어 검증 (대상 형태소 감소, 다른 목표 형태소 증가 없음, 감소는 허용량 이내)
+- 처리하지 못한 문장만 LLM 축소로 넘김
+
+설정:
+    LOCAL_SENTENCE_REDUCER_ENABLED: 로컬 축소 사용 여부 (기본 True)
+"""
+import logging
+from .particles import is_hangul, particle_after, attach_particle
+from .template_registry import inserted_fragments
+
+logger = logging.getLogger(__name__)
+
+def standalone_positions(sentence, morpheme):
+    """ 다른 단어의 일부가 아닌 출현 위치 (앞은 단어 시작, 뒤는 단어를 끝내는 조사/공백/문장부호) """
+    positions = []
+    start = sentence.find(morpheme)
+    while start >= 0:
+        end = start + len(morpheme)
+        before_ok = start == 0 or not is_hangul(sentence[start - 1])
+        after = sentence[end:]
+        after_ok = not after or not is_hangul(after[0]) or particle_after(after)[0]
+        if before_ok and after_ok:
+            positions.append(start)
+        start = sentence.find(morpheme, end)
+    return positions
+
+
+def substitute_word(sentence, morpheme, position, substitute):
+    """ position의 형태소를 대체어로 바꾸고, 뒤따르는 교대형 조사를 대체어 받침에 맞춤 (변화가 없으면 None) """
+    end = position + len(morpheme)
+    particle, pair = particle_after(sentence[end:])
+    replacement = attach_particle(substitute, pair) if pair else substitute + particle
+    rewritten = sentence[:position] + replacement + sentence[end + len(particle):]
+    return rewritten if rewritten != sentence else None
+
+
+class LocalSentenceReducer:
+    """
+    형태소 하나를 줄이는 결정적 문장 편집기
+
+    Args:
+        automaton (MorphemeAutomaton): 목표 형태소 오토마톤 (검증용 카운트)
+        substitutions (callable): 형태소 -> 대체어 목록
+    """
+
+    MAX_SUBSTITUTES = 5
+
+    def __init__(self, automaton, substitutions):
+        self.automaton = automaton
+        self.substitutions = substitutions
+        self._fragments = {}
+
+    def reduce(self, sentence, morpheme, allowed_loss=None):
+        """
+        문장에서 형태소 출현을 줄인 결과를 반환
+
+        Args:
+            sentence (str): 대상 문장
+            morpheme (str): 줄일 형태소
+            allowed_loss (dict): 다른 목표 형태소별로 줄어도 되는 최대 횟수 (없으면 줄면 안 됨)
+
+        Returns:
+            str: 검증을 통과한 축소 문장 (문장 삭제는 빈 문자열), 처리할 수 없으면 None
+        """
+        original_counts = self.automaton.count(sentence)
+        if not original_counts.get(morpheme):
+            return None
+        for candidate in self._candidates(sentence, morpheme):
+            if self._is_valid(candidate, morpheme, original_counts, allowed_loss or {}):
+                return candidate
+        return None
+
+    def is_inserted(self, sentence, morpheme):
+        """ 우리가 삽입한 템플릿 문장이거나 삽입한 앞/뒤 구문이 붙은 문장인지 """
+        stripped = sentence.strip()
+        template_sentences, leading, trailing = self._inserted(morpheme)
+        return stripped in template_sentences or stripped.startswith(tuple(leading)) or stripped.endswith(trailing)
+
+    def _candidates(self, sentence, morpheme):
+        stripped = sentence.strip()
+        template_sentences, leading, trailing = self._inserted(morpheme)
+        if stripped in template_sentences:
+            yield ""
+            return
+        for phrase in leading:
+            if stripped.startswith(phrase) and stripped[len(phrase):].strip():
+                yield stripped[len(phrase):].lstrip()
+        if stripped.endswith(trailing):
+            yield stripped[:-len(trailing)] + "."
+
+        positions = standalone_positions(sentence, morpheme)
+        for position in positions:
+            modifier_dropped = self._drop_modifier(sentence, morpheme, position)
+            if modifier_dropped:
+                yield modifier_dropped
+        for substitute in [s for s in self.substitutions(morpheme) if s][:self.MAX_SUBSTITUTES]:
+            for position in positions:
+                rewritten = substitute_word(sentence, morpheme, position, substitute)
+                if rewritten:
+                    yield rewritten
+
+    def _inserted(self, morpheme):
+        fragments = self._fragments.get(morpheme)
+        if fragments is None:
+            fragments = inserted_fragments(morpheme)
+            self._fragments[morpheme] = fragments
+        return fragments
+
+    def _drop_modifier(self, sentence, morpheme, position):
+        """ 다음 명사를 꾸미는 위치('형태소의 ', '형태소 명사')의 형태소 삭제 """
+        end = position + len(morpheme)
+        for connector in ("의 ", " "):
+            if sentence.startswith(connector, end) and is_hangul(sentence[end + len(connector):end + len(connector) + 1] or ' '):
+                rewritten = sentence[:position] + sentence[end + len(connector):]
+                return rewritten if rewritten.strip() else None
+        return None
+
+    def _is_valid(self, candidate, morpheme, original_counts, allowed_loss):
+        new_counts = self.automaton.count(candidate) if candidate else {}
+        if new_counts.get(morpheme, 0) >= original_counts[morpheme]:
+            return False
+        for other in self.automaton.morphemes:
+            if other == morpheme:
+                continue
+            delta = new_counts.get(other, 0) - original_counts.get(other, 0)
+            if delta > 0 or -delta > allowed_loss.get(other, 0):
+                return False
+        return True
@@ -0,0 +1,151 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\memo_cache.py
+import hashlib
+import logging
+import pickle
+import threading
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TwoTierMemoCache:
+    """
+    내용 기반(content-addressed) 2단계 메모 캐시
+    - 1단계: 프로세스 내 LRU (항목 수 + 바이트 크기 기준 제거)
+    - 2단계: Django 캐시 백엔드 (워커 간 공유, 설정된 alias 사용)
+    """
+
+    def __init__(self, namespace, max_entries=2048, max_bytes=8 * 1024 * 1024, shared_timeout=60 * 60 * 24 * 7, cache_alias='default'):
+        """
+        Args:
+            namespace (str): 키 접두사 (캐시 용도별로 구분)
+            max_entries (int): 프로세스 내 LRU 최대 항목 수
+            max_bytes (int): 프로세스 내 LRU 최대 크기 (직렬화 기준 바이트)
+            shared_timeout (int): 공유 캐시 만료 시간 (초), None이면 만료 없음
+            cache_alias (str): 공유 캐시로 사용할 Django 캐시 alias, None이면 공유 캐시 미사용
+        """
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared_timeout = shared_timeout
+        self.cache_alias = cache_alias
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def make_key(self, *parts):
+        """ 구성 요소를 해시하여 캐시 키 생성 """
+        digest = hashlib.sha256("\x1f".join(str(p) for p in parts).encode('utf-8')).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return entry[0]
+
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            self._local_set(key, value)
+            with self._lock:
+                self.shared_hits += 1
+            return value
+
+        with self._lock:
+            self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._local_set(key, value)
+        shared_cache = self._shared_cache()
+        if shared_cache is None:
+            return
+        try:
+            shared_cache.set(key, value, timeout=self.shared_timeout)
+        except Exception as e:
+            logger.warning(f"공유 캐시 저장 실패 ({self.namespace}): {e}")
+
+    def stats(self):
+        """ 적중/미스 카운터와 현재 LRU 사용량 """
+        with self._lock:
+            return {
+                'namespace': self.namespace,
+                'local_hits': self.local_hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes
+            }
+
+    def clear(self):
+        """ 프로세스 내 LRU만 비움 (공유 캐시는 만료 시간에 맡김) """
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _local_set(self, key, value):
+        try:
+            size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+
+    def _shared_cache(self):
+        if not self.cache_alias:
+            return None
+        try:
+            return caches[self.cache_alias]
+        except Exception as e:
+            logger.warning(f"공유 캐시 '{self.cache_alias}'를 사용할 수 없습니다: {e}")
+            return None
+
+    def _shared_get(self, key):
+        shared_cache = self._shared_cache()
+        if shared_cache is None:
+            return _MISSING
+        try:
+            return shared_cache.get(key, _MISSING)
+        except Exception as e:
+            logger.warning(f"공유 캐시 조회 실패 ({self.namespace}): {e}")
+            return _MISSING
+
+
+_memo_caches = {}
+_memo_caches_lock = threading.Lock()
+
+
+def get_memo_cache(namespace):
+    """
+    네임스페이스별 프로세스 공용 캐시 인스턴스 반환
+    설정: MEMO_CACHE_SETTINGS = {namespace: {'max_entries': ..., 'max_bytes': ..., 'shared_timeout': ..., 'cache_alias': ...}}
+    """
+    with _memo_caches_lock:
+        memo_cache = _memo_caches.get(namespace)
+        if memo_cache is None:
+            options = getattr(settings, 'MEMO_CACHE_SETTINGS', {}).get(namespace, {})
+            memo_cache = TwoTierMemoCache(namespace, **options)
+            _memo_caches[namespace] = memo_cache
+        return memo_cache
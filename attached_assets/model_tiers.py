@@ -0,0 +1,159 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\model_tiers.py
+"""
+작업별 모델 등급 라우팅
+
+- 하위 작업마다 시도할 모델 등급 순서를 정하고, 앞 등급의 응답이 로컬 검증을 통과하지 못하거나
+  호출이 실패하면 다음 등급으로 상향
+- 마지막 등급의 응답도 검증하며, 어느 등급의 응답도 통과하지 못하면 TierResponseRejected 발생
+  (검증에 실패한 응답이라도 쓸 수 있는 호출부는 예외의 text를 사용)
+- 'default' 등급은 서비스가 원래 쓰던 모델 호출 (생성기: Claude, 최적화기: gemini-2.5-pro, 제목: GPT-4/Claude)
+- 기본값: 모든 작업이 기본 모델만 사용 (빠른 모델 등급은 LLM_TASK_TIERS로 작업별로 켬)
+
+설정:
+    LLM_MODEL_TIERS = {등급: {
+        'provider': 제공자, 'model': 모델,
+        'timeout': 호출 타임아웃 (초),
+        'max_output_tokens': 출력 토큰 상한 (호출당 비용 목표),
+    }}
+    LLM_TASK_TIERS = {작업: [등급, ...]}
+        작업: 'article_generation', 'verification_rewrite', 'sentence_reduction', 'title_generation'
+        예: {'sentence_reduction': ['fast', 'default'], 'title_generation': ['fast', 'default']}
+"""
+import logging
+from django.conf import settings
+from .llm_router import complete_text, acomplete_text
+from .job_budget import BudgetExhausted
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIER = 'default'
+
+DEFAULT_MODEL_TIERS = {
+    'fast': {
+        'provider': 'gemini',
+        'model': 'gemini-2.5-flash',
+        'timeout': 30,
+        'max_output_tokens': 4096,
+    },
+}
+
+DEFAULT_TASK_TIERS = {
+    'article_generation': [DEFAULT_TIER],
+    'verification_rewrite': [DEFAULT_TIER],
+    'sentence_reduction': [DEFAULT_TIER],
+    'title_generation': [DEFAULT_TIER],
+}
+
+
+class TierResponseRejected(Exception):
+    """ 모든 등급의 응답이 검증을 통과하지 못함 (text: 마지막 등급의 응답) """
+
+    def __init__(self, task, text):
+        super().__init__(f"모든 모델 등급의 응답이 검증을 통과하지 못했습니다 ({task})")
+        self.task = task
+        self.text = text
+
+
+def task_tiers(task):
+    """ 작업의 등급 순서 (설정이 없으면 기본값, 모르는 작업은 기본 모델만) """
+    tiers = getattr(settings, 'LLM_TASK_TIERS', {}).get(task)
+    if tiers is None:
+        tiers = DEFAULT_TASK_TIERS.get(task, [DEFAULT_TIER])
+    return list(tiers) or [DEFAULT_TIER]
+
+
+def tier_options(tier):
+    options = dict(DEFAULT_MODEL_TIERS.get(tier, {}))
+    options.update(getattr(settings, 'LLM_MODEL_TIERS', {}).get(tier, {}))
+    if 'provider' not in options or 'model' not in options:
+        raise ValueError(f"모델 등급 설정 누락: {tier}")
+    return options
+
+
+def tier_chain(task, default_model):
+    """ 작업의 등급 순서를 실제 모델로 펼친 문자열 (캐시 키에 넣어 등급/모델 설정이 바뀌면 다른 키가 되도록) """
+    models = []
+    for tier in task_tiers(task):
+        if tier == DEFAULT_TIER:
+            models.append(default_model)
+        else:
+            options = tier_options(tier)
+            models.append(f"{options['provider']}:{options['model']}")
+    return ">".join(models)
+
+
+class TieredModelRouter:
+    """
+    작업 하나의 등급별 호출과 상향
+
+    validate(text)는 응답이 로컬 검증(형태소 감소, 형식 등)을 통과하는지,
+    default_call()은 'default' 등급의 호출 (acall에는 코루틴 함수)
+    """
+
+    def __init__(self, task, client_registry):
+        self.task = task
+        self.client_registry = client_registry
+        self.tiers = task_tiers(task)
+
+    def call(self, prompt, temperature, max_tokens, validate, default_call, system=None):
+        """
+        Returns:
+            str: 검증을 통과한 첫 응답
+
+        Raises:
+            TierResponseRejected: 마지막 등급의 응답까지 검증을 통과하지 못함
+        """
+        for position, tier in enumerate(self.tiers):
+            is_last = position == len(self.tiers) - 1
+            try:
+                if tier == DEFAULT_TIER:
+                    text = default_call()
+                else:
+                    options = tier_options(tier)
+                    text = complete_text(
+                        self.client_registry, options['provider'], options['model'], prompt, temperature,
+                        min(max_tokens, options.get('max_output_tokens', max_tokens)), system=system, timeout=options.get('timeout')
+                    )
+            except BudgetExhausted:
+                # 예산이 다하면 다음 등급도 호출할 수 없음
+                raise
+            except Exception as e:
+                if is_last:
+                    raise
+                logger.warning(f"모델 등급 '{tier}' 호출 실패 ({self.task}), 다음 등급으로 상향: {e}")
+                continue
+            if self._accept(tier, text, validate, is_last):
+                return text
+
+    async def acall(self, prompt, temperature, max_tokens, validate, default_call, system=None):
+        """ call의 비동기 버전 """
+        for position, tier in enumerate(self.tiers):
+            is_last = position == len(self.tiers) - 1
+            try:
+                if tier == DEFAULT_TIER:
+                    text = await default_call()
+                else:
+                    options = tier_options(tier)
+                    text = await acomplete_text(
+                        self.client_registry, options['provider'], options['model'], prompt, temperature,
+                        min(max_tokens, options.get('max_output_tokens', max_tokens)), system=system, timeout=options.get('timeout')
+                    )
+            except BudgetExhausted:
+                # 예산이 다하면 다음 등급도 호출할 수 없음
+                raise
+            except Exception as e:
+                if is_last:
+                    raise
+                logger.warning(f"모델 등급 '{tier}' 호출 실패 ({self.task}), 다음 등급으로 상향: {e}")
+                continue
+            if self._accept(tier, text, validate, is_last):
+                return text
+
+    def _accept(self, tier, text, validate, is_last):
+        if text is not None and validate(text):
+            return True
+        if is_last:
+            logger.info(f"모델 등급 '{tier}' 응답 검증 실패 ({self.task}), 남은 등급 없음")
+            raise TierResponseRejected(self.task, text)
+        logger.info(f"모델 등급 '{tier}' 응답 검증 실패 ({self.task}), 다음 등급으로 상향")
+        return False
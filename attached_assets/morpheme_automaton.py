@@ -0,0 +1,192 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\morpheme_automaton.py
+import re
+import bisect
+import threading
+from collections import deque
+
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+')
+HANGUL_PATTERN = re.compile(r'[가-힣]')
+
+# 카운팅 방식 (MorphemeAnalyzer와 동일한 의미)
+MATCH_SUBSTRING = 0        # 핵심 기본 형태소: 부분 문자열 (_count_substring)
+MATCH_HANGUL_BOUNDARY = 1  # 한글 복합 키워드: 앞뒤가 한글이 아니어야 함 (_count_exact_word)
+MATCH_WORD_BOUNDARY = 2    # 영문/숫자 복합 키워드: \b 경계
+
+
+def _is_hangul(char):
+    return '가' <= char <= '힣'
+
+
+def _is_word(char):
+    return bool(char) and (char.isalnum() or char == '_')
+
+
+def _match_kind(morpheme, is_compound):
+    if not is_compound:
+        return MATCH_SUBSTRING
+    if HANGUL_PATTERN.search(morpheme):
+        return MATCH_SUBSTRING if ' ' in morpheme else MATCH_HANGUL_BOUNDARY
+    return MATCH_WORD_BOUNDARY
+
+
+class MorphemeScan:
+    """
+    한 번의 선형 탐색 결과
+    - counts: 형태소별 전체 출현 횟수
+    - sentences: 문장 목록 (re.split(r'(?<=[.!?])\\s+')와 동일)
+    - sentence_counts: 문장별 {형태소: 횟수} (출현한 형태소만)
+    - hits: 형태소별 출현 문장 인덱스 목록
+    """
+
+    __slots__ = ('counts', 'sentences', 'sentence_counts', 'hits')
+
+    def __init__(self, counts, sentences, sentence_counts, hits):
+        self.counts = counts
+        self.sentences = sentences
+        self.sentence_counts = sentence_counts
+        self.hits = hits
+
+
+class MorphemeAutomaton:
+    """
+    목표 형태소 전체에 대한 Aho-Corasick 오토마톤
+    - 핵심 기본 형태소는 부분 문자열, 복합 키워드는 한글 경계 기준으로 카운트
+    - 모든 형태소의 횟수와 문장별 출현 위치를 문서 한 번의 탐색으로 계산
+    - 형태소별 카운트는 re.findall과 같이 겹치지 않는 출현만 셈
+    """
+
+    def __init__(self, base_morphemes, compound_morphemes=()):
+        """
+        Args:
+            base_morphemes (list): 핵심 기본 형태소 (부분 문자열 카운트)
+            compound_morphemes (list): 복합 키워드/구문 (경계 기준 카운트)
+        """
+        compound_set = set(compound_morphemes)
+        self.morphemes = []
+        self.kinds = []
+        self.lengths = []
+        for morpheme in list(base_morphemes) + list(compound_morphemes):
+            if not morpheme or morpheme in self.morphemes:
+                continue
+            self.morphemes.append(morpheme)
+            self.kinds.append(_match_kind(morpheme, morpheme in compound_set))
+            self.lengths.append(len(morpheme))
+        self.index = {m: i for i, m in enumerate(self.morphemes)}
+        self.max_length = max(self.lengths, default=0)
+        self._build()
+
+    def _build(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern_id, morpheme in enumerate(self.morphemes):
+            node = 0
+            for char in morpheme:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][char] = next_node
+                node = next_node
+            self._out[node].append(pattern_id)
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def _accepts(self, pattern_id, text, start, end):
+        kind = self.kinds[pattern_id]
+        if kind == MATCH_SUBSTRING:
+            return True
+        prev_char = text[start - 1] if start > 0 else ''
+        next_char = text[end] if end < len(text) else ''
+        if kind == MATCH_HANGUL_BOUNDARY:
+            return not _is_hangul(prev_char) and not _is_hangul(next_char)
+        return (_is_word(prev_char) != _is_word(text[start])) and (_is_word(text[end - 1]) != _is_word(next_char))
+
+    def _iter_matches(self, text):
+        """ (pattern_id, start) 를 끝 위치 순서로 생성 """
+        goto, fail, out = self._goto, self._fail, self._out
+        last_end = [0] * len(self.morphemes)
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pattern_id in out[node]:
+                start = i - self.lengths[pattern_id] + 1
+                if start < last_end[pattern_id] or not self._accepts(pattern_id, text, start, i + 1):
+                    continue
+                last_end[pattern_id] = i + 1
+                yield pattern_id, start
+
+    def count(self, text):
+        """
+        Args:
+            text (str): 분석할 텍스트
+
+        Returns:
+            dict: 형태소별 출현 횟수
+        """
+        counts = [0] * len(self.morphemes)
+        for pattern_id, _ in self._iter_matches(text):
+            counts[pattern_id] += 1
+        return dict(zip(self.morphemes, counts))
+
+    def scan(self, text):
+        """
+        문장 분할과 형태소 카운트를 한 번에 수행
+
+        Args:
+            text (str): 분석할 텍스트
+
+        Returns:
+            MorphemeScan: 전체 횟수, 문장 목록, 문장별 횟수, 형태소별 출현 문장
+        """
+        sentence_starts = [0]
+        sentences = []
+        for separator in SENTENCE_SPLIT_PATTERN.finditer(text):
+            sentences.append(text[sentence_starts[-1]:separator.start()])
+            sentence_starts.append(separator.end())
+        sentences.append(text[sentence_starts[-1]:])
+
+        counts = [0] * len(self.morphemes)
+        sentence_counts = [{} for _ in sentences]
+        for pattern_id, start in self._iter_matches(text):
+            counts[pattern_id] += 1
+            sentence_idx = bisect.bisect_right(sentence_starts, start) - 1
+            morpheme = self.morphemes[pattern_id]
+            sentence_counts[sentence_idx][morpheme] = sentence_counts[sentence_idx].get(morpheme, 0) + 1
+
+        hits = {m: [] for m in self.morphemes}
+        for sentence_idx, per_sentence in enumerate(sentence_counts):
+            for morpheme in per_sentence:
+                hits[morpheme].append(sentence_idx)
+
+        return MorphemeScan(dict(zip(self.morphemes, counts)), sentences, sentence_counts, hits)
+
+
+_automata = {}
+_automata_lock = threading.Lock()
+
+
+def get_automaton(base_morphemes, compound_morphemes=()):
+    """ 목표 형태소 조합별로 컴파일된 오토마톤을 재사용 """
+    cache_key = (tuple(base_morphemes), tuple(compound_morphemes))
+    with _automata_lock:
+        automaton = _automata.get(cache_key)
+        if automaton is None:
+            if len(_automata) >= 256:
+                _automata.pop(next(iter(_automata)))
+            automaton = MorphemeAutomaton(base_morphemes, compound_morphemes)
+            _automata[cache_key] = automaton
+        return automaton
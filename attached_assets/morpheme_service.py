@@ -0,0 +1,426 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\morpheme_service.py
+"""
+프로세스 외부 형태소 분석 서비스 (Unix 소켓 사이드카)
+
+실행:
+    python -m content.services.morpheme_service --socket /tmp/blogcheatkey-morpheme.sock
+
+설정:
+    MORPHEME_SERVICE_SOCKET: 사이드카 소켓 경로 (None이면 사용하지 않고 프로세스 내에서 분석)
+    MORPHEME_SERVICE_TIMEOUT: 요청 타임아웃 (초, 기본 10)
+    MORPHEME_SERVICE_BATCH_WINDOW: 요청을 모으는 시간 (초, 기본 0.005)
+    OKT_POOL_WARM_UP: 사이드카 없이 프로세스 내에서 분석할 때 첫 get_tokenizer()에서 Okt 풀을 워밍업 (기본 True)
+
+프로토콜: 줄 단위 JSON
+    요청  {"id": 1, "method": "pos" | "nouns" | "analyze" | "describe" | "is_better_optimization", "params": {...}}
+    응답  {"id": 1, "result": ...} 또는 {"id": 1, "error": "..."}
+"""
+import os
+import json
+import time
+import queue
+import socket
+import logging
+import argparse
+import threading
+import socketserver
+from concurrent.futures import Future
+from django.conf import settings
+from .analysis_result import to_plain
+
+logger = logging.getLogger(__name__)
+
+# 여러 요청을 한 번의 Okt 호출로 묶을 때 사용하는 구분 토큰 (영문 토큰은 Okt가 그대로 Alpha로 분리)
+BATCH_SEPARATOR_TOKEN = "QXMORPHSEPQX"
+BATCH_SEPARATOR = f"\n\n {BATCH_SEPARATOR_TOKEN} \n\n"
+
+DESCRIBED_ATTRIBUTES = (
+    'target_min_chars', 'target_max_chars',
+    'target_min_base_count', 'target_max_base_count',
+    'target_min_compound_count', 'target_max_compound_count',
+)
+
+
+class MorphemeServiceUnavailable(Exception):
+    """ 사이드카에 연결할 수 없거나 응답이 올바르지 않음 """
+
+
+class _RequestBatcher:
+    """
+    여러 연결에서 들어온 요청을 짧은 시간 동안 모아 한 번에 처리
+    - pos/nouns 요청은 옵션(norm, stem)별로 묶어 Okt 한 번 호출 후 구분 토큰으로 다시 분리
+    - analyze 등 분석기 요청은 별도 작업 스레드에서 순서대로 처리
+      (분석기의 JVM 접근을 그 스레드로 제한하고, 오래 걸리는 analyze가 pos/nouns 묶음 처리를 막지 않음)
+    """
+
+    TOKEN_METHODS = ('pos', 'nouns')
+
+    def __init__(self, tokenizer, analyzer, batch_window=0.005, max_batch=64):
+        self.tokenizer = tokenizer
+        self.analyzer = analyzer
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.batched_requests = 0
+        self._queue = queue.Queue()
+        self._analysis_queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="morpheme-batcher", daemon=True)
+        self._thread.start()
+        self._analysis_thread = threading.Thread(target=self._run_analysis, name="morpheme-analyzer", daemon=True)
+        self._analysis_thread.start()
+
+    def submit(self, method, params):
+        future = Future()
+        target_queue = self._queue if method in self.TOKEN_METHODS else self._analysis_queue
+        target_queue.put((method, params, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.batched_requests += len(batch)
+            self._process(batch)
+
+    def _run_analysis(self):
+        while True:
+            method, params, future = self._analysis_queue.get()
+            try:
+                future.set_result(self._handle_single(method, params))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _process(self, batch):
+        token_groups = {}
+        for method, params, future in batch:
+            key = (bool(params.get('norm')), bool(params.get('stem')))
+            token_groups.setdefault(key, []).append((method, params, future))
+
+        for (norm, stem), requests in token_groups.items():
+            try:
+                results = self._tokenize_batch([p.get('text', '') for _, p, _ in requests], norm, stem)
+            except Exception as e:
+                for _, _, future in requests:
+                    future.set_exception(e)
+                continue
+            for (method, _, future), tagged in zip(requests, results):
+                if method == 'nouns':
+                    future.set_result([word for word, tag in tagged if tag == 'Noun'])
+                else:
+                    future.set_result([[word, tag] for word, tag in tagged])
+
+    def _tokenize_batch(self, texts, norm, stem):
+        if len(texts) == 1:
+            return [self.tokenizer.pos(texts[0], norm=norm, stem=stem)]
+
+        tagged = self.tokenizer.pos(BATCH_SEPARATOR.join(texts), norm=norm, stem=stem)
+        results = [[]]
+        for word, tag in tagged:
+            if word == BATCH_SEPARATOR_TOKEN:
+                results.append([])
+            else:
+                results[-1].append((word, tag))
+
+        if len(results) != len(texts):
+            # 구분 토큰이 깨진 경우 개별 호출로 처리
+            logger.warning(f"배치 토큰화 분리 실패: {len(texts)}개 요청, {len(results)}개 결과. 개별 처리합니다.")
+            return [self.tokenizer.pos(text, norm=norm, stem=stem) for text in texts]
+        return results
+
+    def _handle_single(self, method, params):
+        if method == 'analyze':
+            return self.analyzer.analyze(params.get('content', ''), params.get('keyword', ''), params.get('custom_morphemes'))
+        if method == 'describe':
+            return {name: getattr(self.analyzer, name) for name in DESCRIBED_ATTRIBUTES if hasattr(self.analyzer, name)}
+        if method == 'is_better_optimization':
+            return bool(self.analyzer.is_better_optimization(params.get('candidate'), params.get('best')))
+        raise ValueError(f"지원하지 않는 메서드: {method}")
+
+
+class _ConnectionHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        for raw_line in self.rfile:
+            if not raw_line.strip():
+                continue
+            request_id = None
+            try:
+                request = json.loads(raw_line)
+                request_id = request.get('id')
+                future = self.server.batcher.submit(request.get('method'), request.get('params') or {})
+                response = {'id': request_id, 'result': future.result()}
+            except Exception as e:
+                response = {'id': request_id, 'error': str(e)}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+            self.wfile.flush()
+
+
+class MorphemeServiceServer(socketserver.ThreadingUnixStreamServer):
+    """ Okt와 MorphemeAnalyzer를 한 프로세스에 두고 여러 워커의 요청을 처리하는 사이드카 """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_path, tokenizer, analyzer, batch_window=0.005, max_batch=64):
+        """
+        Args:
+            socket_path (str): Unix 소켓 경로
+            tokenizer: pos(text, norm, stem)를 제공하는 토크나이저 (OktPool 등)
+            analyzer (MorphemeAnalyzer): analyze/describe 요청을 처리할 분석기
+            batch_window (float): 요청을 모으는 시간 (초)
+            max_batch (int): 한 번에 묶을 최대 요청 수
+        """
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.socket_path = socket_path
+        self.batcher = _RequestBatcher(tokenizer, analyzer, batch_window, max_batch)
+        super().__init__(socket_path, _ConnectionHandler)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class MorphemeServiceClient:
+    """
+    사이드카 클라이언트
+    - 스레드별로 연결을 유지하고 요청마다 한 줄씩 주고받음
+    - 연결 실패 시 retry_interval 동안 사이드카를 사용하지 않음 (호출자는 프로세스 내 분석으로 대체)
+    """
+
+    def __init__(self, socket_path, timeout=10, retry_interval=30):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._local = threading.local()
+        self._unavailable_until = 0
+        self._request_id = 0
+        self._id_lock = threading.Lock()
+
+    def call(self, method, **params):
+        """
+        Args:
+            method (str): pos, nouns, analyze, describe
+            **params: 메서드 인자
+
+        Returns:
+            요청 결과
+
+        Raises:
+            MorphemeServiceUnavailable: 사이드카 사용 불가 또는 처리 오류
+        """
+        if time.monotonic() < self._unavailable_until:
+            raise MorphemeServiceUnavailable("형태소 분석 서비스 재연결 대기 중")
+
+        with self._id_lock:
+            self._request_id += 1
+            request_id = self._request_id
+
+        try:
+            stream = self._stream()
+            stream.write(json.dumps({'id': request_id, 'method': method, 'params': params}, ensure_ascii=False).encode('utf-8') + b"\n")
+            stream.flush()
+            raw_line = stream.readline()
+            if not raw_line:
+                raise ConnectionError("연결이 종료되었습니다")
+            response = json.loads(raw_line)
+        except (OSError, ValueError) as e:
+            self._close()
+            self._unavailable_until = time.monotonic() + self.retry_interval
+            raise MorphemeServiceUnavailable(f"형태소 분석 서비스 통신 실패: {e}")
+
+        if response.get('id') != request_id:
+            self._close()
+            raise MorphemeServiceUnavailable("형태소 분석 서비스 응답 ID 불일치")
+        if 'error' in response:
+            raise MorphemeServiceUnavailable(f"형태소 분석 서비스 오류: {response['error']}")
+        return response.get('result')
+
+    def _stream(self):
+        stream = getattr(self._local, 'stream', None)
+        if stream is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+            self._local.stream = stream = sock.makefile('rwb')
+        return stream
+
+    def _close(self):
+        for name in ('stream', 'sock'):
+            resource = getattr(self._local, name, None)
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+                setattr(self._local, name, None)
+
+
+class RemoteTokenizer:
+    """ Okt와 같은 nouns/pos/morphs 인터페이스. 사이드카를 우선 사용하고 실패 시 프로세스 내 Okt 풀 사용 """
+
+    def __init__(self, client):
+        self.client = client
+
+    def nouns(self, phrase):
+        try:
+            return self.client.call('nouns', text=phrase)
+        except MorphemeServiceUnavailable as e:
+            logger.debug(f"nouns 로컬 처리: {e}")
+            return self._local_tokenizer().nouns(phrase)
+
+    def pos(self, phrase, norm=False, stem=False, join=False):
+        try:
+            tagged = [tuple(pair) for pair in self.client.call('pos', text=phrase, norm=norm, stem=stem)]
+        except MorphemeServiceUnavailable as e:
+            logger.debug(f"pos 로컬 처리: {e}")
+            return self._local_tokenizer().pos(phrase, norm=norm, stem=stem, join=join)
+        if join:
+            return [f"{word}/{tag}" for word, tag in tagged]
+        return tagged
+
+    def morphs(self, phrase, norm=False, stem=False):
+        return [word for word, _ in self.pos(phrase, norm=norm, stem=stem)]
+
+    def _local_tokenizer(self):
+        from .okt_pool import get_okt_pool
+        return get_okt_pool()
+
+
+class RemoteMorphemeAnalyzer:
+    """
+    MorphemeAnalyzer 프록시
+    - analyze, is_better_optimization과 목표 범위 속성은 사이드카에서 처리
+      (정상 동작 중에는 워커 프로세스에서 MorphemeAnalyzer/JVM을 만들지 않음)
+    - 사이드카 실패 시에만 프로세스 내 MorphemeAnalyzer를 처음 필요할 때 생성하여 사용
+    - 그 밖의 MorphemeAnalyzer 속성은 제공하지 않음 (AttributeError)
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self._described = None
+        self._local_analyzer = None
+        self._local_lock = threading.Lock()
+
+    def analyze(self, content, keyword, custom_morphemes=None):
+        try:
+            return self._client.call('analyze', content=content, keyword=keyword, custom_morphemes=custom_morphemes)
+        except MorphemeServiceUnavailable as e:
+            logger.debug(f"analyze 로컬 처리: {e}")
+            return self._local().analyze(content, keyword, custom_morphemes)
+
+    def is_better_optimization(self, candidate, best):
+        try:
+            return self._client.call('is_better_optimization', candidate=to_plain(candidate), best=to_plain(best))
+        except MorphemeServiceUnavailable as e:
+            logger.debug(f"is_better_optimization 로컬 처리: {e}")
+            return self._local().is_better_optimization(candidate, best)
+
+    def __getattr__(self, name):
+        if name not in DESCRIBED_ATTRIBUTES:
+            raise AttributeError(name)
+        if self._described is None:
+            try:
+                self._described = self._client.call('describe')
+            except MorphemeServiceUnavailable as e:
+                logger.debug(f"describe 로컬 처리: {e}")
+                return getattr(self._local(), name)
+        if name in self._described:
+            return self._described[name]
+        return getattr(self._local(), name)
+
+    def _local(self):
+        if self._local_analyzer is None:
+            with self._local_lock:
+                if self._local_analyzer is None:
+                    from .morpheme_analyzer import MorphemeAnalyzer
+                    self._local_analyzer = MorphemeAnalyzer()
+        return self._local_analyzer
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    global _client
+    socket_path = getattr(settings, 'MORPHEME_SERVICE_SOCKET', None)
+    if not socket_path:
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MorphemeServiceClient(socket_path, getattr(settings, 'MORPHEME_SERVICE_TIMEOUT', 10))
+    return _client
+
+
+def get_tokenizer():
+    """
+    사이드카 설정 시 RemoteTokenizer, 아니면 프로세스 공용 Okt 풀
+    (서비스 생성 시점에 호출되므로 프로세스당 한 번 여기서 워밍업하여 첫 토큰화의 JVM 기동/사전 로딩 지연을 없앰)
+    """
+    client = _get_client()
+    if client is None:
+        from .okt_pool import get_okt_pool, warm_up_okt_pool
+        if getattr(settings, 'OKT_POOL_WARM_UP', True):
+            return warm_up_okt_pool()
+        return get_okt_pool()
+    return RemoteTokenizer(client)
+
+
+def get_morpheme_analyzer():
+    """
+    사이드카 설정 시 RemoteMorphemeAnalyzer, 아니면 프로세스 내 MorphemeAnalyzer
+    (둘 다 같은 입력의 analyze 결과를 재사용하는 CachedMorphemeAnalyzer로 감쌈)
+    """
+    from .analysis_cache import CachedMorphemeAnalyzer
+    client = _get_client()
+    if client is None:
+        from .morpheme_analyzer import MorphemeAnalyzer
+        return CachedMorphemeAnalyzer(MorphemeAnalyzer())
+    return CachedMorphemeAnalyzer(RemoteMorphemeAnalyzer(client))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="형태소 분석 사이드카")
+    parser.add_argument('--socket', default=None, help="Unix 소켓 경로 (기본: settings.MORPHEME_SERVICE_SOCKET)")
+    parser.add_argument('--batch-window', type=float, default=None, help="요청을 모으는 시간 (초)")
+    parser.add_argument('--max-batch', type=int, default=64, help="한 번에 묶을 최대 요청 수")
+    args = parser.parse_args()
+
+    if os.environ.get('DJANGO_SETTINGS_MODULE'):
+        import django
+        django.setup()
+
+    from .okt_pool import warm_up_okt_pool
+    from .morpheme_analyzer import MorphemeAnalyzer
+
+    socket_path = args.socket or getattr(settings, 'MORPHEME_SERVICE_SOCKET', None)
+    if not socket_path:
+        parser.error("소켓 경로가 필요합니다 (--socket 또는 MORPHEME_SERVICE_SOCKET)")
+    batch_window = args.batch_window if args.batch_window is not None else getattr(settings, 'MORPHEME_SERVICE_BATCH_WINDOW', 0.005)
+
+    logging.basicConfig(level=logging.INFO)
+    server = MorphemeServiceServer(socket_path, warm_up_okt_pool(), MorphemeAnalyzer(), batch_window, args.max_batch)
+    logger.info(f"형태소 분석 서비스 시작: {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\okt_pool.py
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from konlpy.tag import Okt
+
+logger = logging.getLogger(__name__)
+
+WARM_UP_TEXT = "블로그 콘텐츠 최적화를 위한 형태소 분석기 준비 문장입니다."
+
+
+def _attach_thread_to_jvm():
+    """ konlpy가 띄운 JVM에 현재 스레드를 연결 (메인 스레드가 아닌 워커 스레드용) """
+    try:
+        import jpype
+        if jpype.isJVMStarted() and not jpype.isThreadAttachedToJVM():
+            jpype.attachThreadToJVM()
+    except Exception as e:
+        logger.debug(f"JVM 스레드 연결 생략: {e}")
+
+
+class OktPool:
+    """
+    프로세스 공용 Okt 인스턴스 풀
+    - JVM 기동과 사전 로딩은 프로세스당 한 번, 인스턴스는 최대 size개까지만 생성
+    - 스레드별로 인스턴스를 대여하므로 멀티스레드 서버에서도 안전하게 병렬 토큰화
+    - 같은 스레드 안에서의 중첩 대여는 이미 빌린 인스턴스를 재사용
+    - Okt와 같은 nouns/pos/morphs/phrases 메서드를 제공하여 기존 self.okt 자리에 그대로 사용
+    """
+
+    def __init__(self, size=2):
+        """
+        Args:
+            size (int): 풀에 둘 Okt 인스턴스 수
+        """
+        self.size = max(1, size)
+        self._available = queue.LifoQueue()
+        self._created = 0
+        self._create_lock = threading.Lock()
+        self._local = threading.local()
+        self.warmed_up = False
+
+    def warm_up(self):
+        """
+        풀의 모든 인스턴스를 미리 생성하고 토큰화를 한 번씩 수행 (워커 기동 시 호출)
+
+        Returns:
+            float: 워밍업 소요 시간 (초)
+        """
+        start_time = time.time()
+        instances = []
+        try:
+            for _ in range(self.size):
+                okt = self._acquire()
+                okt.pos(WARM_UP_TEXT)
+                instances.append(okt)
+        finally:
+            for okt in instances:
+                self._available.put(okt)
+        self.warmed_up = True
+        elapsed = time.time() - start_time
+        logger.info(f"Okt 풀 워밍업 완료: {self.size}개 인스턴스, {elapsed:.2f}초")
+        return elapsed
+
+    @contextmanager
+    def checkout(self):
+        """ 현재 스레드용 Okt 인스턴스를 대여 """
+        okt = getattr(self._local, 'okt', None)
+        if okt is not None:
+            self._local.depth += 1
+            try:
+                yield okt
+            finally:
+                self._local.depth -= 1
+            return
+
+        _attach_thread_to_jvm()
+        okt = self._acquire()
+        self._local.okt = okt
+        self._local.depth = 1
+        try:
+            yield okt
+        finally:
+            self._local.depth -= 1
+            self._local.okt = None
+            self._available.put(okt)
+
+    def nouns(self, phrase):
+        with self.checkout() as okt:
+            return okt.nouns(phrase)
+
+    def pos(self, phrase, norm=False, stem=False, join=False):
+        with self.checkout() as okt:
+            return okt.pos(phrase, norm=norm, stem=stem, join=join)
+
+    def morphs(self, phrase, norm=False, stem=False):
+        with self.checkout() as okt:
+            return okt.morphs(phrase, norm=norm, stem=stem)
+
+    def phrases(self, phrase):
+        with self.checkout() as okt:
+            return okt.phrases(phrase)
+
+    def _acquire(self):
+        try:
+            return self._available.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._create_lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return Okt()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        # 모든 인스턴스가 사용 중이면 반납될 때까지 대기
+        return self._available.get()
+
+
+_okt_pool = None
+_okt_pool_lock = threading.Lock()
+
+
+def get_okt_pool():
+    """
+    프로세스 공용 Okt 풀 반환
+    설정: OKT_POOL_SIZE (기본 2)
+    """
+    global _okt_pool
+    if _okt_pool is None:
+        with _okt_pool_lock:
+            if _okt_pool is None:
+                _okt_pool = OktPool(getattr(settings, 'OKT_POOL_SIZE', 2))
+    return _okt_pool
+
+
+_warm_up_attempted = False
+
+
+def warm_up_okt_pool():
+    """
+    워커 기동 시점에 호출하여 첫 요청의 JVM 기동/사전 로딩 지연을 제거
+    (get_tokenizer()가 프로세스 내 풀을 반환할 때 자동 호출, 사이드카는 main에서 호출)
+    프로세스당 한 번만 시도하며, 실패해도 풀은 요청 시 인스턴스를 생성하여 그대로 동작
+    """
+    global _warm_up_attempted
+    pool = get_okt_pool()
+    if _warm_up_attempted:
+        return pool
+    with _okt_pool_lock:
+        if not _warm_up_attempted:
+            _warm_up_attempted = True
+            try:
+                pool.warm_up()
+            except Exception as e:
+                logger.error(f"Okt 풀 워밍업 실패: {e}")
+    return pool
@@ -4,14 +4,34 @@ import json
 import logging
 import time
 import random
+import asyncio
 import traceback
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from django.conf import settings
-from konlpy.tag import Okt 
+from asgiref.sync import sync_to_async
 import google.generativeai as genai
-from content.models import BlogContent, MorphemeAnalysis
+from content.models import BlogContent
 from .formatter import ContentFormatter
 from .substitution_generator import SubstitutionGenerator
-from .morpheme_analyzer import MorphemeAnalyzer 
+from .incremental_analyzer import IncrementalMorphemeAnalyzer
+from .memo_cache import get_memo_cache
+from .morpheme_automaton import get_automaton
+from .document_model import ParsedDocument, split_references
+from .morpheme_service import get_tokenizer, get_morpheme_analyzer
+from .edit_planner import EditPlanner
+from .feasibility import analyze_feasibility, target_ranges
+from .count_matrix import SentenceCountMatrix
+from .template_registry import get_template_registry, select_for_count, select_for_chars, NEUTRAL_EXPANSION_PHRASES
+from .analysis_persistence import save_content_analysis
+from .compact_analysis import load_morpheme_analysis
+from .llm_clients import get_client_registry
+from .rate_limiter import get_rate_limiter
+from .llm_router import HedgedRouter, complete_text, acomplete_text
+from .model_tiers import TieredModelRouter, TierResponseRejected, tier_chain
+from .local_reducer import LocalSentenceReducer
+from .job_budget import JobBudget, BudgetExhausted, JOB_BUDGET_META_KEY, activate_budget, current_budget, budget_allows, begin_llm_call, record_llm_usage
+from .llm_streaming import StreamAborted, streaming_enabled, build_stream_guard, correction_note, hedge_stream_guard, stream_gemini_text, astream_gemini_text
 
 logger = logging.getLogger(__name__)
 
@@ -21,24 +41,38 @@ class ContentOptimizer:
     주요 기능: 글자수, 키워드 출현 횟수 확인 및 최적화
     """
 
-    def __init__(self):
-        self.google_api_key = settings.GOOGLE_API_KEY
-        genai.configure(api_key=self.google_api_key)
-        self.model = genai.GenerativeModel('gemini-2.5-pro')
-        self.okt = Okt() 
+    # 문장 축소 프롬프트를 수정하면 올려서 기존 캐시 결과를 무효화
+    SENTENCE_REDUCTION_PROMPT_VERSION = 'v1'
+
+    def __init__(self, client_registry=None):
+        """
+        Args:
+            client_registry (LLMClientRegistry): LLM 클라이언트 레지스트리 (None이면 프로세스 공용, 테스트 시 스텁 서버용 주입)
+        """
+        self.client_registry = client_registry or get_client_registry()
+        self.model_name = 'gemini-2.5-pro'
+        self.model = self.client_registry.gemini(self.model_name)
+        self.okt = get_tokenizer()
         self.substitution_generator = SubstitutionGenerator()
-        self.morpheme_analyzer = MorphemeAnalyzer()
+        self.morpheme_analyzer = get_morpheme_analyzer()
+        self.sentence_reduction_cache = get_memo_cache('sentence_reduction')
 
-    def optimize_existing_content_v3(self, content_id):
+    def optimize_existing_content_v3(self, content_id, budget=None):
         """
         기존 콘텐츠를 SEO 친화적으로 최적화
+        작업 예산(마감/LLM 호출 수/토큰 수)이 다하면 그때까지의 최선의 결과로 마무리하고 종료 사유를 메타데이터에 기록
 
         Args:
             content_id (int): BlogContent 모델의 ID
+            budget (JobBudget): 작업 예산 (None이면 LLM_JOB_BUDGETS['optimization'])
 
         Returns:
             dict: 최적화 결과
         """
+        with activate_budget(budget or JobBudget.for_job('optimization')):
+            return self._optimize_existing_content_v3(content_id)
+
+    def _optimize_existing_content_v3(self, content_id):
         try:
             blog_content = BlogContent.objects.get(id=content_id)
             original_content_text = blog_content.content # API 호출 전 원본 저장
@@ -48,112 +82,163 @@ class ContentOptimizer:
             logger.info(f"콘텐츠 SEO 최적화 시작 (V3): content_id={content_id}, 키워드={keyword}")
 
             api_optimized_content = None
-            best_api_analysis = self.morpheme_analyzer.analyze(original_content_text, keyword, custom_morphemes_for_analysis) # 초기 분석은 원본 기준
+            analysis_tracker = self._prepare_analysis_tracker(blog_content, original_content_text, keyword, custom_morphemes_for_analysis)
+            best_api_analysis = analysis_tracker.get_analysis() # 초기 분석은 원본 기준
 
-            api_attempts_count = 0
+            if getattr(settings, 'OPTIMIZER_PARALLEL_STRATEGIES', False):
+                api_optimized_content, best_api_analysis, api_attempts_count = self._run_api_strategies_parallel(
+                    original_content_text, keyword, custom_morphemes_for_analysis, analysis_tracker, best_api_analysis
+                )
+            else:
+                api_attempts_count = 0
+                stream_correction = None # 제약 초과로 중단된 직전 응답에 대한 교정 지시
 
-            for attempt in range(3): # Still keep a few API attempts for initial optimization
-                api_attempts_count = attempt + 1
-                try:
-                    content_for_api_prompt = api_optimized_content if api_optimized_content else original_content_text
-                    current_analysis_for_prompt = self.morpheme_analyzer.analyze(content_for_api_prompt, keyword, custom_morphemes_for_analysis)
-
-                    if attempt == 0:
-                        prompt = self._create_seo_optimization_prompt(content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
-                        temp = 0.7
-                    elif attempt == 1:
-                        prompt = self._create_seo_readability_prompt(content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
-                        temp = 0.5
-                    else:
-                        prompt = self._create_ultra_seo_prompt(content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
-                        temp = 0.3
-                    
-                    logger.info(f"API 최적화 시도 #{attempt+1}/3, temperature={temp}")
-
-                    response = self.model.generate_content(
-                        prompt,
-                        generation_config=genai.types.GenerationConfig(
-                            temperature=temp,
-                            max_output_tokens=4096
-                        )
-                    )
-                    
-                    current_api_output = response.text
-                    analysis_of_api_output = self.morpheme_analyzer.analyze(current_api_output, keyword, custom_morphemes_for_analysis)
-                    
-                    logger.info(f"API 시도 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
-                    
-                    if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
-                        api_optimized_content = current_api_output
-                        best_api_analysis = analysis_of_api_output
-                        logger.info(f"새로운 최상의 API 결과 발견: 글자수={best_api_analysis['char_count']}, 목표형태소 유효={best_api_analysis['is_valid_morphemes']}")
-                    
-                    if best_api_analysis['is_fully_optimized']:
-                        logger.info("API 최적화 성공: 모든 조건 충족")
+                for attempt in range(3): # Still keep a few API attempts for initial optimization
+                    if not budget_allows('api_optimization'):
                         break
-                        
-                except Exception as e:
-                    logger.error(f"API 최적화 시도 #{attempt+1} 오류: {str(e)}")
-                    logger.error(traceback.format_exc())
-                    time.sleep(5)
+                    api_attempts_count = attempt + 1
+                    try:
+                        content_for_api_prompt = api_optimized_content if api_optimized_content else original_content_text
+                        current_analysis_for_prompt = analysis_tracker.update(content_for_api_prompt)
+                        prompt, temp = self._build_api_prompt(attempt, content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
+                        if stream_correction:
+                            prompt += stream_correction
+                            stream_correction = None
 
-            content_to_force_optimize = api_optimized_content if api_optimized_content else original_content_text
-            
-            logger.info("SEO 강제 최적화 시작")
-            final_optimized_content = self.enforce_seo_optimization(content_to_force_optimize, keyword, custom_morphemes_for_analysis)
-            
-            final_analysis = self.morpheme_analyzer.analyze(final_optimized_content, keyword, custom_morphemes_for_analysis)
-            logger.info(f"최종 결과: 글자수={final_analysis['char_count']}, 목표형태소 유효={final_analysis['is_valid_morphemes']}")
-            
-            formatter = ContentFormatter()
-            mobile_formatted_content = formatter.format_for_mobile(final_optimized_content)
-            
-            blog_content.content = final_optimized_content
-            blog_content.mobile_formatted_content = mobile_formatted_content
-            blog_content.char_count = final_analysis['char_count']
-            blog_content.is_optimized = final_analysis['is_fully_optimized']
-            
-            meta_data = {
-                'original_char_count': len(original_content_text.replace(" ", "")),
-                'final_char_count': final_analysis['char_count'],
-                'is_valid_char_count': final_analysis['is_valid_char_count'],
-                'is_valid_morphemes': final_analysis['is_valid_morphemes'],
-                'optimization_date': time.strftime("%Y-%m-%d %H:%M:%S"),
-                'algorithm_version': 'v3_analyzer_focused_v3', # Updated version
-                'api_attempts': api_attempts_count 
-            }
-            blog_content.meta_data = meta_data
-            blog_content.save()
-            
-            blog_content.morpheme_analyses.all().delete()
-            
-            if 'morpheme_analysis' in final_analysis and 'counts' in final_analysis['morpheme_analysis']:
-                for morpheme, info in final_analysis['morpheme_analysis']['counts'].items():
-                    MorphemeAnalysis.objects.create(
-                        content=blog_content,
-                        morpheme=morpheme,
-                        count=info.get('count', 0),
-                        is_valid=info.get('is_valid', False),
-                        morpheme_type=info.get('type', 'unknown')
-                    )
-            
-            success_message = "콘텐츠가 성공적으로 SEO 최적화되었습니다."
-            if not final_analysis['is_fully_optimized']:
-                success_message += " (일부 조건 미달성)"
-            
-            logger.info(f"콘텐츠 SEO 최적화 완료: ID={content_id}, 글자수={final_analysis['char_count']}, 모든 목표형태소 유효={final_analysis['is_valid_morphemes']}")
+                        logger.info(f"API 최적화 시도 #{attempt+1}/3, temperature={temp}")
+
+                        current_api_output = self._call_optimization_api(prompt, temp, analysis_tracker.automaton)
+                        analysis_of_api_output = analysis_tracker.update(current_api_output)
+
+                        logger.info(f"API 시도 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
+
+                        if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
+                            api_optimized_content = current_api_output
+                            best_api_analysis = analysis_of_api_output
+                            logger.info(f"새로운 최상의 API 결과 발견: 글자수={best_api_analysis['char_count']}, 목표형태소 유효={best_api_analysis['is_valid_morphemes']}")
+
+                        if analysis_tracker.meets_targets(best_api_analysis):
+                            logger.info("API 최적화 성공: 모든 조건 충족")
+                            break
+
+                    except StreamAborted as e:
+                        # 끝까지 받아도 버릴 응답이므로 기다리지 않고 교정 지시와 함께 다음 시도로 넘어감
+                        logger.warning(f"API 최적화 시도 #{attempt+1} 응답 중단: {e.reason}")
+                        stream_correction = correction_note(e.reason, self.morpheme_analyzer)
+
+                    except BudgetExhausted as e:
+                        # 지금까지의 최선의 API 결과(best_api_analysis)로 마무리
+                        logger.warning(f"API 최적화 시도 #{attempt+1} 중단: {e}")
+                        break
+
+                    except Exception as e:
+                        logger.error(f"API 최적화 시도 #{attempt+1} 오류: {str(e)}")
+                        logger.error(traceback.format_exc())
+                        time.sleep(5)
+
+            return self._finalize_optimization(
+                blog_content, original_content_text, api_optimized_content,
+                keyword, custom_morphemes_for_analysis, analysis_tracker, api_attempts_count
+            )
                 
+        except BlogContent.DoesNotExist:
+            logger.error(f"ID {content_id}에 해당하는 콘텐츠를 찾을 수 없습니다.")
             return {
-                'success': True,
-                'message': success_message,
-                'content_id': content_id,
-                'is_valid_char_count': final_analysis['is_valid_char_count'],
-                'is_valid_morphemes': final_analysis['is_valid_morphemes'],
-                'char_count': final_analysis['char_count'],
-                'attempts': api_attempts_count,
-                'algorithm_version': 'v3_analyzer_focused_v3'
+                'success': False,
+                'message': f"ID {content_id}에 해당하는 콘텐츠를 찾을 수 없습니다.",
+                'content_id': content_id
             }
-                
+        except Exception as e:
+            logger.error(f"콘텐츠 최적화 중 오류 발생: {str(e)}")
+            logger.error(traceback.format_exc())
+            return {
+                'success': False,
+                'message': f"콘텐츠 최적화 중 오류 발생: {str(e)}",
+                'content_id': content_id
+            }
+
+    async def aoptimize_existing_content(self, content_id, budget=None):
+        """
+        optimize_existing_content_v3의 비동기 버전
+        - Gemini 호출은 generate_content_async, 재시도 대기는 asyncio.sleep, 콘텐츠 조회는 Django 비동기 ORM 사용
+        - 형태소 분석/강제 최적화/저장은 sync_to_async로 한 스레드에서 실행 (Okt/트랜잭션을 스레드 간에 공유하지 않음)
+        - API 응답을 기다리는 동안 같은 워커가 다른 작업을 진행할 수 있음
+
+        Args/Returns: optimize_existing_content_v3와 동일
+        """
+        with activate_budget(budget or JobBudget.for_job('optimization')):
+            return await self._aoptimize_existing_content(content_id)
+
+    async def _aoptimize_existing_content(self, content_id):
+        try:
+            blog_content = await BlogContent.objects.select_related('keyword').aget(id=content_id)
+            original_content_text = blog_content.content
+            keyword = blog_content.keyword.keyword
+            custom_morphemes_for_analysis = None
+
+            logger.info(f"콘텐츠 SEO 비동기 최적화 시작: content_id={content_id}, 키워드={keyword}")
+
+            api_optimized_content = None
+            analysis_tracker = await sync_to_async(self._prepare_analysis_tracker)(
+                blog_content, original_content_text, keyword, custom_morphemes_for_analysis
+            )
+            update_analysis = sync_to_async(analysis_tracker.update)
+            best_api_analysis = analysis_tracker.get_analysis()
+
+            if getattr(settings, 'OPTIMIZER_PARALLEL_STRATEGIES', False):
+                api_optimized_content, best_api_analysis, api_attempts_count = await self._arun_api_strategies_parallel(
+                    original_content_text, keyword, custom_morphemes_for_analysis, analysis_tracker, best_api_analysis
+                )
+            else:
+                api_attempts_count = 0
+                stream_correction = None
+
+                for attempt in range(3):
+                    if not budget_allows('api_optimization'):
+                        break
+                    api_attempts_count = attempt + 1
+                    try:
+                        content_for_api_prompt = api_optimized_content if api_optimized_content else original_content_text
+                        current_analysis_for_prompt = await update_analysis(content_for_api_prompt)
+                        prompt, temp = self._build_api_prompt(attempt, content_for_api_prompt, keyword, custom_morphemes_for_analysis, current_analysis_for_prompt)
+                        if stream_correction:
+                            prompt += stream_correction
+                            stream_correction = None
+
+                        logger.info(f"API 비동기 최적화 시도 #{attempt+1}/3, temperature={temp}")
+
+                        current_api_output = await self._acall_optimization_api(prompt, temp, analysis_tracker.automaton)
+                        analysis_of_api_output = await update_analysis(current_api_output)
+
+                        logger.info(f"API 시도 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
+
+                        if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
+                            api_optimized_content = current_api_output
+                            best_api_analysis = analysis_of_api_output
+
+                        if analysis_tracker.meets_targets(best_api_analysis):
+                            logger.info("API 최적화 성공: 모든 조건 충족")
+                            break
+
+                    except StreamAborted as e:
+                        logger.warning(f"API 최적화 시도 #{attempt+1} 응답 중단: {e.reason}")
+                        stream_correction = correction_note(e.reason, self.morpheme_analyzer)
+
+                    except BudgetExhausted as e:
+                        # 지금까지의 최선의 API 결과(best_api_analysis)로 마무리
+                        logger.warning(f"API 최적화 시도 #{attempt+1} 중단: {e}")
+                        break
+
+                    except Exception as e:
+                        logger.error(f"API 최적화 시도 #{attempt+1} 오류: {str(e)}")
+                        logger.error(traceback.format_exc())
+                        await asyncio.sleep(5)
+
+            return await sync_to_async(self._finalize_optimization)(
+                blog_content, original_content_text, api_optimized_content,
+                keyword, custom_morphemes_for_analysis, analysis_tracker, api_attempts_count
+            )
+
         except BlogContent.DoesNotExist:
             logger.error(f"ID {content_id}에 해당하는 콘텐츠를 찾을 수 없습니다.")
             return {
@@ -170,6 +255,265 @@ class ContentOptimizer:
                 'content_id': content_id
             }
 
+    def _prepare_analysis_tracker(self, blog_content, original_content, keyword, custom_morphemes):
+        """ 저장된 분석 결과를 캐시에 채운 뒤 원본 기준 분석 추적기 생성 """
+        # 저장 시 함께 보관한 분석 결과가 있으면 같은 텍스트(전체 또는 참고자료를 뺀 본문)를 다시 형태소 분석하지 않음
+        content_without_refs = self.separate_content_and_refs(original_content)['content_without_refs']
+        for text in dict.fromkeys((original_content, content_without_refs)):
+            if self.morpheme_analyzer.load_persisted(blog_content.meta_data, text, keyword, custom_morphemes):
+                logger.info("저장된 형태소 분석 결과 재사용")
+        # 원본 -> API 결과 -> 최종본 순으로 변경된 문단만 다시 분석
+        return self._create_analysis_tracker(original_content, keyword, custom_morphemes)
+
+    def _finalize_optimization(self, blog_content, original_content_text, api_optimized_content, keyword, custom_morphemes_for_analysis, analysis_tracker, api_attempts_count):
+        """
+        API 결과(없으면 원본)를 강제 최적화하여 저장하고 결과 dict 반환
+        """
+        budget = current_budget()
+        content_to_force_optimize = api_optimized_content if api_optimized_content else original_content_text
+        
+        logger.info("SEO 강제 최적화 시작")
+        final_optimized_content = self.enforce_seo_optimization(content_to_force_optimize, keyword, custom_morphemes_for_analysis)
+        
+        final_analysis = analysis_tracker.update(final_optimized_content)
+        logger.info(f"최종 결과: 글자수={final_analysis['char_count']}, 목표형태소 유효={final_analysis['is_valid_morphemes']}")
+        
+        formatter = ContentFormatter()
+        mobile_formatted_content = formatter.format_for_mobile(final_optimized_content)
+        
+        blog_content.content = final_optimized_content
+        blog_content.mobile_formatted_content = mobile_formatted_content
+        blog_content.char_count = final_analysis['char_count']
+        blog_content.is_optimized = final_analysis['is_fully_optimized']
+        
+        meta_data = {
+            'original_char_count': len(original_content_text.replace(" ", "")),
+            'final_char_count': final_analysis['char_count'],
+            'is_valid_char_count': final_analysis['is_valid_char_count'],
+            'is_valid_morphemes': final_analysis['is_valid_morphemes'],
+            'optimization_date': time.strftime("%Y-%m-%d %H:%M:%S"),
+            'algorithm_version': 'v3_analyzer_focused_v3', # Updated version
+            'api_attempts': api_attempts_count,
+            'target_feasibility': analysis_tracker.feasibility.summary() if analysis_tracker.feasibility else None,
+            JOB_BUDGET_META_KEY: budget.summary() if budget else None
+        }
+        blog_content.meta_data = meta_data
+        # 콘텐츠 저장과 형태소 분석 행 갱신(변경분만)을 한 트랜잭션으로 처리
+        save_content_analysis(
+            blog_content,
+            final_analysis,
+            update_fields=['content', 'mobile_formatted_content', 'char_count', 'is_optimized', 'meta_data']
+        )
+        
+        success_message = "콘텐츠가 성공적으로 SEO 최적화되었습니다."
+        if not final_analysis['is_fully_optimized']:
+            success_message += " (일부 조건 미달성)"
+        if budget and budget.stopped_by:
+            success_message += f" (작업 예산 소진: {budget.stopped_by})"
+        
+        logger.info(f"콘텐츠 SEO 최적화 완료: ID={blog_content.id}, 글자수={final_analysis['char_count']}, 모든 목표형태소 유효={final_analysis['is_valid_morphemes']}")
+            
+        return {
+            'success': True,
+            'message': success_message,
+            'content_id': blog_content.id,
+            'is_valid_char_count': final_analysis['is_valid_char_count'],
+            'is_valid_morphemes': final_analysis['is_valid_morphemes'],
+            'char_count': final_analysis['char_count'],
+            'attempts': api_attempts_count,
+            'algorithm_version': 'v3_analyzer_focused_v3',
+            'budget_stopped_by': budget.stopped_by if budget else None,
+            # 대시보드/이력 화면과 같은 저장 형식의 형태소별 결과 (압축 레코드면 행 조회 없음)
+            'morpheme_analysis': load_morpheme_analysis(blog_content)
+        }
+
+    def _build_api_prompt(self, attempt, content, keyword, custom_morphemes, current_analysis):
+        """ 시도 순서별 프롬프트 전략과 temperature (0: SEO 0.7, 1: 가독성 0.5, 2: 초강력 SEO 0.3) """
+        if attempt == 0:
+            return self._create_seo_optimization_prompt(content, keyword, custom_morphemes, current_analysis), 0.7
+        if attempt == 1:
+            return self._create_seo_readability_prompt(content, keyword, custom_morphemes, current_analysis), 0.5
+        return self._create_ultra_seo_prompt(content, keyword, custom_morphemes, current_analysis), 0.3
+
+    def _call_optimization_api(self, prompt, temperature, automaton=None):
+        """
+        Gemini 최적화 호출
+        LLM_STREAMING_GUARD 설정 시 스트리밍으로 받으며 글자수/형태소 한도를 넘으면 StreamAborted 발생
+        LLM_HEDGE_ALTERNATES['optimization'] 설정 시 응답이 늦거나 실패하면 대체 제공자로 헤지/장애 조치
+        """
+        router = HedgedRouter('optimization', ('gemini', self.model_name))
+        return router.call(
+            lambda provider, model: self._call_optimization_route(provider, model, prompt, temperature, automaton),
+            validate=bool
+        )
+
+    async def _acall_optimization_api(self, prompt, temperature, automaton=None):
+        """ _call_optimization_api의 비동기 버전 (generate_content_async, 늦은 쪽 요청은 취소) """
+        router = HedgedRouter('optimization', ('gemini', self.model_name))
+        return await router.acall(
+            lambda provider, model: self._acall_optimization_route(provider, model, prompt, temperature, automaton),
+            validate=bool
+        )
+
+    def _call_optimization_route(self, provider, model, prompt, temperature, automaton):
+        """ 기본 경로(Gemini)는 스트리밍 검사를 포함하여 호출, 대체 경로는 단순 호출 """
+        if (provider, model) != ('gemini', self.model_name):
+            return complete_text(self.client_registry, provider, model, prompt, temperature, 4096)
+
+        generation_config = genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=4096
+        )
+        begin_llm_call('optimization')
+        guard = build_stream_guard(self.morpheme_analyzer, automaton) if streaming_enabled() else hedge_stream_guard()
+        response = None
+        with get_rate_limiter().slot('gemini', self.model_name):
+            if guard is not None:
+                text = stream_gemini_text(self.model, prompt, generation_config, guard, self.client_registry.gemini_request_options())
+            else:
+                response = self.model.generate_content(prompt, generation_config=generation_config, request_options=self.client_registry.gemini_request_options())
+                text = response.text
+        record_llm_usage(prompt, text, response)
+        return text
+
+    async def _acall_optimization_route(self, provider, model, prompt, temperature, automaton):
+        if (provider, model) != ('gemini', self.model_name):
+            return await acomplete_text(self.client_registry, provider, model, prompt, temperature, 4096)
+
+        generation_config = genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=4096
+        )
+        begin_llm_call('optimization')
+        response = None
+        async with get_rate_limiter().aslot('gemini', self.model_name):
+            if streaming_enabled():
+                guard = build_stream_guard(self.morpheme_analyzer, automaton)
+                text = await astream_gemini_text(self.model, prompt, generation_config, guard, self.client_registry.gemini_request_options())
+            else:
+                response = await self.model.generate_content_async(prompt, generation_config=generation_config, request_options=self.client_registry.gemini_request_options())
+                text = response.text
+        record_llm_usage(prompt, text, response)
+        return text
+
+    def _run_api_strategies_parallel(self, original_content, keyword, custom_morphemes, analysis_tracker, best_api_analysis):
+        """
+        세 가지 프롬프트 전략을 동시에 호출하고 도착하는 순서대로 평가합니다.
+        모든 조건을 충족하는 결과가 나오면 나머지 결과는 기다리지 않습니다.
+        (순차 모드와 달리 모든 전략이 원본을 기준으로 프롬프트를 만듭니다.)
+
+        설정:
+            OPTIMIZER_STRATEGY_CONCURRENCY: 동시에 호출할 전략 수 (기본 3)
+
+        Returns:
+            tuple: (최상의 API 결과 또는 None, 그 분석 결과, 응답을 받은 전략 수)
+        """
+        initial_analysis = analysis_tracker.update(original_content)
+        strategies = [
+            self._build_api_prompt(attempt, original_content, keyword, custom_morphemes, initial_analysis)
+            for attempt in range(3)
+        ]
+        max_workers = max(1, min(getattr(settings, 'OPTIMIZER_STRATEGY_CONCURRENCY', 3), len(strategies)))
+        logger.info(f"API 최적화 전략 {len(strategies)}개 동시 호출 (동시 실행 {max_workers}개)")
+
+        best_content = None
+        completed = 0
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='seo-strategy')
+        try:
+            # 전략 스레드에도 작업 예산 컨텍스트를 전달
+            futures = {
+                executor.submit(contextvars.copy_context().run, self._call_optimization_api, prompt, temp, analysis_tracker.automaton): (attempt, temp)
+                for attempt, (prompt, temp) in enumerate(strategies)
+            }
+            for future in as_completed(futures):
+                attempt, temp = futures[future]
+                try:
+                    api_output = future.result()
+                except StreamAborted as e:
+                    logger.warning(f"API 최적화 전략 #{attempt+1} 응답 중단: {e.reason}")
+                    continue
+                except BudgetExhausted as e:
+                    logger.warning(f"API 최적화 전략 #{attempt+1} 중단: {e}")
+                    continue
+                except Exception as e:
+                    logger.error(f"API 최적화 전략 #{attempt+1} (temperature={temp}) 오류: {str(e)}")
+                    continue
+
+                completed += 1
+                # 분석은 호출한 스레드에서만 수행 (분석기 상태를 스레드 간에 공유하지 않음)
+                analysis_of_api_output = analysis_tracker.update(api_output)
+                logger.info(f"API 전략 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
+
+                if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
+                    best_content = api_output
+                    best_api_analysis = analysis_of_api_output
+                    logger.info(f"새로운 최상의 API 결과 발견: 글자수={best_api_analysis['char_count']}, 목표형태소 유효={best_api_analysis['is_valid_morphemes']}")
+
+                if analysis_tracker.meets_targets(best_api_analysis):
+                    logger.info("API 최적화 성공: 모든 조건 충족, 나머지 전략 취소")
+                    break
+        finally:
+            # 아직 시작하지 않은 호출은 취소하고, 진행 중인 호출은 기다리지 않음
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return best_content, best_api_analysis, completed
+
+    async def _arun_api_strategies_parallel(self, original_content, keyword, custom_morphemes, analysis_tracker, best_api_analysis):
+        """
+        _run_api_strategies_parallel의 비동기 버전 (스레드 대신 태스크로 동시 호출)
+        모든 조건을 충족하는 결과가 나오면 남은 호출 태스크를 취소합니다.
+
+        Returns:
+            tuple: (최상의 API 결과 또는 None, 그 분석 결과, 응답을 받은 전략 수)
+        """
+        update_analysis = sync_to_async(analysis_tracker.update)
+        initial_analysis = await update_analysis(original_content)
+        strategies = [
+            self._build_api_prompt(attempt, original_content, keyword, custom_morphemes, initial_analysis)
+            for attempt in range(3)
+        ]
+        max_workers = max(1, min(getattr(settings, 'OPTIMIZER_STRATEGY_CONCURRENCY', 3), len(strategies)))
+        logger.info(f"API 최적화 전략 {len(strategies)}개 비동기 동시 호출 (동시 실행 {max_workers}개)")
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call_strategy(attempt, prompt, temp):
+            async with semaphore:
+                try:
+                    return attempt, await self._acall_optimization_api(prompt, temp, analysis_tracker.automaton)
+                except StreamAborted as e:
+                    logger.warning(f"API 최적화 전략 #{attempt+1} 응답 중단: {e.reason}")
+                except BudgetExhausted as e:
+                    logger.warning(f"API 최적화 전략 #{attempt+1} 중단: {e}")
+                except Exception as e:
+                    logger.error(f"API 최적화 전략 #{attempt+1} (temperature={temp}) 오류: {str(e)}")
+                return attempt, None
+
+        best_content = None
+        completed = 0
+        tasks = [asyncio.ensure_future(call_strategy(attempt, prompt, temp)) for attempt, (prompt, temp) in enumerate(strategies)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                attempt, api_output = await next_done
+                if api_output is None:
+                    continue
+
+                completed += 1
+                analysis_of_api_output = await update_analysis(api_output)
+                logger.info(f"API 전략 #{attempt+1} 결과: 글자수={analysis_of_api_output['char_count']}, 목표형태소 유효={analysis_of_api_output['is_valid_morphemes']}")
+
+                if self.morpheme_analyzer.is_better_optimization(analysis_of_api_output, best_api_analysis):
+                    best_content = api_output
+                    best_api_analysis = analysis_of_api_output
+
+                if analysis_tracker.meets_targets(best_api_analysis):
+                    logger.info("API 최적화 성공: 모든 조건 충족, 나머지 전략 취소")
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        return best_content, best_api_analysis, completed
+
     def enforce_seo_optimization(self, content, keyword, custom_morphemes=None):
         """
         SEO 최적화를 위한 강제 변환 (MorphemeAnalyzer 사용)
@@ -186,10 +530,11 @@ class ContentOptimizer:
         content_without_refs = content_parts['content_without_refs']
         refs_section = content_parts['refs_section']
 
-        initial_analysis = self.morpheme_analyzer.analyze(content_without_refs, keyword, custom_morphemes)
+        analysis_tracker = self._create_analysis_tracker(content_without_refs, keyword, custom_morphemes)
+        initial_analysis = analysis_tracker.get_analysis()
         logger.info(f"SEO 강제 최적화 시작: 글자수={initial_analysis['char_count']} (유효: {initial_analysis['is_valid_char_count']}), 목표형태소 유효={initial_analysis['is_valid_morphemes']}")
 
-        if initial_analysis['is_fully_optimized']:
+        if analysis_tracker.meets_targets(initial_analysis):
             logger.info("이미 SEO 최적화된 상태입니다.")
             if refs_section and "## 참고자료" not in content_without_refs:
                  return content_without_refs + "\n\n" + refs_section
@@ -199,25 +544,32 @@ class ContentOptimizer:
         optimized_content = self._improve_content_structure(optimized_content, keyword)
         optimized_content = self._optimize_headings(optimized_content, keyword)
 
+        # 글자수와 형태소 조건을 함께 만족하는 편집 계획을 먼저 적용하고, 남은 위반만 반복 조정
+        optimized_content = self._apply_edit_plan(optimized_content, analysis_tracker)
+
         attempt = 0
         previous_content = ""
         max_safety_attempts = 100 # Safety break for infinite loop
 
         while attempt < max_safety_attempts:
+            # LLM 호출 수/토큰 한도는 형태소 감소 단계에서 확인하고, 여기서는 마감만 확인 (로컬 조정은 계속 가능)
+            if not budget_allows('seo_enforcement', needs_llm=False):
+                break
             if optimized_content == previous_content:
                 logger.warning("최적화 과정이 고착 상태에 빠졌습니다. 루프를 중단합니다.")
                 break
             previous_content = optimized_content
 
-            current_analysis = self.morpheme_analyzer.analyze(optimized_content, keyword, custom_morphemes)
+            current_analysis = analysis_tracker.update(optimized_content)
             logger.info(f"강제 최적화 시도 #{attempt+1}: 글자수={current_analysis['char_count']} (유효: {current_analysis['is_valid_char_count']}), 목표형태소 유효={current_analysis['is_valid_morphemes']}")
 
-            if current_analysis['is_fully_optimized']:
+            # 요청 범위가 충돌하면 조정된 범위를 목표로 진행 (저장되는 유효성은 요청 범위 기준)
+            if analysis_tracker.meets_targets(current_analysis):
                 logger.info("강제 최적화 성공: 모든 조건 충족")
                 break
 
             needs_char_adjustment = not current_analysis['is_valid_char_count']
-            needs_morpheme_adjustment = not current_analysis['is_valid_morphemes'] 
+            needs_morpheme_adjustment = not analysis_tracker.morphemes_within_ranges(current_analysis)
 
             # 형태소 조정이 우선순위가 높음
             if needs_morpheme_adjustment:
@@ -227,7 +579,8 @@ class ContentOptimizer:
                     keyword, 
                     custom_morphemes,
                     current_analysis['morpheme_analysis']['counts'],
-                    current_analysis['morpheme_analysis']['target_morphemes']
+                    current_analysis['morpheme_analysis']['target_morphemes'],
+                    target_ranges=analysis_tracker.ranges
                 )
             elif needs_char_adjustment:
                 logger.info("조정: 글자수")
@@ -244,7 +597,7 @@ class ContentOptimizer:
         
         # 👇 [개선] 최종적으로 20회를 초과하는 형태소가 없도록 강제 조정
         logger.info("최종 검증: 20회 초과 형태소 강제 조정 시작")
-        optimized_content = self._enforce_absolute_max_count(optimized_content, keyword, custom_morphemes, max_count=20)
+        optimized_content = self._enforce_absolute_max_count(optimized_content, keyword, custom_morphemes, max_count=20, analysis_tracker=analysis_tracker)
             
         optimized_content = self._optimize_paragraph_breaks(optimized_content)
 
@@ -252,18 +605,87 @@ class ContentOptimizer:
             optimized_content = optimized_content + "\n\n" + refs_section
         return optimized_content
 
-    def _enforce_absolute_max_count(self, content, keyword, custom_morphemes, max_count):
+    def _create_analysis_tracker(self, content, keyword, custom_morphemes):
+        """
+        증분 분석기를 만들고, 목표 형태소의 포함 관계로 동시에 달성할 수 없는 범위가 있으면
+        가장 가까운 달성 가능 범위로 조정하여 이후 최적화 조정에 사용합니다.
+        (저장/보고되는 유효성은 요청된 범위 기준)
+
+        Returns:
+            IncrementalMorphemeAnalyzer: content로 분석이 끝난 분석기 (ranges 설정됨)
+        """
+        analysis_tracker = IncrementalMorphemeAnalyzer(self.morpheme_analyzer, keyword, custom_morphemes)
+        analysis_tracker.update(content)
+        feasibility = analyze_feasibility(
+            analysis_tracker.automaton,
+            target_ranges(self.morpheme_analyzer, analysis_tracker.morpheme_types),
+            (self.morpheme_analyzer.target_min_chars, self.morpheme_analyzer.target_max_chars)
+        )
+        if not feasibility.feasible:
+            logger.warning(f"요청된 목표 범위를 동시에 만족할 수 없어 조정된 범위로 최적화합니다: {feasibility.ranges}")
+        analysis_tracker.set_feasibility(feasibility)
+        return analysis_tracker
+
+    def _apply_edit_plan(self, content, analysis_tracker):
+        """
+        문장 삭제/축약/대체/템플릿 삽입 후보 중에서 글자수와 모든 목표 형태소 범위를
+        동시에 만족하는 편집 계획을 세워 한 번에 적용합니다.
+
+        Args:
+            content (str): 참고자료를 제외한 콘텐츠
+            analysis_tracker (IncrementalMorphemeAnalyzer): 목표 형태소/오토마톤을 제공하는 분석기
+
+        Returns:
+            str: 계획을 적용한 콘텐츠 (조건을 모두 만족하지 못해도 위반량이 줄어든 상태)
+        """
+        analysis_tracker.update(content)
+        ma = self.morpheme_analyzer
+        ranges = analysis_tracker.ranges or target_ranges(ma, analysis_tracker.morpheme_types)
+
+        planner = EditPlanner(
+            analysis_tracker.automaton,
+            ranges,
+            (ma.target_min_chars, ma.target_max_chars),
+            substitutions=self._get_enhanced_substitutions,
+            template_registry=get_template_registry(analysis_tracker.target_morphemes['base'], analysis_tracker.target_morphemes['compound'])
+        )
+        document = ParsedDocument.parse(content)
+        plan = planner.plan(document)
+        if plan.feasible:
+            logger.info(f"편집 계획으로 모든 조건 충족 가능: 편집 {len(plan.edits)}개")
+        else:
+            logger.warning(f"편집 계획으로 만족할 수 없는 조건: {', '.join(plan.violations)}")
+
+        if not plan.edits:
+            return content
+        planner.apply(document, plan)
+        return document.serialize()
+
+    def _enforce_absolute_max_count(self, content, keyword, custom_morphemes, max_count, analysis_tracker=None):
         """
         모든 목표 형태소가 지정된 최대 횟수(max_count)를 넘지 않도록 강제로 조정합니다.
+        analysis_tracker가 주어지면 변경된 문단만 다시 분석합니다.
         """
+        if analysis_tracker is None:
+            analysis_tracker = IncrementalMorphemeAnalyzer(self.morpheme_analyzer, keyword, custom_morphemes)
+
         safety_break = 0
         while safety_break < 20: # 무한 루프 방지
-            analysis = self.morpheme_analyzer.analyze(content, keyword, custom_morphemes)
+            if not budget_allows('max_count_enforcement', needs_llm=False):
+                logger.warning(f"최종 검증 중단: 작업 마감 시각 초과 ({safety_break}회 조정 후)")
+                return content
+            analysis = analysis_tracker.update(content)
             morphemes_over_limit = []
 
             for morpheme, info in analysis['morpheme_analysis']['counts'].items():
-                if info['count'] > max_count:
-                    morphemes_over_limit.append((morpheme, info['count']))
+                if info['count'] <= max_count:
+                    continue
+                # 포함하는 복합 키워드의 최소 출현만으로 max_count를 넘는 형태소는 줄일 수 없음
+                if analysis_tracker.ranges.get(morpheme, (0, 0))[0] > max_count:
+                    if safety_break == 0:
+                        logger.warning(f"최종 검증: 형태소 '{morpheme}'는 다른 목표와 충돌하여 {max_count}회 이하로 줄일 수 없습니다. 건너뜁니다.")
+                    continue
+                morphemes_over_limit.append((morpheme, info['count']))
             
             if not morphemes_over_limit:
                 logger.info(f"최종 검증 완료: 모든 목표 형태소가 {max_count}회 이하입니다.")
@@ -330,7 +752,7 @@ class ContentOptimizer:
             elif current_count < target_min:
                 shortage = target_min - current_count
                 logger.warning(f"핵심 기본 형태소 '{morpheme}' 부족: {current_count}회 -> {target_min}회로 늘림 (추가량: {shortage}회)")
-                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage)
+                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage, target_morphemes_dict)
 
         # Adjust compound morphemes next
         for morpheme in compound_morphemes:
@@ -352,7 +774,7 @@ class ContentOptimizer:
             elif current_count < target_min:
                 shortage = target_min - current_count
                 logger.warning(f"복합 키워드/구문 '{morpheme}' 부족: {current_count}회 -> {target_min}회로 늘림 (추가량: {shortage}회)")
-                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage)
+                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage, target_morphemes_dict)
         
         # Final verification log
         final_analysis_after_extreme = self.morpheme_analyzer.analyze(adjusted_content, keyword, custom_morphemes)
@@ -372,25 +794,24 @@ class ContentOptimizer:
                 logger.warning(f"- '{morpheme}' ({info.get('type')}): {count}회 ({status})")
         return adjusted_content
     
-    def _add_morpheme_strategically(self, content, morpheme, count_to_add):
+    def _add_morpheme_strategically(self, content, morpheme, count_to_add, target_morphemes_dict=None):
         logger.info(f"형태소 '{morpheme}' {count_to_add}회 전략적으로 추가")
-        paragraphs = content.split("\n\n")
-        normal_paragraphs_indices = [i for i, p in enumerate(paragraphs)
-                                     if not p.strip().startswith(('#', '##', '###')) and len(p.strip()) > 50]
+        if target_morphemes_dict:
+            registry = get_template_registry(target_morphemes_dict['base'], target_morphemes_dict['compound'])
+        else:
+            # 유형을 모르면 더 엄격한 복합 키워드 기준으로 기여도를 계산 (기본 형태소로도 그대로 셈)
+            registry = get_template_registry([], [morpheme])
+        document = ParsedDocument.parse(content)
+        normal_paragraphs_indices = document.content_block_indices(min_length=50)
 
         if not normal_paragraphs_indices:
             logger.warning(f"'{morpheme}' 추가할 적절한 긴 문단 없음. 마지막 문단에 추가 시도.")
-            if paragraphs:
-                idx_to_add = len(paragraphs) -1
+            last_block = document.blocks[-1]
+            if len(last_block.text) < 50 :
+                 last_block.set_text(last_block.text + self._generate_sentences_with_morpheme(morpheme, count_to_add, registry))
             else:
-                paragraphs.append("")
-                idx_to_add = 0
-            
-            if len(paragraphs[idx_to_add]) < 50 :
-                 paragraphs[idx_to_add] += self._generate_sentences_with_morpheme(morpheme, count_to_add)
-            else:
-                 paragraphs[idx_to_add] = self._inject_morpheme_into_paragraph(paragraphs[idx_to_add], morpheme, count_to_add)
-            return "\n\n".join(paragraphs)
+                 self._inject_morpheme_into_paragraph(last_block, morpheme, count_to_add, registry)
+            return document.serialize()
 
         add_counts_per_paragraph = {idx: 0 for idx in normal_paragraphs_indices}
         for i in range(count_to_add):
@@ -399,50 +820,57 @@ class ContentOptimizer:
             
         for idx, num_to_add_in_para in add_counts_per_paragraph.items():
             if num_to_add_in_para > 0:
-                paragraphs[idx] = self._inject_morpheme_into_paragraph(paragraphs[idx], morpheme, num_to_add_in_para)
+                self._inject_morpheme_into_paragraph(document.blocks[idx], morpheme, num_to_add_in_para, registry)
         
-        return "\n\n".join(paragraphs)
-
-    def _generate_sentences_with_morpheme(self, morpheme, count):
-        """ 형태소가 포함된 문장 생성 (간단 버전) """
-        sentences = []
-        templates = [
-            f"또한, {morpheme}의 중요성을 간과해서는 안 됩니다.",
-            f"이러한 맥락에서 {morpheme}은 핵심적인 역할을 합니다.",
-            f"결과적으로 {morpheme}의 활용이 중요합니다.",
-            f"많은 전문가들이 {morpheme}의 가치를 강조합니다.",
-            f"특히 {morpheme}에 대한 이해가 필요합니다."
-        ]
-        for _ in range(count):
-            sentences.append(random.choice(templates))
-        return " ".join(sentences)
-
-    def _inject_morpheme_into_paragraph(self, paragraph, morpheme, count_to_add):
-        """ 기존 문단에 형태소를 자연스럽게 삽입 """
-        sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
-        if not sentences or not sentences[0]:
-            return paragraph + " " + self._generate_sentences_with_morpheme(morpheme, count_to_add)
-
-        for _ in range(count_to_add):
-            insert_idx = random.randrange(len(sentences) + 1)
-            prefix_phrases = ["덧붙여 말하자면, ", "중요한 점은 ", "예를 들어, "]
-            suffix_phrases = [f" 역시 중요합니다.", f"도 고려해야 합니다.", f"의 활용도 생각해볼 수 있습니다."]
-            
-            new_phrase_templates = [
-                f"{random.choice(prefix_phrases)}{morpheme}의 경우",
-                f"{morpheme}{random.choice(suffix_phrases)}",
-                f"{morpheme} 관련하여"
-            ]
-            new_phrase = random.choice(new_phrase_templates)
-
-            if insert_idx == len(sentences):
-                sentences[-1] = sentences[-1].rstrip('.!?') + f", 특히 {morpheme}의 중요성이 부각됩니다."
-            elif insert_idx == 0:
-                sentences[0] = f"{morpheme}에 대해 말하자면, " + sentences[0]
+        return document.serialize()
+
+    def _generate_sentences_with_morpheme(self, morpheme, count, registry=None):
+        """ 형태소를 실제로 늘리는 문장만 골라 count회 이상 늘어날 때까지 생성 """
+        registry = registry or get_template_registry([], [morpheme])
+        entries = select_for_count(registry.morpheme_sentences(morpheme), morpheme, count)
+        if not entries:
+            logger.warning(f"'{morpheme}' 횟수를 늘릴 수 있는 문장 템플릿 없음")
+        return " ".join(entry.text for entry in entries)
+
+    def _inject_morpheme_into_paragraph(self, block, morpheme, count_to_add, registry=None):
+        """
+        기존 문단 블록(DocumentBlock)에 형태소를 자연스럽게 삽입 (블록을 직접 수정)
+        레지스트리에 미리 계산된 기여도로 남은 횟수를 차감하므로 count_to_add회 이상 늘면 바로 종료합니다.
+        """
+        registry = registry or get_template_registry([], [morpheme])
+        phrases = registry.injection_phrases(morpheme)
+        prefix = registry.sentence_prefix(morpheme)
+        suffix = registry.sentence_suffix(morpheme)
+
+        # 문단에 끼워 넣어도 횟수가 늘지 않는 형태소(조사가 붙으면 세지 않는 복합 키워드 등)는 독립 문장으로 추가
+        if not block.live_sentence_indices() or not (phrases or prefix or suffix):
+            sentences = self._generate_sentences_with_morpheme(morpheme, count_to_add, registry)
+            if sentences:
+                block.append_sentence(sentences)
+            return
+
+        remaining = count_to_add
+        while remaining > 0:
+            live_indices = block.live_sentence_indices()
+            insert_idx = random.randrange(len(live_indices) + 1)
+            if not phrases:
+                insert_idx = len(live_indices) if suffix else 0
+
+            if insert_idx == len(live_indices) and suffix:
+                last_idx = live_indices[-1]
+                block.replace_sentence(last_idx, block.sentences[last_idx].rstrip('.!?') + suffix.text)
+                entry = suffix
+            elif insert_idx == 0 and prefix:
+                first_idx = live_indices[0]
+                block.replace_sentence(first_idx, prefix.text + block.sentences[first_idx])
+                entry = prefix
             else:
-                sentences.insert(insert_idx, new_phrase)
-        
-        return " ".join(s.strip() for s in sentences if s.strip())
+                entry = random.choice(phrases)
+                if insert_idx < len(live_indices):
+                    block.insert_sentence(live_indices[insert_idx], entry.text)
+                else:
+                    block.append_sentence(entry.text)
+            remaining -= entry.adds(morpheme)
 
     def _ask_llm_for_sentence_reduction(self, sentence, morpheme_to_reduce):
         """
@@ -468,93 +896,357 @@ class ContentOptimizer:
         수정된 문장만 출력하거나, 문장을 제거해야 한다면 빈 문자열을 출력하세요.
         어떤 설명이나 다른 텍스트도 추가하지 마세요.
         """
+        cache_key = self._sentence_reduction_cache_key(sentence, morpheme_to_reduce)
+        cached_sentence = self.sentence_reduction_cache.get(cache_key)
+        if cached_sentence is not None:
+            return cached_sentence
+
         try:
+            # 응답이 형태소를 줄이지 못하면 다음 등급으로 상향 (LLM_TASK_TIERS['sentence_reduction']), 원문 유지 응답은 허용
+            response_text = TieredModelRouter('sentence_reduction', self.client_registry).call(
+                prompt, 0.3, 1024,
+                validate=lambda text: text.strip() == sentence or self._is_valid_sentence_reduction(sentence, text.strip(), morpheme_to_reduce),
+                default_call=lambda: self._generate_with_default_model(prompt, 0.3, 1024)
+            )
+            reduced_sentence = response_text.strip()
+            self.sentence_reduction_cache.set(cache_key, reduced_sentence)
+            return reduced_sentence
+        except TierResponseRejected:
+            # 검증에 실패한 응답은 사용하지도 캐시하지도 않음
+            logger.info(f"'{morpheme_to_reduce}' 문장 축소 응답이 검증을 통과하지 못해 원문 유지")
+            return sentence
+        except Exception as e:
+            logger.error(f"Gemini sentence reduction API error: {e}")
+            return sentence
+
+    def _generate_with_default_model(self, prompt, temperature, max_output_tokens):
+        """ 최적화기 기본 모델(gemini-2.5-pro) 단순 호출 """
+        begin_llm_call('sentence_reduction')
+        with get_rate_limiter().slot('gemini', self.model_name):
             response = self.model.generate_content(
                 prompt,
                 generation_config=genai.types.GenerationConfig(
-                    temperature=0.3,
-                    max_output_tokens=1024
-                )
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens
+                ),
+                request_options=self.client_registry.gemini_request_options()
             )
-            return response.text.strip()
+        record_llm_usage(prompt, response.text, response)
+        return response.text
+
+    def _is_valid_sentence_reduction(self, sentence, reduced_sentence, morpheme_to_reduce):
+        """ 축소 결과 검증: 삭제("")이거나, 형태소가 줄고 문장이 지나치게 길어지지 않음 """
+        if reduced_sentence == "":
+            return True
+        if len(reduced_sentence) > len(sentence) * 1.5:
+            return False
+        return reduced_sentence.count(morpheme_to_reduce) < sentence.count(morpheme_to_reduce)
+
+    def _sentence_reduction_cache_key(self, sentence, morpheme_to_reduce):
+        """ (정규화된 문장, 형태소, 등급별 모델 순서, 프롬프트 버전) 기반 캐시 키 """
+        normalized_sentence = " ".join(sentence.split())
+        return self.sentence_reduction_cache.make_key(
+            normalized_sentence, morpheme_to_reduce, tier_chain('sentence_reduction', self.model_name),
+            self.SENTENCE_REDUCTION_PROMPT_VERSION
+        )
+
+    def _ask_llm_for_batch_sentence_reduction(self, sentences, morpheme_to_reduce):
+        """
+        여러 문장을 번호를 붙여 한 번의 Gemini 요청으로 처리합니다.
+        문장별로 수정(rewritten) / 삭제(deleted) / 유지(unchanged) 중 하나를 JSON으로 받습니다.
+
+        Args:
+            sentences (list): 형태소를 포함한 문장 목록
+            morpheme_to_reduce (str): 줄여야 할 형태소
+
+        Returns:
+            list: 입력 순서대로 처리된 문장 목록 (삭제는 빈 문자열), 실패 시 None
+        """
+        # 캐시에 있는 문장은 제외하고 나머지만 요청
+        results = [None] * len(sentences)
+        cache_keys = [self._sentence_reduction_cache_key(s, morpheme_to_reduce) for s in sentences]
+        pending_indices = []
+        for i, cache_key in enumerate(cache_keys):
+            cached_sentence = self.sentence_reduction_cache.get(cache_key)
+            if cached_sentence is None:
+                pending_indices.append(i)
+            else:
+                results[i] = cached_sentence
+
+        if not pending_indices:
+            logger.info(f"'{morpheme_to_reduce}' 일괄 축소: {len(sentences)}개 문장 모두 캐시 적중")
+            return results
+
+        pending_sentences = [sentences[i] for i in pending_indices]
+        numbered_sentences = "\n".join(f"{i}. {s}" for i, s in enumerate(pending_sentences, 1))
+        prompt = f"""
+        당신은 전문 콘텐츠 편집자입니다. 아래 번호가 매겨진 각 문장에서 특정 단어/구문의 출현을 줄이면서
+        문장의 자연스러움과 의미를 유지하는 것이 당신의 임무입니다.
+
+        줄여야 할 단어/구문: "{morpheme_to_reduce}"
+
+        문장 목록:
+        {numbered_sentences}
+
+        각 문장마다 다음 중 하나를 결정하세요:
+        1. 단어/구문을 제거하거나 다른 표현으로 바꿔도 자연스럽다면 "rewritten"과 수정된 문장
+        2. 문장 전체를 제거해도 글의 흐름에 영향이 없다면 "deleted"
+        3. 위 두 가지 모두 불가능하다면 "unchanged"
+
+        다음 JSON 배열 형식으로만 응답하세요. 설명이나 다른 텍스트는 추가하지 마세요:
+        [{{"id": 1, "action": "rewritten", "sentence": "수정된 문장"}}, {{"id": 2, "action": "deleted", "sentence": ""}}, ...]
+        """
+        def is_valid(text):
+            parsed = self._parse_batch_reduction_response(text, pending_sentences)
+            return parsed is not None and all(
+                reduced == original or self._is_valid_sentence_reduction(original, reduced, morpheme_to_reduce)
+                for original, reduced in zip(pending_sentences, parsed)
+            )
+
+        try:
+            response_text = TieredModelRouter('sentence_reduction', self.client_registry).call(
+                prompt, 0.3, 4096,
+                validate=is_valid,
+                default_call=lambda: self._generate_with_default_model(prompt, 0.3, 4096)
+            )
+            reduced_sentences = self._parse_batch_reduction_response(response_text, pending_sentences)
+        except TierResponseRejected:
+            logger.info(f"'{morpheme_to_reduce}' 일괄 축소 응답이 검증을 통과하지 못함")
+            return None
         except Exception as e:
-            logger.error(f"Gemini sentence reduction API error: {e}")
-            return sentence
+            logger.error(f"Gemini batch sentence reduction API error: {e}")
+            return None
+
+        if reduced_sentences is None:
+            return None
+        for i, reduced_sentence in zip(pending_indices, reduced_sentences):
+            results[i] = reduced_sentence
+            self.sentence_reduction_cache.set(cache_keys[i], reduced_sentence)
+        return results
+
+    def _parse_batch_reduction_response(self, response_text, sentences):
+        """
+        일괄 문장 축소 응답(JSON 배열)을 입력 순서의 문장 목록으로 변환합니다.
+        모든 번호에 대한 유효한 응답이 없으면 None을 반환합니다.
+        """
+        json_match = re.search(r'\[[\s\S]*\]', response_text)
+        if not json_match:
+            logger.warning("일괄 문장 축소 응답에서 JSON 배열을 찾을 수 없습니다.")
+            return None
+        try:
+            items = json.loads(json_match.group(0))
+        except ValueError as e:
+            logger.warning(f"일괄 문장 축소 응답 JSON 파싱 실패: {e}")
+            return None
+
+        results = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            try:
+                idx = int(item.get('id')) - 1
+            except (TypeError, ValueError):
+                continue
+            if not 0 <= idx < len(sentences):
+                continue
+            action = item.get('action')
+            if action == 'rewritten' and (item.get('sentence') or '').strip():
+                results[idx] = item['sentence'].strip()
+            elif action == 'deleted':
+                results[idx] = ""
+            elif action == 'unchanged':
+                results[idx] = sentences[idx]
+
+        if len(results) != len(sentences):
+            logger.warning(f"일괄 문장 축소 응답 누락: {len(sentences)}개 중 {len(results)}개만 유효")
+            return None
+        return [results[i] for i in range(len(sentences))]
 
     def _reduce_morpheme_to_target(self, content, morpheme_to_reduce, target_count, all_target_morphemes_dict):
         """
         특정 형태소의 출현 횟수를 목표치(target_count)까지 줄입니다.
-        Gemini에게 문맥상 자연스러움을 확인하도록 요청합니다.
+        규칙 기반 로컬 축소(템플릿 문장 삭제, 수식어 삭제, 조사를 맞춘 대체어 교체)를 먼저 적용하고,
+        남은 문장만 Gemini에게 문맥상 자연스러움을 확인하도록 요청합니다.
+        문단 구조는 ParsedDocument로 유지하고 마지막에 한 번만 직렬화합니다.
         """
         logger.info(f"형태소 '{morpheme_to_reduce}' 횟수를 목표치({target_count}회)에 맞게 제거 (Gemini 문맥 고려)")
 
-        # Determine counting method based on morpheme type (base or compound)
-        temp_analysis_for_type = self.morpheme_analyzer.analyze(content, "", all_target_morphemes_dict['all_list'])
-        morpheme_type = temp_analysis_for_type['morpheme_analysis']['counts'].get(morpheme_to_reduce, {}).get('type', 'base')
-
-        if morpheme_type == 'base':
-            count_func = self.morpheme_analyzer._count_substring
-            pattern = re.escape(morpheme_to_reduce) # Substring pattern for finding sentences
-        else: # compound
-            count_func = self.morpheme_analyzer._count_exact_word
-            if re.search(r'[가-힣]', morpheme_to_reduce):
-                if ' ' in morpheme_to_reduce:
-                    pattern = re.escape(morpheme_to_reduce)
-                else:
-                    pattern = rf'(?<![가-힣]){re.escape(morpheme_to_reduce)}(?![가-힣])'
-            else:
-                pattern = rf'\b{re.escape(morpheme_to_reduce)}\b'
+        # 목표 형태소 전체를 한 번의 탐색으로 세는 오토마톤 (기본: 부분 문자열, 복합: 경계 기준)
+        base_morphemes = list(all_target_morphemes_dict['base'])
+        if morpheme_to_reduce not in all_target_morphemes_dict['all_list']:
+            base_morphemes.append(morpheme_to_reduce)
+        automaton = get_automaton(base_morphemes, all_target_morphemes_dict['compound'])
         
-        current_content = content
-        previous_content = ""
+        document = ParsedDocument.parse(content)
         attempt = 0
         max_attempts = 30 # Safety break for infinite loop
+        unchanged_sentences = set() # LLM이 수정을 거부한 문장 (다음 선택에서 후순위)
+        local_reducer = None
+        if getattr(settings, 'LOCAL_SENTENCE_REDUCER_ENABLED', True):
+            local_reducer = LocalSentenceReducer(automaton, self._get_enhanced_substitutions)
 
         while attempt < max_attempts:
-            if current_content == previous_content:
-                logger.warning(f"'{morpheme_to_reduce}' 감소 과정이 고착 상태입니다. 루프를 중단합니다.")
-                break
-            previous_content = current_content
-
-            current_count = count_func(morpheme_to_reduce, current_content)
+            if not budget_allows('morpheme_reduction', needs_llm=False):
+                logger.warning(f"'{morpheme_to_reduce}' 감소 중단: 작업 마감 시각 초과")
+                return document.serialize()
+            # 변경되지 않은 문장은 캐시된 카운트를 재사용
+            scan, sentence_refs = document.scan(automaton)
+            current_count = scan.counts[morpheme_to_reduce]
             
             if current_count <= target_count:
                 logger.info(f"형태소 '{morpheme_to_reduce}' 목표치({target_count}회) 달성 (현재 {current_count}회).")
-                return current_content
+                return document.serialize()
 
-            sentences = re.split(r'(?<=[.!?])\s+', current_content)
-            
-            sentences_with_morpheme_indices = []
-            for i, s in enumerate(sentences):
-                if re.search(pattern, s): # Use the correct pattern for finding sentences containing the morpheme
-                    sentences_with_morpheme_indices.append(i)
-            
-            if not sentences_with_morpheme_indices:
+            if not scan.hits[morpheme_to_reduce]:
                 logger.warning(f"형태소 '{morpheme_to_reduce}'를 포함하는 문장을 찾을 수 없습니다. (현재 {current_count}회)")
                 break
 
-            # Send ALL relevant sentences to Gemini for processing
-            modified_sentences_map = {}
-            for idx in sentences_with_morpheme_indices:
-                original_sentence = sentences[idx]
-                reduced_sentence_or_keyword = self._ask_llm_for_sentence_reduction(original_sentence, morpheme_to_reduce)
-                modified_sentences_map[idx] = reduced_sentence_or_keyword
+            # 기계적으로 줄일 수 있는 문장은 LLM 없이 먼저 처리 (결정적이므로 첫 반복에서 한 번만)
+            if local_reducer is not None:
+                reduced_locally = self._apply_local_reductions(
+                    document, scan, sentence_refs, local_reducer, morpheme_to_reduce,
+                    current_count - target_count, all_target_morphemes_dict
+                )
+                local_reducer = None
+                if reduced_locally:
+                    scan, sentence_refs = document.scan(automaton)
+                    current_count = scan.counts[morpheme_to_reduce]
+                    if current_count <= target_count:
+                        logger.info(f"형태소 '{morpheme_to_reduce}' 로컬 축소로 목표치({target_count}회) 달성 (현재 {current_count}회).")
+                        return document.serialize()
+
+            # 예산이 다하면 LLM 없이 줄인 상태로 종료
+            if not budget_allows('morpheme_reduction'):
+                logger.warning(f"'{morpheme_to_reduce}' 감소 중단: 작업 예산 소진 (현재 {current_count}회)")
+                return document.serialize()
+
+            # 목표치 도달에 필요한 최소한의 문장만 LLM에 전달
+            sentences_with_morpheme_indices = self._select_reduction_candidates(
+                scan,
+                morpheme_to_reduce,
+                current_count - target_count,
+                all_target_morphemes_dict,
+                unchanged_sentences
+            )
+
+            # 관련 문장을 한 번의 요청으로 처리하고, 실패하면 문장별 요청으로 대체
+            candidate_sentences = [scan.sentences[idx] for idx in sentences_with_morpheme_indices]
+            reduced_sentences = self._ask_llm_for_batch_sentence_reduction(candidate_sentences, morpheme_to_reduce)
+            if reduced_sentences is None:
+                if not budget_allows('morpheme_reduction'):
+                    break
+                logger.warning(f"'{morpheme_to_reduce}' 일괄 축소 실패. 문장별 요청으로 대체합니다.")
+                reduced_sentences = [
+                    self._ask_llm_for_sentence_reduction(s, morpheme_to_reduce) for s in candidate_sentences
+                ]
+
+            changed = False
+            for idx, reduced_sentence_or_keyword in zip(sentences_with_morpheme_indices, reduced_sentences):
+                original_sentence = scan.sentences[idx]
                 
                 if reduced_sentence_or_keyword != original_sentence:
+                    document.replace_sentence(sentence_refs[idx], reduced_sentence_or_keyword) # 빈 문자열이면 문장 삭제
+                    changed = True
                     logger.info(f"Gemini: 문장 '{original_sentence[:30]}...'에서 형태소 '{morpheme_to_reduce}' 수정/제거 시도.")
                 else:
+                    unchanged_sentences.add(original_sentence)
                     logger.info(f"Gemini: 문장 '{original_sentence[:30]}...' 변경 없음.")
 
-            new_sentences = [modified_sentences_map.get(i, s) for i, s in enumerate(sentences)]
-            
-            current_content = " ".join(s for s in new_sentences if s) # Filter out empty strings from deleted sentences
+            # 선택된 문장이 모두 거부되었고 더 시도할 후보도 없으면 고착 상태
+            if not changed and all(scan.sentences[i] in unchanged_sentences for i in scan.hits[morpheme_to_reduce]):
+                logger.warning(f"'{morpheme_to_reduce}' 감소 과정이 고착 상태입니다. 루프를 중단합니다.")
+                break
             
-            updated_count = count_func(morpheme_to_reduce, current_content)
+            updated_count = document.scan(automaton)[0].counts[morpheme_to_reduce]
             logger.info(f"형태소 '{morpheme_to_reduce}' 제거 시도 #{attempt+1}. 현재 횟수: {updated_count}")
             attempt += 1
 
-        logger.warning(f"형태소 '{morpheme_to_reduce}' {max_attempts}회 시도 후에도 목표치({target_count}회) 미달성. 현재 {count_func(morpheme_to_reduce, current_content)}회.")
-        return current_content
+        logger.warning(f"형태소 '{morpheme_to_reduce}' {max_attempts}회 시도 후에도 목표치({target_count}회) 미달성. 현재 {document.scan(automaton)[0].counts[morpheme_to_reduce]}회.")
+        return document.serialize()
+
+    def _apply_local_reductions(self, document, scan, sentence_refs, local_reducer, morpheme_to_reduce, excess_count, all_target_morphemes_dict):
+        """
+        규칙 기반으로 줄일 수 있는 문장을 LLM 호출 없이 수정합니다. (문서를 직접 수정)
+        다른 목표 형태소는 최소치 아래로 떨어뜨리지 않으며, 초과분을 채우면 멈춥니다.
+
+        Returns:
+            int: 로컬 축소로 줄어든 형태소 횟수
+        """
+        allowed_loss = {
+            m: max(scan.counts[m] - self._target_min_count(m, all_target_morphemes_dict), 0)
+            for m in scan.counts if m != morpheme_to_reduce
+        }
+        removed = 0
+        handled = 0
+        # 우리가 삽입한 템플릿 문장부터, 그다음 출현 횟수가 많은 문장부터 처리
+        ordered = sorted(
+            scan.hits[morpheme_to_reduce],
+            key=lambda i: (not local_reducer.is_inserted(scan.sentences[i], morpheme_to_reduce), -scan.sentence_counts[i][morpheme_to_reduce])
+        )
+        for idx in ordered:
+            if removed >= excess_count:
+                break
+            sentence = scan.sentences[idx]
+            reduced_sentence = local_reducer.reduce(sentence, morpheme_to_reduce, allowed_loss)
+            if reduced_sentence is None:
+                continue
+            new_counts = local_reducer.automaton.count(reduced_sentence) if reduced_sentence else {}
+            for other, in_sentence in scan.sentence_counts[idx].items():
+                if other in allowed_loss:
+                    allowed_loss[other] -= in_sentence - new_counts.get(other, 0)
+            removed += scan.sentence_counts[idx][morpheme_to_reduce] - new_counts.get(morpheme_to_reduce, 0)
+            handled += 1
+            document.replace_sentence(sentence_refs[idx], reduced_sentence)  # 빈 문자열이면 문장 삭제
+
+        logger.info(f"'{morpheme_to_reduce}' 로컬 축소: {handled}개 문장에서 {removed}회 감소 (초과 {excess_count}회, 나머지는 LLM)")
+        return removed
+
+    def _target_min_count(self, morpheme, all_target_morphemes_dict):
+        if morpheme in all_target_morphemes_dict['compound']:
+            return self.morpheme_analyzer.target_min_compound_count
+        return self.morpheme_analyzer.target_min_base_count
+
+    def _select_reduction_candidates(self, scan, morpheme_to_reduce, excess_count, all_target_morphemes_dict, unchanged_sentences=None):
+        """
+        형태소 감소를 위해 LLM에 보낼 문장을 최소한으로 선택합니다.
+        문장별 출현 횟수가 많고, 다른 목표 형태소를 최소치 아래로 떨어뜨리지 않으며,
+        짧은 문장을 우선으로 하여 초과분(excess_count)을 채울 만큼만 고릅니다.
+
+        Args:
+            scan (MorphemeScan): 현재 콘텐츠의 오토마톤 탐색 결과 (문장별 형태소 횟수 포함)
+            morpheme_to_reduce (str): 줄여야 할 형태소
+            excess_count (int): 목표치 대비 초과 횟수
+            all_target_morphemes_dict (dict): 'base', 'compound', 'all_list' 목표 형태소
+            unchanged_sentences (set): 이전에 LLM이 수정하지 않은 문장
+
+        Returns:
+            list: 선택된 문장 인덱스 (원래 순서 유지)
+        """
+        unchanged_sentences = unchanged_sentences or set()
+
+        ranked = []
+        for idx in scan.hits[morpheme_to_reduce]:
+            sentence = scan.sentences[idx]
+            sentence_counts = scan.sentence_counts[idx]
+            occurrences = sentence_counts.get(morpheme_to_reduce, 0)
+            # 이 문장이 수정/삭제되면 최소치 아래로 떨어질 수 있는 다른 목표 형태소 수
+            harm = 0
+            for other, in_sentence in sentence_counts.items():
+                if other != morpheme_to_reduce and scan.counts[other] - in_sentence < self._target_min_count(other, all_target_morphemes_dict):
+                    harm += 1
+            ranked.append((sentence in unchanged_sentences, harm, -occurrences, len(sentence), idx, occurrences))
+
+        ranked.sort()
+        selected = []
+        covered = 0
+        for _, _, _, _, idx, occurrences in ranked:
+            if covered >= excess_count:
+                break
+            selected.append(idx)
+            covered += occurrences
+
+        logger.info(f"'{morpheme_to_reduce}' 감소 대상 문장 선택: 후보 {len(scan.hits[morpheme_to_reduce])}개 중 {len(selected)}개 (초과 {excess_count}회)")
+        return sorted(selected)
 
     def _get_enhanced_substitutions(self, morpheme):
         substitutions = self.substitution_generator.get_substitutions(morpheme)
@@ -566,38 +1258,29 @@ class ContentOptimizer:
         return list(set(substitutions))
 
     def _enforce_exact_char_count_v2(self, content, target_char_count, tolerance=50, all_target_morphemes=None, current_morpheme_counts=None):
-        current_char_count = len(content.replace(" ", ""))
+        document = ParsedDocument.parse(content)
+        current_char_count = document.char_count
         min_chars = target_char_count - tolerance
         max_chars = target_char_count + tolerance
 
         if min_chars <= current_char_count <= max_chars:
             return content
-            
-        paragraphs = re.split(r'(\n\n+)', content)
-        
-        processed_paragraphs = []
-        temp_para = ""
-        for part in paragraphs:
-            if part == "\n\n" or part == "\n":
-                if temp_para:
-                    processed_paragraphs.append(temp_para)
-                    temp_para = ""
-                processed_paragraphs.append(part)
-            else:
-                temp_para += part
-        if temp_para:
-            processed_paragraphs.append(temp_para)
-
-        content_paragraphs_with_indices = []
-        for i, p_text in enumerate(processed_paragraphs):
-            if not (p_text == "\n\n" or p_text == "\n") and p_text.strip():
-                 if not p_text.strip().startswith(('#', '##', '###')):
-                    content_paragraphs_with_indices.append({'original_idx': i, 'text': p_text, 'len': len(p_text.replace(" ",""))})
+
+        content_paragraphs_with_indices = [
+            {'block_idx': i, 'len': document.blocks[i].char_count}
+            for i in document.content_block_indices(kinds=('paragraph', 'list'))
+        ]
         
         if not content_paragraphs_with_indices:
             logger.warning("글자수 조정: 수정할 내용 문단 없음.")
             return content
 
+        # 문장 × 목표 형태소 행렬을 한 번 만들고 편집할 때마다 해당 행만 갱신
+        count_matrix = None
+        if all_target_morphemes and current_morpheme_counts:
+            automaton = get_automaton(all_target_morphemes['base'], all_target_morphemes['compound'])
+            count_matrix = SentenceCountMatrix.from_document(document, automaton)
+
         if current_char_count < min_chars:
             chars_to_add = min_chars - current_char_count
             logger.info(f"글자수 조정: {chars_to_add}자 추가 필요")
@@ -605,16 +1288,15 @@ class ContentOptimizer:
             content_paragraphs_with_indices.sort(key=lambda x: x['len'])
             
             added_chars_total = 0
-            for para_info in content_paragraphs_with_indices:
+            for position, para_info in enumerate(content_paragraphs_with_indices):
                 if added_chars_total >= chars_to_add: break
                 
-                current_para_add = (chars_to_add - added_chars_total) // (len(content_paragraphs_with_indices) - content_paragraphs_with_indices.index(para_info)) if len(content_paragraphs_with_indices) > content_paragraphs_with_indices.index(para_info) else (chars_to_add - added_chars_total)
+                current_para_add = (chars_to_add - added_chars_total) // (len(content_paragraphs_with_indices) - position)
                 current_para_add = max(20, current_para_add)
                 
-                expanded_text = self._expand_paragraph(para_info['text'], current_para_add, all_target_morphemes, current_morpheme_counts)
-                char_diff = len(expanded_text.replace(" ","")) - para_info['len']
-                processed_paragraphs[para_info['original_idx']] = expanded_text
-                added_chars_total += char_diff
+                block = document.blocks[para_info['block_idx']]
+                self._expand_paragraph(document, para_info['block_idx'], current_para_add, all_target_morphemes, count_matrix)
+                added_chars_total += block.char_count - para_info['len']
                 if added_chars_total >= chars_to_add: break
             
         elif current_char_count > max_chars:
@@ -623,136 +1305,122 @@ class ContentOptimizer:
 
             content_paragraphs_with_indices.sort(key=lambda x: x['len'], reverse=True)
             removed_chars_total = 0
-            for para_info in content_paragraphs_with_indices:
+            for position, para_info in enumerate(content_paragraphs_with_indices):
                 if removed_chars_total >= chars_to_remove: break
                 if para_info['len'] < 50 : continue
 
                 current_para_remove = min(
-                    (chars_to_remove - removed_chars_total) // (len(content_paragraphs_with_indices) - content_paragraphs_with_indices.index(para_info) if len(content_paragraphs_with_indices) > content_paragraphs_with_indices.index(para_info) else 1),
+                    (chars_to_remove - removed_chars_total) // (len(content_paragraphs_with_indices) - position),
                     para_info['len'] // 3
                 )
                 current_para_remove = max(20, current_para_remove)
 
                 if current_para_remove > 0:
-                    reduced_text = self._reduce_paragraph(para_info['text'], current_para_remove, all_target_morphemes, current_morpheme_counts)
-                    char_diff = para_info['len'] - len(reduced_text.replace(" ",""))
-                    processed_paragraphs[para_info['original_idx']] = reduced_text
-                    removed_chars_total += char_diff
+                    block = document.blocks[para_info['block_idx']]
+                    self._reduce_paragraph(document, para_info['block_idx'], current_para_remove, all_target_morphemes, count_matrix)
+                    removed_chars_total += para_info['len'] - block.char_count
                     if removed_chars_total >= chars_to_remove: break
             
-        return "".join(processed_paragraphs)
+        return document.serialize()
 
-    def _expand_paragraph(self, paragraph, chars_to_add, all_target_morphemes_dict, current_morpheme_counts):
+    def _expand_paragraph(self, document, block_idx, chars_to_add, all_target_morphemes_dict, count_matrix=None):
         """
-        문단을 확장하여 글자수를 늘립니다.
+        문단 블록(DocumentBlock)을 확장하여 글자수를 늘립니다. (블록을 직접 수정)
         과다하게 출현하는 목표 형태소가 재유입되지 않도록 주의합니다.
+        count_matrix(SentenceCountMatrix)가 주어지면 과다 여부를 행렬로 검사하고 추가한 문장을 반영합니다.
         """
-        if chars_to_add <=0: return paragraph
+        if chars_to_add <=0: return
+        block = document.blocks[block_idx]
+        at_max_mask = None
+        if all_target_morphemes_dict and count_matrix is not None:
+            at_max_mask = count_matrix.exceeds(self._max_count_limits(count_matrix, all_target_morphemes_dict), inclusive=True)
         
-        sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
-        last_sentence = sentences[-1] if sentences and sentences[-1] else ""
+        live_indices = block.live_sentence_indices()
+        last_sentence = block.sentences[live_indices[-1]].strip() if live_indices else ""
         
         try:
-            nouns = self.okt.nouns(last_sentence if last_sentence else paragraph)
+            nouns = self.okt.nouns(last_sentence if last_sentence else block.text)
             key_phrases = [n for n in nouns if len(n) > 1][:3]
         except Exception:
             key_phrases = ["이 주제", "관련 내용"]
 
         filtered_key_phrases = []
-        if all_target_morphemes_dict and current_morpheme_counts:
+        if at_max_mask is not None:
             for phrase in key_phrases:
-                is_over_represented = False
-                if phrase in all_target_morphemes_dict['all_list']:
-                    morpheme_info = current_morpheme_counts.get(phrase, {})
-                    morpheme_type = morpheme_info.get('type')
-                    count = morpheme_info.get('count', 0)
-                    
-                    if morpheme_type == 'base' and count >= self.morpheme_analyzer.target_max_base_count:
-                        is_over_represented = True
-                    elif morpheme_type == 'compound' and count >= self.morpheme_analyzer.target_max_compound_count:
-                        is_over_represented = True
-                
-                if not is_over_represented:
+                column = count_matrix.automaton.index.get(phrase)
+                if column is None or not at_max_mask[column]:
                     filtered_key_phrases.append(phrase)
         else:
             filtered_key_phrases = key_phrases
         
         if not filtered_key_phrases:
-            filtered_key_phrases = ["이 점", "이 부분", "해당 내용"]
-
-        expansion_text = ""
-        added_len = 0
-        templates = [
-            " 이에 더해, {phrase}에 대한 심층적인 이해가 필요합니다.",
-            " 또한 {phrase}의 중요성을 강조하고 싶습니다.",
-            " {phrase}와 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.",
-            " 실제로 {phrase}는 많은 영향을 미칩니다.",
-            " 그리고 {phrase}에 대한 고려도 중요합니다."
-        ]
-        while added_len < chars_to_add:
-            chosen_phrase = random.choice(filtered_key_phrases)
-            sentence_to_add = random.choice(templates).format(phrase=chosen_phrase)
-            
-            contains_over_represented_in_new_sentence = False
-            if all_target_morphemes_dict and current_morpheme_counts:
-                temp_analysis = self.morpheme_analyzer.analyze(sentence_to_add, "", all_target_morphemes_dict['all_list'])
-                for morpheme in all_target_morphemes_dict['all_list']:
-                    morpheme_info_in_new_sentence = temp_analysis['morpheme_analysis']['counts'].get(morpheme, {})
-                    count_in_new_sentence = morpheme_info_in_new_sentence.get('count', 0)
-                    morpheme_type = morpheme_info_in_new_sentence.get('type')
-
-                    if count_in_new_sentence > 0:
-                        current_global_count = current_morpheme_counts.get(morpheme, {}).get('count', 0)
-                        
-                        if morpheme_type == 'base' and current_global_count >= self.morpheme_analyzer.target_max_base_count:
-                            contains_over_represented_in_new_sentence = True
-                            break
-                        elif morpheme_type == 'compound' and current_global_count >= self.morpheme_analyzer.target_max_compound_count:
-                            contains_over_represented_in_new_sentence = True
-                            break
-            
-            if not contains_over_represented_in_new_sentence:
-                expansion_text += sentence_to_add
-                added_len += len(sentence_to_add.replace(" ", ""))
-            
-            if len(expansion_text) > chars_to_add * 1.5 : break
+            filtered_key_phrases = NEUTRAL_EXPANSION_PHRASES
 
-        return paragraph + expansion_text
-
-    def _reduce_paragraph(self, paragraph, chars_to_remove, all_target_morphemes_dict, current_morpheme_counts):
-        if chars_to_remove <= 0: return paragraph
+        # 미리 계산된 기여도로 최대치에 이른 형태소를 늘리는 문장을 제외하고, 글자수를 채울 때까지 순서대로 선택
+        if all_target_morphemes_dict:
+            registry = get_template_registry(all_target_morphemes_dict['base'], all_target_morphemes_dict['compound'])
+        else:
+            registry = get_template_registry([])
+        blocked = set()
+        if at_max_mask is not None:
+            blocked = {m for m, flag in zip(count_matrix.morphemes, at_max_mask) if flag}
+        candidates = registry.expansion_sentences(filtered_key_phrases)
+        random.shuffle(candidates)
+        expansion_entries = select_for_chars(candidates, chars_to_add, blocked)
+        if not expansion_entries and filtered_key_phrases is not NEUTRAL_EXPANSION_PHRASES:
+            expansion_entries = select_for_chars(registry.expansion_sentences(NEUTRAL_EXPANSION_PHRASES), chars_to_add, blocked)
+
+        for entry in expansion_entries:
+            sentence_idx = block.append_sentence(entry.text)
+            if count_matrix is not None:
+                count_matrix.set_sentence((block_idx, sentence_idx), entry.text, entry.contribution)
+
+    def _reduce_paragraph(self, document, block_idx, chars_to_remove, all_target_morphemes_dict, count_matrix=None):
+        """
+        문단 블록(DocumentBlock)의 글자수를 줄입니다. (블록을 직접 수정)
+        count_matrix(SentenceCountMatrix)가 주어지면 과다 형태소를 포함한 문장을 행렬로 찾아 우선 줄이고,
+        바뀐 문장을 행렬에 반영합니다.
+        """
+        if chars_to_remove <= 0: return
+        block = document.blocks[block_idx]
 
-        sentences = re.split(r'(?<=[.!?])\s+', paragraph.strip())
-        if len(sentences) <= 1:
+        live_indices = block.live_sentence_indices()
+        if len(live_indices) <= 1:
+            paragraph = block.text
             words = paragraph.split()
             reduced_len = 0
             while reduced_len < chars_to_remove and len(words) > 5:
                 removed_word = words.pop()
                 reduced_len += len(removed_word.replace(" ",""))
-            return " ".join(words) + ("." if paragraph.endswith(".") else "")
+            block.set_text(" ".join(words) + ("." if paragraph.endswith(".") else ""))
+            if count_matrix is not None:
+                for i in live_indices:
+                    count_matrix.set_sentence((block_idx, i), "")
+                for i in block.live_sentence_indices():
+                    count_matrix.set_sentence((block_idx, i), block.sentences[i])
+            return
+
+        base_over_hits = compound_over_hits = [False] * len(live_indices)
+        if all_target_morphemes_dict and count_matrix is not None:
+            over_mask = count_matrix.exceeds(self._max_count_limits(count_matrix, all_target_morphemes_dict))
+            compound_morphemes = set(all_target_morphemes_dict['compound'])
+            base_over_mask = [flag and m not in compound_morphemes for m, flag in zip(count_matrix.morphemes, over_mask)]
+            compound_over_mask = [flag and m in compound_morphemes for m, flag in zip(count_matrix.morphemes, over_mask)]
+            sentence_refs = [(block_idx, i) for i in live_indices]
+            base_over_hits = count_matrix.row_hits(sentence_refs, base_over_mask)
+            compound_over_hits = count_matrix.row_hits(sentence_refs, compound_over_mask)
 
         sentence_info = []
-        for i, s in enumerate(sentences):
+        for position, i in enumerate(live_indices):
+            s = block.sentences[i]
             score = 100 - len(s)
             if any(conj in s for conj in ["하지만", "그러나", "따라서", "결론적으로"]):
                 score -= 50
             
-            if all_target_morphemes_dict and current_morpheme_counts:
-                temp_analysis = self.morpheme_analyzer.analyze(s, "", all_target_morphemes_dict['all_list'])
-                for morpheme in all_target_morphemes_dict['all_list']:
-                    morpheme_info_in_sentence = temp_analysis['morpheme_analysis']['counts'].get(morpheme, {})
-                    count_in_sentence = morpheme_info_in_sentence.get('count', 0)
-                    morpheme_type = morpheme_info_in_sentence.get('type')
-
-                    if count_in_sentence > 0:
-                        current_global_count = current_morpheme_counts.get(morpheme, {}).get('count', 0)
-                        
-                        if morpheme_type == 'base' and current_global_count > self.morpheme_analyzer.target_max_base_count:
-                            score += 200
-                            break
-                        elif morpheme_type == 'compound' and current_global_count > self.morpheme_analyzer.target_max_compound_count:
-                            score += 150
-                            break
+            if base_over_hits[position]:
+                score += 200
+            elif compound_over_hits[position]:
+                score += 150
 
             sentence_info.append({'idx': i, 'text': s, 'score': score, 'len': len(s.replace(" ",""))})
         
@@ -760,11 +1428,11 @@ class ContentOptimizer:
 
         removed_chars_count = 0
         removed_indices = set()
-        new_sentences = list(sentences)
+        new_sentences = {i: block.sentences[i] for i in live_indices}
 
         for s_info in sentence_info:
             if removed_chars_count >= chars_to_remove: break
-            if len(sentences) - len(removed_indices) <= 1 : break 
+            if len(live_indices) - len(removed_indices) <= 1 : break 
 
             if s_info['idx'] not in removed_indices:
                 original_sentence = s_info['text']
@@ -815,26 +1483,52 @@ class ContentOptimizer:
                         removed_indices.add(s_info['idx'])
                         logger.debug(f"문장 삭제: '{s_info['text']}'")
         
-        final_sentences = [new_sentences[i] for i in range(len(new_sentences)) if i not in removed_indices]
-        return " ".join(final_sentences)
+        for i in live_indices:
+            if i in removed_indices:
+                block.replace_sentence(i, "")
+            elif new_sentences[i] != block.sentences[i]:
+                block.replace_sentence(i, new_sentences[i])
+            else:
+                continue
+            if count_matrix is not None:
+                count_matrix.set_sentence((block_idx, i), block.sentences[i])
+
+    def _max_count_limits(self, count_matrix, all_target_morphemes_dict):
+        """ 행렬 열 순서의 형태소별 최대 허용 횟수 (기본/복합 유형별 최대치) """
+        compound_morphemes = set(all_target_morphemes_dict['compound'])
+        return [
+            self.morpheme_analyzer.target_max_compound_count if m in compound_morphemes else self.morpheme_analyzer.target_max_base_count
+            for m in count_matrix.morphemes
+        ]
 
-    def _enforce_exact_target_morpheme_count(self, content, keyword, custom_morphemes, current_morpheme_counts, target_morphemes_dict):
+    def _enforce_exact_target_morpheme_count(self, content, keyword, custom_morphemes, current_morpheme_counts, target_morphemes_dict, target_ranges=None):
         """
         '목표' 형태소 출현 횟수를 목표 범위 내로 조정 (MorphemeAnalyzer 사용)
         target_morphemes_dict now contains 'base' and 'compound' lists.
+        target_ranges가 주어지면 형태소별 (최소, 최대) 범위를 우선 사용합니다.
         """
+        target_ranges = target_ranges or {}
         adjusted_content = content
         
         base_morphemes = target_morphemes_dict['base']
         compound_morphemes = target_morphemes_dict['compound']
         all_target_morphemes_list = target_morphemes_dict['all_list']
 
+        # 모든 목표 형태소 횟수를 한 번의 탐색으로 계산하고, 콘텐츠가 바뀐 경우에만 다시 계산
+        automaton = get_automaton(base_morphemes, compound_morphemes)
+        counts = automaton.count(adjusted_content)
+        counted_content = adjusted_content
+
         # Adjust base morphemes first
         for morpheme in base_morphemes:
-            current_count_for_morpheme = self.morpheme_analyzer._count_substring(morpheme, adjusted_content)
+            if adjusted_content is not counted_content:
+                counts = automaton.count(adjusted_content)
+                counted_content = adjusted_content
+            current_count_for_morpheme = counts[morpheme]
             
-            target_min = self.morpheme_analyzer.target_min_base_count
-            target_max = self.morpheme_analyzer.target_max_base_count
+            target_min, target_max = target_ranges.get(
+                morpheme, (self.morpheme_analyzer.target_min_base_count, self.morpheme_analyzer.target_max_base_count)
+            )
 
             if current_count_for_morpheme > target_max:
                 target_count = (target_min + target_max) // 2
@@ -848,14 +1542,18 @@ class ContentOptimizer:
             elif current_count_for_morpheme < target_min:
                 shortage = target_min - current_count_for_morpheme
                 logger.info(f"핵심 기본 형태소 '{morpheme}' 부족: {current_count_for_morpheme}회 -> {target_min}회로 늘림 (추가량: {shortage}회)")
-                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage)
+                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage, target_morphemes_dict)
 
         # Adjust compound morphemes next
         for morpheme in compound_morphemes:
-            current_count_for_morpheme = self.morpheme_analyzer._count_exact_word(morpheme, adjusted_content)
+            if adjusted_content is not counted_content:
+                counts = automaton.count(adjusted_content)
+                counted_content = adjusted_content
+            current_count_for_morpheme = counts[morpheme]
             
-            target_min = self.morpheme_analyzer.target_min_compound_count
-            target_max = self.morpheme_analyzer.target_max_compound_count
+            target_min, target_max = target_ranges.get(
+                morpheme, (self.morpheme_analyzer.target_min_compound_count, self.morpheme_analyzer.target_max_compound_count)
+            )
 
             if current_count_for_morpheme > target_max:
                 target_count = (target_min + target_max) // 2
@@ -869,7 +1567,7 @@ class ContentOptimizer:
             elif current_count_for_morpheme < target_min:
                 shortage = target_min - current_count_for_morpheme
                 logger.info(f"복합 키워드/구문 '{morpheme}' 부족: {current_count_for_morpheme}회 -> {target_min}회로 늘림 (추가량: {shortage}회)")
-                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage)
+                adjusted_content = self._add_morpheme_strategically(adjusted_content, morpheme, shortage, target_morphemes_dict)
         
         return adjusted_content
 
@@ -877,21 +1575,11 @@ class ContentOptimizer:
         return self._add_morpheme_strategically(content, morpheme, count_to_add)
 
     def separate_content_and_refs(self, content):
-        refs_pattern = r"(## 참고자료[\s\S]*)"
-        refs_match = re.search(refs_pattern, content, re.MULTILINE)
-        
-        if refs_match:
-            refs_section = refs_match.group(1)
-            content_without_refs = content[:refs_match.start()].strip()
-            return {
-                'content_without_refs': content_without_refs,
-                'refs_section': refs_section
-            }
-        else:
-            return {
-                'content_without_refs': content.strip(),
-                'refs_section': None
-            }
+        content_without_refs, refs_section = split_references(content)
+        return {
+            'content_without_refs': content_without_refs,
+            'refs_section': refs_section
+        }
     
     def _create_seo_optimization_prompt(self, content, keyword, custom_morphemes, analysis_result):
         char_count = analysis_result['char_count']
@@ -1036,7 +1724,7 @@ class ContentOptimizer:
 
         morpheme_analysis_for_prompt = {
             "target_morphemes": analysis_result['morpheme_analysis']['target_morphemes'],
-            "counts": analysis_result['morpheme_analysis']['counts']
+            "counts": {m: dict(info) for m, info in analysis_result['morpheme_analysis']['counts'].items()}
         }
 
         return f"""
@@ -0,0 +1,84 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\particles.py
+"""
+한국어 조사 처리
+
+- 받침에 따라 형태가 바뀌는 조사(은/는, 이/가, 과/와, 으로/로 등) 판별과 선택
+- 로컬 문장 축소의 대체어 교체와 삽입 템플릿 채우기에서 함께 사용
+"""
+
+
+# (받침 있을 때, 받침 없을 때) 형태가 바뀌는 조사 (긴 것부터 검사)
+ALTERNATING_PARTICLES = [
+    ('이에요', '예요'), ('이다', '다'), ('이죠', '죠'),
+    ('으로', '로'), ('이나', '나'), ('이랑', '랑'), ('이라', '라'), ('이며', '며'),
+    ('은', '는'), ('이', '가'), ('을', '를'), ('과', '와'),
+]
+# 앞 글자와 무관하게 형태가 같은 조사
+INVARIANT_PARTICLES = ['입니다', '에서', '에게', '까지', '부터', '보다', '처럼', '의', '에', '도', '만']
+
+RIEUL_FINAL = 8  # 'ㄹ' 받침 (으로 -> 로)
+
+
+def is_hangul(char):
+    return '가' <= char <= '힣'
+
+
+def final_consonant(char):
+    """ 한글 음절의 받침 인덱스 (받침 없음: 0, 한글이 아니면 None) """
+    if not is_hangul(char):
+        return None
+    return (ord(char) - ord('가')) % 28
+
+
+def particle_after(text):
+    """
+    단어 바로 뒤 조사 판별
+
+    - 조사 뒤가 한글이 아니거나 문장 끝일 때만 조사로 인정
+      ('엔진가격'의 '가', '보험가입'의 '가'처럼 다음 명사의 첫 글자는 조사가 아님)
+
+    Returns:
+        tuple: (조사 문자열, 교대형 조사 쌍 또는 None), 조사가 없으면 ("", None)
+    """
+    for pair in ALTERNATING_PARTICLES:
+        for form in pair:
+            if _ends_word(text, form):
+                return form, pair
+    for particle in INVARIANT_PARTICLES:
+        if _ends_word(text, particle):
+            return particle, None
+    return "", None
+
+
+def _ends_word(text, particle):
+    """ text가 particle로 시작하고 그 뒤에서 단어가 끝나는지 """
+    if not text.startswith(particle):
+        return False
+    following = text[len(particle):len(particle) + 1]
+    return not following or not is_hangul(following)
+
+
+def attach_particle(word, pair):
+    """ 단어 끝 글자의 받침에 맞는 조사 형태를 붙임 (한글로 끝나지 않으면 받침 없는 형태) """
+    final = final_consonant(word[-1]) if word else None
+    if not final or (pair[0] == '으로' and final == RIEUL_FINAL):
+        return word + pair[1]
+    return word + pair[0]
+
+
+def fill_template(template, **values):
+    """
+    str.format처럼 {이름} 자리에 값을 넣되, 바로 뒤의 교대형 조사를 값의 받침에 맞춤
+    ('{phrase}와 관련하여' + '해당 내용' -> '해당 내용과 관련하여')
+    """
+    for name, value in values.items():
+        parts = template.split("{" + name + "}")
+        filled = parts[0]
+        for part in parts[1:]:
+            particle, pair = particle_after(part)
+            if pair:
+                filled += attach_particle(value, pair) + part[len(particle):]
+            else:
+                filled += value + part
+        template = filled
+    return template
@@ -0,0 +1,329 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\rate_limiter.py
+"""
+프로세스 간에 공유하는 LLM 호출 속도 제한기 (토큰 버킷 + AIMD 동시 실행 제한)
+
+- 상태는 로컬 SQLite 파일에 저장하여 같은 서버의 모든 워커 프로세스가 함께 사용
+- 키: "제공자:모델" (예: "anthropic:claude-sonnet-4-20250514")
+- 토큰 버킷: 초당 rate개씩 최대 burst개까지 충전, 호출마다 1개 사용
+- AIMD: 성공하면 동시 실행 한도를 천천히 늘리고 (+1/한도), 과부하(429/529 등)면 절반으로 줄임
+- 과부하 응답에 Retry-After가 있으면 그 시각까지 모든 프로세스의 호출을 보류
+- 호출 중 프로세스가 종료되어도 lease_timeout이 지나면 점유가 자동 해제됨
+- 저장소 오류 시에는 제한 없이 호출을 진행 (LLM 호출 자체를 막지 않음)
+
+설정:
+    LLM_RATE_LIMIT_ENABLED: 사용 여부 (기본 True)
+    LLM_RATE_LIMIT_DB: SQLite 파일 경로 (기본 임시 디렉터리의 blogcheatkey-llm-ratelimit.sqlite3)
+    LLM_RATE_LIMITS = {"제공자:모델" 또는 "제공자": {
+        'rate': 초당 호출 수 (기본 1.0), 'burst': 버킷 크기 (기본 5),
+        'initial_concurrency': 시작 동시 실행 한도 (기본 4),
+        'min_concurrency': (기본 1), 'max_concurrency': (기본 16),
+        'decrease_factor': 과부하 시 한도 배율 (기본 0.5),
+        'default_backoff': Retry-After 없는 과부하 시 보류 시간 (초, 기본 5),
+        'max_wait': 슬롯 대기 최대 시간 (초, 기본 300, 작업 예산이 있으면 남은 시간으로 제한),
+        'lease_timeout': 점유 자동 해제 시간 (초, 기본 600),
+    }}
+"""
+import os
+import time
+import uuid
+import asyncio
+import sqlite3
+import logging
+import tempfile
+import threading
+import contextlib
+from email.utils import parsedate_to_datetime
+from django.conf import settings
+from .job_budget import call_timeout, check_call_cancelled, sleep_unless_cancelled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMIT_OPTIONS = {
+    'rate': 1.0,
+    'burst': 5,
+    'initial_concurrency': 4,
+    'min_concurrency': 1,
+    'max_concurrency': 16,
+    'decrease_factor': 0.5,
+    'default_backoff': 5,
+    'max_wait': 300,
+    'lease_timeout': 600,
+}
+OVERLOAD_STATUS_CODES = (429, 503, 529)
+OVERLOAD_ERROR_NAMES = ('RateLimitError', 'OverloadedError', 'ResourceExhausted', 'ServiceUnavailable', 'TooManyRequests')
+POLL_INTERVAL = 0.25
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_rate_limit (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    concurrency_limit REAL NOT NULL,
+    blocked_until REAL NOT NULL DEFAULT 0,
+    last_decrease REAL NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS llm_rate_limit_lease (
+    id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_rate_limit_lease_key ON llm_rate_limit_lease (key);
+"""
+
+
+class RateLimitTimeout(Exception):
+    """ max_wait 안에 호출 슬롯을 얻지 못함 """
+
+
+def limit_options(key):
+    """ "제공자:모델" 설정 > "제공자" 설정 > 기본값 """
+    limits = getattr(settings, 'LLM_RATE_LIMITS', {})
+    options = dict(DEFAULT_LIMIT_OPTIONS)
+    options.update(limits.get(key.split(':', 1)[0], {}))
+    options.update(limits.get(key, {}))
+    return options
+
+
+def is_overload_error(error):
+    """ 제공자의 과부하/속도 제한 응답인지 (SDK별 예외 이름과 HTTP 상태 코드로 판단) """
+    status_code = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    if status_code in OVERLOAD_STATUS_CODES:
+        return True
+    return type(error).__name__ in OVERLOAD_ERROR_NAMES
+
+
+def retry_after_seconds(error):
+    """ 예외에 포함된 응답의 Retry-After 헤더 (초), 없으면 None """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    value = headers.get('retry-after-ms')
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class SharedRateLimiter:
+    """
+    SQLite 기반 공유 속도 제한기
+    - acquire/release는 각각 짧은 BEGIN IMMEDIATE 트랜잭션 하나 (파일 잠금으로 프로세스 간 직렬화)
+    - 연결은 스레드마다 따로 사용
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def slot(self, provider, model):
+        """ 동기 호출용 컨텍스트 매니저: with limiter.slot('anthropic', model): client.messages.create(...) """
+        return _Slot(self, f"{provider}:{model}")
+
+    def aslot(self, provider, model):
+        """ 비동기 호출용 컨텍스트 매니저: async with limiter.aslot('anthropic', model): ... """
+        return _Slot(self, f"{provider}:{model}")
+
+    def try_acquire(self, key):
+        """
+        슬롯 점유 시도
+
+        Returns:
+            tuple: (점유 ID 또는 None, 다시 시도할 때까지 기다릴 시간)
+        """
+        options = limit_options(key)
+        now = time.time()
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT tokens, updated_at, concurrency_limit, blocked_until FROM llm_rate_limit WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                row = (float(options['burst']), now, float(options['initial_concurrency']), 0.0)
+                connection.execute(
+                    "INSERT INTO llm_rate_limit (key, tokens, updated_at, concurrency_limit) VALUES (?, ?, ?, ?)",
+                    (key, row[0], row[1], row[2])
+                )
+            tokens, updated_at, concurrency_limit, blocked_until = row
+            if now < blocked_until:
+                return None, blocked_until - now
+
+            connection.execute("DELETE FROM llm_rate_limit_lease WHERE key = ? AND expires_at < ?", (key, now))
+            in_flight = connection.execute("SELECT COUNT(*) FROM llm_rate_limit_lease WHERE key = ?", (key,)).fetchone()[0]
+            if in_flight >= max(int(concurrency_limit), 1):
+                return None, POLL_INTERVAL
+
+            tokens = min(float(options['burst']), tokens + (now - updated_at) * options['rate'])
+            if tokens < 1:
+                connection.execute("UPDATE llm_rate_limit SET tokens = ?, updated_at = ? WHERE key = ?", (tokens, now, key))
+                return None, (1 - tokens) / options['rate']
+
+            lease_id = uuid.uuid4().hex
+            connection.execute("UPDATE llm_rate_limit SET tokens = ?, updated_at = ? WHERE key = ?", (tokens - 1, now, key))
+            connection.execute(
+                "INSERT INTO llm_rate_limit_lease (id, key, expires_at) VALUES (?, ?, ?)",
+                (lease_id, key, now + options['lease_timeout'])
+            )
+            return lease_id, 0
+
+    def release(self, key, lease_id, error=None):
+        """
+        슬롯 반환과 동시 실행 한도 조정 (성공: 가산 증가, 과부하: 곱셈 감소 + Retry-After 보류)
+
+        Args:
+            key (str): "제공자:모델"
+            lease_id (str): try_acquire가 반환한 점유 ID
+            error (Exception): 호출 중 발생한 예외 (성공이면 None)
+        """
+        options = limit_options(key)
+        now = time.time()
+        overloaded = error is not None and is_overload_error(error)
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM llm_rate_limit_lease WHERE id = ?", (lease_id,))
+            row = connection.execute(
+                "SELECT concurrency_limit, blocked_until, last_decrease FROM llm_rate_limit WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return
+            concurrency_limit, blocked_until, last_decrease = row
+            if overloaded:
+                retry_after = retry_after_seconds(error)
+                blocked_until = max(blocked_until, now + (retry_after if retry_after is not None else options['default_backoff']))
+                # 동시에 실패한 호출들이 한도를 연달아 깎지 않도록 보류 구간마다 한 번만 감소
+                if last_decrease < now - options['default_backoff']:
+                    concurrency_limit = max(float(options['min_concurrency']), concurrency_limit * options['decrease_factor'])
+                    last_decrease = now
+                logger.warning(f"LLM 과부하 응답 ({key}): 동시 실행 한도 {concurrency_limit:.2f}, {blocked_until - now:.1f}초 보류")
+            elif error is None:
+                concurrency_limit = min(float(options['max_concurrency']), concurrency_limit + 1 / max(concurrency_limit, 1))
+            connection.execute(
+                "UPDATE llm_rate_limit SET concurrency_limit = ?, blocked_until = ?, last_decrease = ? WHERE key = ?",
+                (concurrency_limit, blocked_until, last_decrease, key)
+            )
+
+    def acquire(self, key):
+        """ 슬롯을 얻을 때까지 대기 (헤지 경로가 중단되면 슬롯을 얻지 않고 CallCancelled) """
+        deadline = time.monotonic() + call_timeout(limit_options(key)['max_wait'])
+        while True:
+            check_call_cancelled()
+            lease_id, wait = self._try_acquire_safely(key)
+            if lease_id is not None or wait is None:
+                return lease_id
+            self._check_deadline(key, deadline, wait)
+            sleep_unless_cancelled(wait)
+
+    async def aacquire(self, key):
+        """ 슬롯을 얻을 때까지 대기 (asyncio.sleep, SQLite 트랜잭션은 이벤트 루프를 막지 않도록 스레드에서 실행) """
+        deadline = time.monotonic() + call_timeout(limit_options(key)['max_wait'])
+        while True:
+            lease_id, wait = await asyncio.to_thread(self._try_acquire_safely, key)
+            if lease_id is not None or wait is None:
+                return lease_id
+            self._check_deadline(key, deadline, wait)
+            await asyncio.sleep(wait)
+
+    def release_safely(self, key, lease_id, error=None):
+        if lease_id is None:
+            return
+        try:
+            self.release(key, lease_id, error)
+        except sqlite3.Error as e:
+            logger.warning(f"속도 제한 저장소 오류로 슬롯 반환 실패 ({key}): {e}")
+
+    def _try_acquire_safely(self, key):
+        try:
+            return self.try_acquire(key)
+        except sqlite3.Error as e:
+            logger.warning(f"속도 제한 저장소 오류로 제한 없이 호출 ({key}): {e}")
+            return None, None
+
+    def _check_deadline(self, key, deadline, wait):
+        if time.monotonic() + wait > deadline:
+            raise RateLimitTimeout(f"{key} 호출 슬롯 대기 시간 초과")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+
+class _Slot:
+    """ slot/aslot 컨텍스트 매니저 (예외가 나면 과부하 여부를 판단해 release에 전달) """
+
+    def __init__(self, limiter, key):
+        self._limiter = limiter
+        self._key = key
+        self._lease_id = None
+
+    def __enter__(self):
+        self._lease_id = self._limiter.acquire(self._key)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._limiter.release_safely(self._key, self._lease_id, exc)
+        return False
+
+    async def __aenter__(self):
+        self._lease_id = await self._limiter.aacquire(self._key)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await asyncio.to_thread(self._limiter.release_safely, self._key, self._lease_id, exc)
+        return False
+
+
+class _DisabledRateLimiter:
+    """ LLM_RATE_LIMIT_ENABLED=False일 때 사용하는 제한 없는 구현 """
+
+    def slot(self, provider, model):
+        return contextlib.nullcontext()
+
+    def aslot(self, provider, model):
+        return contextlib.nullcontext()
+
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """ 프로세스 공용 속도 제한기 반환 (파일 경로가 같으면 모든 프로세스가 같은 상태를 공유) """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                if not getattr(settings, 'LLM_RATE_LIMIT_ENABLED', True):
+                    _rate_limiter = _DisabledRateLimiter()
+                else:
+                    path = getattr(settings, 'LLM_RATE_LIMIT_DB', None) or os.path.join(
+                        tempfile.gettempdir(), 'blogcheatkey-llm-ratelimit.sqlite3'
+                    )
+                    _rate_limiter = SharedRateLimiter(path)
+    return _rate_limiter
@@ -0,0 +1,222 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\services\template_registry.py
+import threading
+from .document_model import char_len
+from .morpheme_automaton import get_automaton
+from .particles import fill_template
+
+# 형태소를 추가할 때 사용하는 문장 템플릿
+MORPHEME_SENTENCE_TEMPLATES = [
+    "또한, {morpheme}의 중요성을 간과해서는 안 됩니다.",
+    "이러한 맥락에서 {morpheme}은 핵심적인 역할을 합니다.",
+    "결과적으로 {morpheme}의 활용이 중요합니다.",
+    "많은 전문가들이 {morpheme}의 가치를 강조합니다.",
+    "특히 {morpheme}에 대한 이해가 필요합니다."
+]
+
+# 복합 키워드는 앞뒤가 한글이 아니어야 카운트되므로 조사 없이 띄어 쓰는 템플릿
+COMPOUND_SENTENCE_TEMPLATES = [
+    "{morpheme} 관련 정보는 꼼꼼히 확인하는 것이 좋습니다.",
+    "많은 분들이 {morpheme} 선택 기준을 궁금해합니다.",
+    "{morpheme} 관리 요령을 미리 알아두면 도움이 됩니다."
+]
+
+# 문단 중간에 끼워 넣는 구문
+INJECTION_PHRASE_TEMPLATES = [
+    "덧붙여 말하자면, {morpheme}의 경우",
+    "중요한 점은 {morpheme}의 경우",
+    "예를 들어, {morpheme}의 경우",
+    "{morpheme} 역시 중요합니다.",
+    "{morpheme}도 고려해야 합니다.",
+    "{morpheme}의 활용도 생각해볼 수 있습니다.",
+    "{morpheme} 관련하여"
+]
+
+# 첫 문장 앞/마지막 문장 뒤에 붙이는 구문
+SENTENCE_PREFIX_TEMPLATE = "{morpheme}에 대해 말하자면, "
+SENTENCE_SUFFIX_TEMPLATE = ", 특히 {morpheme}의 중요성이 부각됩니다."
+
+# 글자수를 늘릴 때 사용하는 문장 템플릿
+EXPANSION_TEMPLATES = [
+    "이에 더해, {phrase}에 대한 심층적인 이해가 필요합니다.",
+    "또한 {phrase}의 중요성을 강조하고 싶습니다.",
+    "{phrase}와 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.",
+    "실제로 {phrase}는 많은 영향을 미칩니다.",
+    "그리고 {phrase}에 대한 고려도 중요합니다."
+]
+NEUTRAL_EXPANSION_PHRASES = ["이 점", "이 부분", "해당 내용"]
+
+
+def inserted_fragments(morpheme):
+    """
+    형태소로 채운 삽입 템플릿 전체 (로컬 축소에서 우리가 넣은 문장/구문을 되돌릴 때 사용)
+    기여도 필터를 거치지 않은 원본 템플릿이므로 어떤 레지스트리로 삽입했는지와 무관하게 찾을 수 있음
+
+    Returns:
+        tuple: (독립 문장 집합, 문장 앞에 붙은 구문 목록, 문장 뒤에 붙은 구문)
+    """
+    sentences = {fill_template(t, morpheme=morpheme) for t in MORPHEME_SENTENCE_TEMPLATES + COMPOUND_SENTENCE_TEMPLATES + INJECTION_PHRASE_TEMPLATES}
+    sentences.update(fill_template(t, phrase=morpheme) for t in EXPANSION_TEMPLATES)
+    # 마침표 없는 삽입 구문은 다시 분할하면 다음 문장 앞에 붙음
+    leading = [fill_template(SENTENCE_PREFIX_TEMPLATE, morpheme=morpheme)]
+    leading.extend(fill_template(t, morpheme=morpheme) + " " for t in INJECTION_PHRASE_TEMPLATES if not t.endswith(('.', '!', '?')))
+    return sentences, leading, fill_template(SENTENCE_SUFFIX_TEMPLATE, morpheme=morpheme)
+
+
+class TemplateEntry:
+    """
+    형태소/구문을 채운 템플릿 하나
+    - char_count: 공백 제외 글자수
+    - contribution: 삽입 시 늘어나는 목표 형태소별 횟수 (0이 아닌 것만)
+    - template: 채우기 전 원본 템플릿 (같은 문형의 반복 사용 집계용)
+    """
+
+    __slots__ = ('text', 'char_count', 'contribution', 'template')
+
+    def __init__(self, text, contribution, template=None):
+        self.text = text
+        self.char_count = char_len(text)
+        self.contribution = contribution
+        self.template = template or text
+
+    def adds(self, morpheme):
+        return self.contribution.get(morpheme, 0)
+
+    def touches(self, morphemes):
+        """ 주어진 형태소 중 하나라도 늘리는지 """
+        return any(m in self.contribution for m in morphemes)
+
+
+def select_for_count(entries, morpheme, count, blocked=()):
+    """
+    형태소를 count회 이상 늘릴 때까지 템플릿을 순서대로 돌려 선택 (무작위 재시도 없이 결정적으로 종료)
+
+    Args:
+        entries (list): 후보 TemplateEntry
+        morpheme (str): 늘릴 형태소
+        count (int): 늘릴 횟수
+        blocked (set): 늘리면 안 되는 형태소
+
+    Returns:
+        list: 선택된 TemplateEntry (늘릴 수 있는 템플릿이 없으면 빈 목록)
+    """
+    usable = [e for e in entries if e.adds(morpheme) > 0 and not e.touches(set(blocked) - {morpheme})]
+    selected = []
+    added = 0
+    while usable and added < count:
+        entry = usable[len(selected) % len(usable)]
+        selected.append(entry)
+        added += entry.adds(morpheme)
+    return selected
+
+
+def select_for_chars(entries, chars, blocked=()):
+    """ 글자수를 chars 이상 늘릴 때까지, 막힌 형태소를 늘리지 않는 템플릿을 순서대로 선택 """
+    usable = [e for e in entries if e.char_count > 0 and not e.touches(blocked)]
+    selected = []
+    added = 0
+    while usable and added < chars:
+        entry = usable[len(selected) % len(usable)]
+        selected.append(entry)
+        added += entry.char_count
+    return selected
+
+
+class TemplateRegistry:
+    """
+    키워드(목표 형태소 조합)별 삽입 템플릿 레지스트리
+    - 각 템플릿의 글자수와 모든 목표 형태소에 대한 기여도를 미리 계산
+    - 삽입 시 다시 분석하지 않고 원하는 방향으로 횟수를 움직이는 템플릿만 고름
+    """
+
+    def __init__(self, automaton):
+        """
+        Args:
+            automaton (MorphemeAutomaton): 목표 형태소 오토마톤
+        """
+        self.automaton = automaton
+        self._morpheme_entries = {}  # 형태소 -> (독립 문장, 삽입 구문, 앞 구문, 뒤 구문)
+        self._expansions = {}
+        self._lock = threading.Lock()
+        for morpheme in automaton.morphemes:
+            self._build_morpheme_entries(morpheme)
+        self.expansion_sentences(NEUTRAL_EXPANSION_PHRASES)
+
+    def entry(self, text, template=None):
+        counts = self.automaton.count(text)
+        return TemplateEntry(text, {m: n for m, n in counts.items() if n}, template)
+
+    def morpheme_sentences(self, morpheme):
+        """ 형태소를 늘리는 독립 문장 (부수 효과가 적고 짧은 순) """
+        return self._build_morpheme_entries(morpheme)[0]
+
+    def injection_phrases(self, morpheme):
+        """ 문단 중간에 끼워 넣어 형태소를 늘리는 구문 """
+        return self._build_morpheme_entries(morpheme)[1]
+
+    def sentence_prefix(self, morpheme):
+        """ 첫 문장 앞에 붙일 구문 (형태소를 늘리지 못하면 None) """
+        return self._build_morpheme_entries(morpheme)[2]
+
+    def sentence_suffix(self, morpheme):
+        """ 마지막 문장 뒤에 붙일 구문 (형태소를 늘리지 못하면 None) """
+        return self._build_morpheme_entries(morpheme)[3]
+
+    def expansion_sentences(self, phrases):
+        """ 글자수 보충용 문장 (구문별로 한 번만 계산) """
+        entries = []
+        for phrase in phrases:
+            phrase_entries = self._expansions.get(phrase)
+            if phrase_entries is None:
+                phrase_entries = [self.entry(fill_template(t, phrase=phrase), t) for t in EXPANSION_TEMPLATES]
+                with self._lock:
+                    self._expansions[phrase] = phrase_entries
+            entries.extend(phrase_entries)
+        return entries
+
+    def insertion_entries(self):
+        """ 편집 계획용 삽입 후보 전체 (형태소 문장 + 중립 보충 문장) """
+        entries = []
+        for morpheme in self.automaton.morphemes:
+            entries.extend(self.morpheme_sentences(morpheme))
+        entries.extend(self.expansion_sentences(NEUTRAL_EXPANSION_PHRASES))
+        return entries
+
+    def _build_morpheme_entries(self, morpheme):
+        built = self._morpheme_entries.get(morpheme)
+        if built is not None:
+            return built
+
+        def ranked(templates):
+            entries = [self.entry(fill_template(t, morpheme=morpheme), t) for t in templates]
+            entries = [e for e in entries if e.adds(morpheme) > 0]
+            return sorted(entries, key=lambda e: (len(e.contribution), e.char_count))
+
+        prefix = self.entry(fill_template(SENTENCE_PREFIX_TEMPLATE, morpheme=morpheme))
+        suffix = self.entry(fill_template(SENTENCE_SUFFIX_TEMPLATE, morpheme=morpheme))
+        built = (
+            ranked(MORPHEME_SENTENCE_TEMPLATES + COMPOUND_SENTENCE_TEMPLATES),
+            ranked(INJECTION_PHRASE_TEMPLATES),
+            prefix if prefix.adds(morpheme) > 0 else None,
+            suffix if suffix.adds(morpheme) > 0 else None
+        )
+        with self._lock:
+            self._morpheme_entries[morpheme] = built
+        return built
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_template_registry(base_morphemes, compound_morphemes=()):
+    """ 목표 형태소 조합(키워드)별로 미리 계산된 레지스트리를 재사용 """
+    cache_key = (tuple(base_morphemes), tuple(compound_morphemes))
+    with _registries_lock:
+        registry = _registries.get(cache_key)
+    if registry is None:
+        registry = TemplateRegistry(get_automaton(base_morphemes, compound_morphemes))
+        with _registries_lock:
+            if len(_registries) >= 256:
+                _registries.pop(next(iter(_registries)))
+            registry = _registries.setdefault(cache_key, registry)
+    return registry
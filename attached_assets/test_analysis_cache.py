@@ -0,0 +1,102 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_analysis_cache.py
+import json
+from django.test import SimpleTestCase
+from content.services.analysis_cache import CachedMorphemeAnalyzer
+from content.services.compact_analysis import COMPACT_ANALYSIS_META_KEY, encode_analysis
+from content.services.memo_cache import TwoTierMemoCache
+
+KEYWORD = "엔진오일 교체"
+
+
+class CountingAnalyzer:
+    """ analyze 호출 횟수를 세는 MorphemeAnalyzer 대역 """
+
+    target_min_chars = 10
+    target_max_chars = 100
+    target_min_base_count = 1
+    target_max_base_count = 3
+    target_min_compound_count = 1
+    target_max_compound_count = 3
+
+    def __init__(self):
+        self.calls = []
+
+    def analyze(self, content, keyword, custom_morphemes=None):
+        self.calls.append(content)
+        base = ['엔진', '오일', '교체'] + list(custom_morphemes or [])
+        morphemes = base + ['엔진오일']
+        counts = {
+            m: {'count': content.count(m), 'is_valid': 1 <= content.count(m) <= 3, 'type': 'compound' if m == '엔진오일' else 'base'}
+            for m in morphemes
+        }
+        return {
+            'char_count': len(content.replace(" ", "")),
+            'is_valid_char_count': True,
+            'is_valid_morphemes': all(info['is_valid'] for info in counts.values()),
+            'is_fully_optimized': False,
+            'morpheme_analysis': {
+                'target_morphemes': {'base': base, 'compound': ['엔진오일'], 'all_list': morphemes},
+                'counts': counts
+            }
+        }
+
+
+def cached_analyzer(analyzer, version=None):
+    return CachedMorphemeAnalyzer(analyzer, memo_cache=TwoTierMemoCache('test_analysis', cache_alias=None), version=version)
+
+
+def saved_meta_data(analyzer, content, custom_morphemes=None):
+    """ 생성기처럼 analyze 결과를 캐시 참조와 함께 압축 레코드로 저장하고 JSON을 거친 meta_data 반환 """
+    analysis = analyzer.analyze(content, KEYWORD, custom_morphemes)
+    reference = analyzer.cache_reference(content, KEYWORD, custom_morphemes, analysis)
+    record = encode_analysis(analysis, KEYWORD, reference)
+    # BlogContent.meta_data는 JSONField이므로 JSON을 거쳐도 그대로 복원되어야 함
+    return analysis, json.loads(json.dumps({COMPACT_ANALYSIS_META_KEY: record}))
+
+
+class PersistedAnalysisTests(SimpleTestCase):
+
+    def test_record_round_trip_skips_analysis(self):
+        content = "엔진오일 교체 주기는 엔진 상태에 따라 다릅니다."
+        analysis, meta_data = saved_meta_data(cached_analyzer(CountingAnalyzer()), content, ['주기'])
+
+        reader_backend = CountingAnalyzer()
+        reader = cached_analyzer(reader_backend)
+        self.assertTrue(reader.load_persisted(meta_data, content, KEYWORD, ['주기']))
+        restored = reader.analyze(content, KEYWORD, ['주기'])
+
+        self.assertEqual(reader_backend.calls, [])
+        self.assertEqual(restored.to_dict(), analysis.to_dict())
+        self.assertEqual(restored['morpheme_analysis']['counts']['엔진']['count'], 2)
+
+    def test_reference_only_for_analyzed_text(self):
+        analyzer = cached_analyzer(CountingAnalyzer())
+        analysis = analyzer.analyze("엔진 본문입니다.", KEYWORD)
+
+        self.assertIsNone(analyzer.cache_reference("엔진 본문입니다.\n\n## 참고자료\n1. [엔진](#)\n", KEYWORD, None, analysis))
+        self.assertIsNone(analyzer.cache_reference("엔진 본문입니다.", KEYWORD, None, {'char_count': 1}))
+        self.assertIsNotNone(analyzer.cache_reference("엔진 본문입니다.", KEYWORD, None, analysis))
+
+    def test_record_without_reference_is_not_loaded(self):
+        analysis = CountingAnalyzer().analyze("엔진 본문입니다.", KEYWORD)
+        meta_data = {COMPACT_ANALYSIS_META_KEY: encode_analysis(analysis, KEYWORD)}
+
+        self.assertFalse(cached_analyzer(CountingAnalyzer()).load_persisted(meta_data, "엔진 본문입니다.", KEYWORD))
+
+    def test_record_for_other_text_is_not_loaded(self):
+        _, meta_data = saved_meta_data(cached_analyzer(CountingAnalyzer()), "엔진 본문입니다.")
+
+        reader_backend = CountingAnalyzer()
+        reader = cached_analyzer(reader_backend)
+        self.assertFalse(reader.load_persisted(meta_data, "엔진 본문을 고쳤습니다.", KEYWORD))
+        self.assertFalse(reader.load_persisted(meta_data, "엔진 본문입니다.", "오일"))
+        self.assertFalse(reader.load_persisted({}, "엔진 본문입니다.", KEYWORD))
+
+        reader.analyze("엔진 본문을 고쳤습니다.", KEYWORD)
+        self.assertEqual(reader_backend.calls, ["엔진 본문을 고쳤습니다."])
+
+    def test_record_is_tied_to_analyzer_version(self):
+        _, meta_data = saved_meta_data(cached_analyzer(CountingAnalyzer()), "엔진 본문입니다.")
+
+        reader = cached_analyzer(CountingAnalyzer(), version='v-next')
+        self.assertFalse(reader.load_persisted(meta_data, "엔진 본문입니다.", KEYWORD))
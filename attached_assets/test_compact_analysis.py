@@ -0,0 +1,99 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_compact_analysis.py
+import json
+from types import SimpleNamespace
+from django.test import SimpleTestCase, override_settings
+from content.services.compact_analysis import (
+    COMPACT_ANALYSIS_META_KEY, CompactMorphemeAnalysis, encode_analysis, load_morpheme_analysis, stores_compact, stores_rows
+)
+
+KEYWORD = "엔진오일 교체"
+
+
+def analysis_of(counts, compound=('엔진오일',)):
+    return {
+        'char_count': 1800,
+        'is_valid_char_count': True,
+        'is_valid_morphemes': False,
+        'is_fully_optimized': False,
+        'morpheme_analysis': {
+            'counts': {
+                m: {'count': c, 'is_valid': 17 <= c <= 20, 'type': 'compound' if m in compound else 'base'}
+                for m, c in counts.items()
+            }
+        }
+    }
+
+
+class CompactAnalysisTests(SimpleTestCase):
+
+    def test_morphemes_are_stored_as_keyword_ids(self):
+        record = encode_analysis(analysis_of({'엔진오일': 18, '엔진': 19, '오일': 25, '교체': 17}), KEYWORD)
+
+        self.assertNotIn('m', record)
+        self.assertEqual(record['x'], "")
+        serialized = json.dumps(record, ensure_ascii=False)
+        for morpheme in ('엔진', '오일', '교체'):
+            self.assertNotIn(morpheme, serialized)
+
+    def test_morphemes_outside_keyword_are_kept_as_extras(self):
+        record = encode_analysis(analysis_of({'엔진': 18, '점검': 3}), KEYWORD)
+        compact = CompactMorphemeAnalysis(record, KEYWORD)
+
+        self.assertEqual(record['x'], "점검")
+        self.assertEqual(compact.morphemes, ('엔진', '점검'))
+
+    def test_lazy_view_matches_analysis(self):
+        counts = {'엔진오일': 18, '엔진': 19, '오일': 25, '교체': 70000}
+        meta_data = json.loads(json.dumps({COMPACT_ANALYSIS_META_KEY: encode_analysis(analysis_of(counts), KEYWORD)}))
+        compact = CompactMorphemeAnalysis.from_meta_data(meta_data, KEYWORD)
+
+        self.assertEqual(compact.morphemes, ('엔진오일', '엔진', '오일', '교체'))
+        self.assertEqual(compact.count('엔진'), 19)
+        self.assertEqual(compact.count('교체'), 0xFFFF)
+        self.assertTrue(compact.is_valid('엔진오일'))
+        self.assertFalse(compact.is_valid('오일'))
+        self.assertEqual(compact.morpheme_type('엔진오일'), 'compound')
+        self.assertEqual(compact.morpheme_type('엔진'), 'base')
+        self.assertFalse(compact.all_valid)
+        self.assertIsNone(compact.to_analysis())
+
+    def test_records_of_same_keyword_share_morpheme_tuple(self):
+        first = CompactMorphemeAnalysis(encode_analysis(analysis_of({'엔진': 18, '오일': 3}), KEYWORD), KEYWORD)
+        second = CompactMorphemeAnalysis(encode_analysis(analysis_of({'엔진': 5, '오일': 19}), KEYWORD), KEYWORD)
+
+        self.assertIs(first.morphemes, second.morphemes)
+
+    def test_record_for_other_keyword_is_ignored(self):
+        meta_data = {COMPACT_ANALYSIS_META_KEY: encode_analysis(analysis_of({'엔진': 18}), KEYWORD)}
+
+        self.assertIsNone(CompactMorphemeAnalysis.from_meta_data(meta_data, "타이어 교체"))
+
+    def test_version_1_record_is_readable(self):
+        record = {'v': 1, 'm': "엔진\x1f오일", 'c': "EgADAA==", 'ok': 1, 'cp': 0}
+        compact = CompactMorphemeAnalysis.from_meta_data({COMPACT_ANALYSIS_META_KEY: record}, KEYWORD)
+
+        self.assertEqual(compact.as_rows(), [
+            {'morpheme': '엔진', 'count': 18, 'is_valid': True, 'morpheme_type': 'base'},
+            {'morpheme': '오일', 'count': 3, 'is_valid': False, 'morpheme_type': 'base'},
+        ])
+
+    def test_load_morpheme_analysis_prefers_compact_record(self):
+        rows_queried = []
+        blog_content = SimpleNamespace(
+            meta_data={COMPACT_ANALYSIS_META_KEY: encode_analysis(analysis_of({'엔진': 18}), KEYWORD)},
+            keyword=SimpleNamespace(keyword=KEYWORD),
+            morpheme_analyses=SimpleNamespace(values=lambda *fields: rows_queried.append(fields) or [])
+        )
+
+        self.assertEqual(load_morpheme_analysis(blog_content), [{'morpheme': '엔진', 'count': 18, 'is_valid': True, 'morpheme_type': 'base'}])
+        self.assertEqual(rows_queried, [])
+
+        blog_content.meta_data = {}
+        self.assertEqual(load_morpheme_analysis(blog_content), [])
+        self.assertEqual(rows_queried, [('morpheme', 'count', 'is_valid', 'morpheme_type')])
+
+    def test_compact_is_default_storage(self):
+        self.assertTrue(stores_compact())
+        self.assertFalse(stores_rows())
+        with override_settings(MORPHEME_ANALYSIS_STORAGE='both'):
+            self.assertTrue(stores_rows())
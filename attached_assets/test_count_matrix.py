@@ -0,0 +1,62 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_count_matrix.py
+from unittest import mock
+from django.test import SimpleTestCase
+from content.services import count_matrix
+from content.services.count_matrix import SentenceCountMatrix
+from content.services.document_model import ParsedDocument
+from content.services.morpheme_automaton import get_automaton
+
+CONTENT = "엔진을 봅니다. 오일도 봅니다.\n\n엔진오일 교체 주기. 엔진과 오일을 함께 봅니다."
+
+
+class SentenceCountMatrixTests(SimpleTestCase):
+    """ numpy 유무와 관계없이 같은 결과인지 두 구현 모두 확인 """
+
+    def setUp(self):
+        self.automaton = get_automaton(['엔진', '오일'], ['엔진오일'])
+
+    def for_each_backend(self, check):
+        for backend in dict.fromkeys([count_matrix.np, None]):
+            with self.subTest(numpy=backend is not None), mock.patch.object(count_matrix, 'np', backend):
+                check()
+
+    def totals(self, matrix):
+        return dict(zip(matrix.morphemes, (int(total) for total in matrix._totals)))
+
+    def test_totals_match_document_scan(self):
+        def check():
+            document = ParsedDocument.parse(CONTENT)
+            matrix = SentenceCountMatrix.from_document(document, self.automaton)
+            self.assertEqual(self.totals(matrix), self.automaton.count(CONTENT))
+        self.for_each_backend(check)
+
+    def test_sentence_updates_keep_totals(self):
+        def check():
+            document = ParsedDocument.parse(CONTENT)
+            matrix = SentenceCountMatrix.from_document(document, self.automaton)
+            refs = document.sentence_refs()
+
+            document.replace_sentence(refs[0], "오일을 봅니다.")
+            matrix.set_sentence(refs[0], "오일을 봅니다.")
+            document.replace_sentence(refs[3], "")
+            matrix.set_sentence(refs[3], "")
+            self.assertEqual(self.totals(matrix), self.automaton.count(document.serialize()))
+            self.assertEqual(list(matrix.row(refs[3])), [0, 0, 0])
+
+            # 주어진 기여도는 다시 세지 않고 그대로 사용
+            matrix.set_sentence(refs[1], "무엇이든", counts={'엔진': 2})
+            self.assertEqual(list(matrix.row(refs[1])), [2, 0, 0])
+        self.for_each_backend(check)
+
+    def test_exceeds_and_row_hits(self):
+        def check():
+            document = ParsedDocument.parse(CONTENT)
+            matrix = SentenceCountMatrix.from_document(document, self.automaton)
+            refs = document.sentence_refs()
+
+            # 전체: 엔진 3, 오일 3, 엔진오일 1
+            self.assertEqual(matrix.exceeds([2, 3, None]), [True, False, False])
+            self.assertEqual(matrix.exceeds([2, 3, None], inclusive=True), [True, True, False])
+            self.assertEqual(matrix.row_hits(refs, [False, True, False]), [False, True, True, True])
+            self.assertEqual(matrix.row_hits([], [True, True, True]), [])
+        self.for_each_backend(check)
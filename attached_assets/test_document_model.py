@@ -0,0 +1,70 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_document_model.py
+from django.test import SimpleTestCase
+from content.services.document_model import ParsedDocument, char_len, split_references
+from content.services.morpheme_automaton import get_automaton
+
+CONTENT = (
+    "## 엔진오일 교체\n\n"
+    "엔진오일은 주기적으로 바꿉니다.  엔진 상태를 먼저 봅니다! 오일 색도 확인합니다.\n\n\n"
+    "- 엔진 점검\n- 오일 점검\n\n"
+    "마지막 문단입니다."
+)
+REFERENCES = "## 참고자료\n1. [엔진 관리](https://example.com)"
+
+
+class ParsedDocumentTests(SimpleTestCase):
+
+    def test_unmodified_document_serializes_to_original(self):
+        document = ParsedDocument.parse(CONTENT)
+
+        self.assertEqual(document.serialize(), CONTENT)
+        self.assertEqual(document.char_count, char_len(CONTENT))
+        self.assertEqual(list(document.iter_lines()), CONTENT.split('\n'))
+        self.assertEqual([block.kind for block in document.blocks], ['heading', 'paragraph', 'list', 'paragraph'])
+
+    def test_references_are_split_and_restored(self):
+        document = ParsedDocument.parse(CONTENT + "\n\n" + REFERENCES, split_refs=True)
+
+        self.assertEqual(document.refs_section, REFERENCES)
+        self.assertEqual(document.serialize(), CONTENT)
+        self.assertEqual(document.serialize(include_refs=True), CONTENT + "\n\n" + REFERENCES)
+        self.assertEqual(split_references(CONTENT), (CONTENT, None))
+
+    def test_sentence_edits_keep_other_sentences_and_separators(self):
+        document = ParsedDocument.parse(CONTENT)
+        refs = document.sentence_refs()
+
+        document.replace_sentence(refs[2], "엔진 상태를 봅니다.")
+        document.replace_sentence(refs[3], "")
+
+        self.assertEqual(document.sentence_refs(), [ref for ref in refs if ref != refs[3]])
+        self.assertEqual(document.serialize(), CONTENT.replace("엔진 상태를 먼저 봅니다! 오일 색도 확인합니다.", "엔진 상태를 봅니다."))
+        self.assertEqual(document.char_count, char_len(document.serialize()))
+
+    def test_deleted_block_drops_its_separator(self):
+        document = ParsedDocument.parse("첫 문단입니다.\n\n지울 문단입니다.\n\n끝 문단입니다.")
+        document.replace_sentence((1, 0), "")
+
+        self.assertEqual(document.serialize(), "첫 문단입니다.\n\n끝 문단입니다.")
+        self.assertEqual(document.content_block_indices(), [0, 2])
+
+    def test_inserted_sentence_goes_before_trailing_whitespace(self):
+        document = ParsedDocument.parse("엔진을 봅니다. \n\n끝.")
+        block = document.blocks[0]
+        block.append_sentence("오일도 봅니다.")
+
+        self.assertEqual(document.serialize(), "엔진을 봅니다. 오일도 봅니다. \n\n끝.")
+
+    def test_scan_matches_automaton_on_serialized_text(self):
+        automaton = get_automaton(['엔진', '오일'], ['엔진오일'])
+        document = ParsedDocument.parse(CONTENT)
+
+        scan, refs = document.scan(automaton)
+        self.assertEqual(scan.counts, automaton.count(CONTENT))
+        self.assertEqual([document.sentence(ref) for ref in refs], scan.sentences)
+        for morpheme, indices in scan.hits.items():
+            self.assertTrue(all(scan.sentence_counts[i][morpheme] for i in indices))
+
+        document.replace_sentence(refs[0], "엔진을 바꿉니다.")
+        rescanned, _ = document.scan(automaton)
+        self.assertEqual(rescanned.counts, automaton.count(document.serialize()))
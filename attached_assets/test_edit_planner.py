@@ -0,0 +1,86 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_edit_planner.py
+from collections import Counter
+from django.test import SimpleTestCase
+from content.services.document_model import ParsedDocument
+from content.services.edit_planner import EditPlanner, EDIT_INSERT, EDIT_SUBSTITUTE
+from content.services.morpheme_automaton import get_automaton
+from content.services.particles import fill_template
+from content.services.template_registry import get_template_registry
+
+BASE = ['엔진', '오일']
+COMPOUND = ['엔진오일']
+SHORT_DOCUMENT = "## 엔진오일 교체\n\n" + "\n\n".join(
+    "자동차 관리는 꾸준함이 중요합니다. 정기 점검으로 큰 고장을 막을 수 있습니다. 엔진오일 점검도 잊지 마세요."
+    for _ in range(5)
+)
+
+
+class EditPlannerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.automaton = get_automaton(BASE, COMPOUND)
+        self.registry = get_template_registry(BASE, COMPOUND)
+
+    def planner(self, ranges, char_range, substitutions=None):
+        return EditPlanner(self.automaton, ranges, char_range, substitutions=substitutions, template_registry=self.registry)
+
+    def test_plan_predicts_counts_of_applied_document(self):
+        planner = self.planner({'엔진': (8, 12), '오일': (8, 12), '엔진오일': (6, 10)}, (300, 600))
+        document = ParsedDocument.parse(SHORT_DOCUMENT)
+        plan = planner.plan(document)
+        planner.apply(document, plan)
+
+        content = document.serialize()
+        actual = self.automaton.count(content)
+        for morpheme, count in plan.counts.items():
+            self.assertEqual(actual[morpheme], count)
+        self.assertEqual(len(content.replace(" ", "")), plan.char_count)
+
+    def test_template_reuse_is_capped_per_document_and_block(self):
+        # 달성할 수 없을 만큼 큰 목표로 삽입을 최대한 끌어냄
+        planner = self.planner({'엔진': (15, 20), '오일': (15, 20), '엔진오일': (15, 20)}, (1700, 2000))
+        plan = planner.plan(ParsedDocument.parse(SHORT_DOCUMENT))
+
+        inserts = [edit for edit in plan.edits if edit.kind == EDIT_INSERT]
+        self.assertTrue(inserts)
+        per_template = Counter(edit.template for edit in inserts)
+        self.assertLessEqual(max(per_template.values()), EditPlanner.MAX_TEMPLATE_USES)
+        per_block = Counter((edit.block_idx, edit.template) for edit in inserts)
+        self.assertEqual(max(per_block.values()), 1)
+
+    def test_existing_template_sentences_count_toward_cap(self):
+        planner = self.planner({'엔진': (15, 20), '오일': (15, 20), '엔진오일': (15, 20)}, (1700, 2000))
+        document = ParsedDocument.parse(SHORT_DOCUMENT)
+        planner.apply(document, planner.plan(document))
+
+        replanned = planner.plan(ParsedDocument.parse(document.serialize()))
+        self.assertFalse([edit for edit in replanned.edits if edit.kind == EDIT_INSERT])
+
+    def test_substitution_only_replaces_standalone_words(self):
+        planner = self.planner({'엔진': (0, 1)}, (0, 1000), substitutions=lambda m: ["", "이것"])
+        document = ParsedDocument.parse("엔진가격이 비쌉니다. 엔진이 좋습니다. 엔진오일을 봅니다.")
+        scan, refs = document.scan(self.automaton)
+
+        substituted = [
+            edit.text for edit in planner._sentence_candidates(scan, refs, {}, {0})
+            if edit.kind == EDIT_SUBSTITUTE
+        ]
+        self.assertEqual(substituted, ["이것이 좋습니다."])
+
+
+class TemplateParticleTests(SimpleTestCase):
+
+    def test_particle_follows_final_consonant(self):
+        self.assertEqual(
+            fill_template("{phrase}와 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.", phrase="해당 내용"),
+            "해당 내용과 관련하여 추가적인 정보를 제공하자면 다음과 같습니다."
+        )
+        self.assertEqual(fill_template("실제로 {phrase}는 많은 영향을 미칩니다.", phrase="이 점"), "실제로 이 점은 많은 영향을 미칩니다.")
+        self.assertEqual(fill_template("이러한 맥락에서 {morpheme}은 핵심적인 역할을 합니다.", morpheme="자동차"), "이러한 맥락에서 자동차는 핵심적인 역할을 합니다.")
+        self.assertEqual(fill_template("{morpheme}에 대해 말하자면, ", morpheme="엔진"), "엔진에 대해 말하자면, ")
+
+    def test_registry_sentences_are_grammatical(self):
+        registry = get_template_registry(BASE, COMPOUND)
+        texts = [entry.text for entry in registry.insertion_entries()]
+        self.assertNotIn("해당 내용와 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.", texts)
+        self.assertIn("해당 내용과 관련하여 추가적인 정보를 제공하자면 다음과 같습니다.", texts)
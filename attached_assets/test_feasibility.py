@@ -0,0 +1,52 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_feasibility.py
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from content.services.feasibility import analyze_feasibility, build_containment, target_ranges
+from content.services.morpheme_automaton import get_automaton
+
+
+class FeasibilityTests(SimpleTestCase):
+
+    def setUp(self):
+        self.automaton = get_automaton(['엔진', '오일'], ['엔진오일'])
+
+    def test_containment_of_compound_keyword(self):
+        self.assertEqual(
+            build_containment(self.automaton, {'엔진', '오일', '엔진오일'}),
+            {'엔진오일': {'엔진': 1, '오일': 1}}
+        )
+
+    def test_compatible_ranges_are_narrowed(self):
+        report = analyze_feasibility(self.automaton, {'엔진': (17, 20), '오일': (17, 20), '엔진오일': (17, 25)})
+
+        self.assertTrue(report.feasible)
+        self.assertEqual(report.ranges['엔진오일'], (17, 20))
+        self.assertEqual(report.adjusted_morphemes(), ['엔진오일'])
+        self.assertEqual(report.summary()['adjusted_ranges'], {'엔진오일': [17, 20]})
+
+    def test_conflict_relaxes_to_nearest_achievable_range(self):
+        # '엔진오일' 17회만으로 '엔진'이 17회가 되어 '엔진' 최대 10회는 달성 불가
+        report = analyze_feasibility(self.automaton, {'엔진': (5, 10), '엔진오일': (17, 20)})
+
+        self.assertFalse(report.feasible)
+        self.assertEqual(len(report.conflicts), 1)
+        self.assertEqual(report.ranges, {'엔진': (17, 17), '엔진오일': (17, 17)})
+
+    def test_minimum_occurrences_must_fit_char_limit(self):
+        report = analyze_feasibility(self.automaton, {'엔진': (17, 20), '엔진오일': (17, 20)}, char_range=(10, 60))
+
+        # 포함된 출현은 '엔진오일' 안에서 이미 세므로 '엔진오일' 17회(68자)만 필요
+        self.assertEqual(report.min_required_chars, 68)
+        self.assertFalse(report.feasible)
+        self.assertIn("68자", report.conflicts[-1])
+
+    def test_target_ranges_by_type(self):
+        analyzer = SimpleNamespace(
+            target_min_base_count=17, target_max_base_count=20,
+            target_min_compound_count=15, target_max_compound_count=18
+        )
+
+        self.assertEqual(
+            target_ranges(analyzer, {'엔진': 'base', '엔진오일': 'compound'}),
+            {'엔진': (17, 20), '엔진오일': (15, 18)}
+        )
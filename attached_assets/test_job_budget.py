@@ -0,0 +1,98 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_job_budget.py
+import time
+import threading
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from content.services.job_budget import (
+    REASON_DEADLINE, REASON_LLM_CALLS, REASON_TOKENS, BudgetExhausted, CallCancelled, JobBudget,
+    activate_budget, begin_llm_call, budget_allows, call_timeout, cancellable_call, check_call_cancelled,
+    current_budget, record_llm_usage, sleep_unless_cancelled, usage_tokens
+)
+
+
+class JobBudgetTests(SimpleTestCase):
+
+    def test_llm_call_limit(self):
+        budget = JobBudget(max_llm_calls=2)
+        budget.begin_llm_call('generation')
+        budget.begin_llm_call('generation')
+
+        with self.assertRaises(BudgetExhausted) as raised:
+            budget.begin_llm_call('verification')
+        self.assertEqual((raised.exception.reason, raised.exception.stage), (REASON_LLM_CALLS, 'verification'))
+        self.assertEqual(budget.llm_calls, 2)
+
+    def test_first_stop_is_recorded(self):
+        budget = JobBudget(max_tokens=100)
+        budget.add_tokens(150)
+
+        self.assertFalse(budget.allows('optimization'))
+        self.assertTrue(budget.allows('local_cleanup', needs_llm=False))
+        budget.max_llm_calls = 0
+        self.assertFalse(budget.allows('titles'))
+        self.assertEqual(budget.summary()['stopped_by'], REASON_TOKENS)
+        self.assertEqual(budget.summary()['stopped_at'], 'optimization')
+
+    def test_deadline_limits_call_timeout(self):
+        budget = JobBudget(deadline=10)
+
+        self.assertLessEqual(budget.call_timeout(120), 10)
+        self.assertEqual(budget.call_timeout(3), 3)
+        with mock.patch('content.services.job_budget.time.monotonic', return_value=budget.started_at + 9.5):
+            self.assertEqual(budget.exceeded_limit(), REASON_DEADLINE)
+            self.assertIsNone(budget.exceeded_limit(needs_llm=False))
+            self.assertEqual(budget.call_timeout(120), 1)
+
+    @override_settings(LLM_JOB_BUDGETS={'titles': {'max_llm_calls': 1}})
+    def test_for_job_merges_settings_with_defaults(self):
+        budget = JobBudget.for_job('titles')
+
+        self.assertEqual(budget.max_llm_calls, 1)
+        self.assertEqual(budget.deadline, 120)
+
+
+class BudgetContextTests(SimpleTestCase):
+
+    def test_module_helpers_follow_active_budget(self):
+        self.assertIsNone(current_budget())
+        self.assertTrue(budget_allows('generation'))
+        begin_llm_call('generation')
+        self.assertEqual(call_timeout(30), 30)
+
+        budget = JobBudget(max_llm_calls=1)
+        with activate_budget(budget):
+            begin_llm_call('generation')
+            record_llm_usage("가" * 30, "나" * 15)
+            self.assertFalse(budget_allows('verification'))
+        self.assertIsNone(current_budget())
+        self.assertEqual(budget.tokens, 30)
+
+    def test_usage_tokens_of_each_provider(self):
+        self.assertEqual(usage_tokens(SimpleNamespace(usage=SimpleNamespace(input_tokens=10, output_tokens=5))), 15)
+        self.assertEqual(usage_tokens(SimpleNamespace(usage=SimpleNamespace(total_tokens=42))), 42)
+        self.assertEqual(usage_tokens(SimpleNamespace(usage_metadata=SimpleNamespace(total_token_count=7))), 7)
+        self.assertIsNone(usage_tokens(SimpleNamespace()))
+
+
+class CallCancellationTests(SimpleTestCase):
+
+    def test_cancelled_call_does_not_reserve_budget(self):
+        budget = JobBudget()
+        event = threading.Event()
+        with activate_budget(budget), cancellable_call(event):
+            begin_llm_call('generation')
+            event.set()
+            with self.assertRaises(CallCancelled):
+                begin_llm_call('generation')
+        self.assertEqual(budget.llm_calls, 1)
+        check_call_cancelled()
+
+    def test_sleep_wakes_on_cancel(self):
+        event = threading.Event()
+        threading.Timer(0.05, event.set).start()
+
+        started = time.monotonic()
+        with cancellable_call(event), self.assertRaises(CallCancelled):
+            sleep_unless_cancelled(5)
+        self.assertLess(time.monotonic() - started, 1)
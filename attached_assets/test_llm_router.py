@@ -0,0 +1,174 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_llm_router.py
+import os
+import time
+import asyncio
+import shutil
+import sqlite3
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from content.services import llm_router
+from content.services.job_budget import BudgetExhausted, CallCancelled, JobBudget, activate_budget, begin_llm_call
+from content.services.llm_router import HedgedRouter, complete_text, get_breaker, route_key
+from content.services.llm_streaming import StreamAborted
+from content.services.rate_limiter import SharedRateLimiter
+
+PRIMARY = ('anthropic', 'claude-sonnet-4-20250514')
+ALTERNATE = ('openai', 'gpt-4o')
+
+
+def held_leases(limiter):
+    with sqlite3.connect(limiter.path) as connection:
+        return connection.execute("SELECT COUNT(*) FROM llm_rate_limit_lease").fetchone()[0]
+
+
+def wait_until(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class SlowAnthropicStream:
+    """ 조각을 천천히 보내는 messages.stream 대역 (닫혔는지와 보낸 조각 수 기록) """
+
+    def __init__(self, chunks, delay):
+        self.chunks = chunks
+        self.delay = delay
+        self.sent = 0
+        self.closed = threading.Event()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed.set()
+        return False
+
+    @property
+    def text_stream(self):
+        for chunk in self.chunks:
+            time.sleep(self.delay)
+            self.sent += 1
+            yield chunk
+
+
+class OpenAIStream:
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=chunk))])
+
+
+@override_settings(
+    LLM_HEDGE_ALTERNATES={'generation': [ALTERNATE]},
+    LLM_HEDGE_SETTINGS={'default_delay': 0.05, 'min_delay': 0, 'min_samples': 1000}
+)
+class HedgedRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        llm_router._breakers.clear()
+        llm_router._latencies.clear()
+
+    def test_losing_stream_is_closed_and_releases_slot(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        limiter = SharedRateLimiter(os.path.join(directory, 'limits.sqlite3'))
+        slow_stream = SlowAnthropicStream(["느린 "] * 100, 0.02)
+        registry = SimpleNamespace(
+            timeout=lambda provider: 30,
+            anthropic=lambda: SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: slow_stream)),
+            openai=lambda: SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: OpenAIStream(["빠른 ", "응답"]))))
+        )
+        budget = JobBudget()
+
+        with mock.patch('content.services.llm_router.get_rate_limiter', return_value=limiter), activate_budget(budget):
+            text = HedgedRouter('generation', PRIMARY).call(
+                lambda provider, model: complete_text(registry, provider, model, "프롬프트", 0.7, 100)
+            )
+
+        self.assertEqual(text, "빠른 응답")
+        self.assertTrue(slow_stream.closed.wait(2))
+        self.assertLess(slow_stream.sent, 100)
+        self.assertTrue(wait_until(lambda: held_leases(limiter) == 0))
+        self.assertEqual(budget.llm_calls, 2)
+        self.assertEqual(get_breaker(route_key(PRIMARY)).failures, 0)
+
+    def test_losing_route_does_not_reserve_budget(self):
+        gate = threading.Event()
+        finished = threading.Event()
+        outcome = []
+
+        def call_route(provider, model):
+            if (provider, model) == ALTERNATE:
+                begin_llm_call('generation')
+                return "대체 응답"
+            gate.wait(2)
+            try:
+                begin_llm_call('generation')
+                outcome.append('reserved')
+            except CallCancelled:
+                outcome.append('cancelled')
+                raise
+            finally:
+                finished.set()
+            return "기본 응답"
+
+        budget = JobBudget()
+        with activate_budget(budget):
+            self.assertEqual(HedgedRouter('generation', PRIMARY).call(call_route), "대체 응답")
+        gate.set()
+        self.assertTrue(finished.wait(2))
+        self.assertEqual(outcome, ['cancelled'])
+        self.assertEqual(budget.llm_calls, 1)
+
+    def test_failed_route_fails_over(self):
+        def call_route(provider, model):
+            if (provider, model) == PRIMARY:
+                raise ConnectionError("연결 실패")
+            return "대체 응답"
+
+        self.assertEqual(HedgedRouter('generation', PRIMARY).call(call_route), "대체 응답")
+        self.assertEqual(get_breaker(route_key(PRIMARY)).failures, 1)
+
+    def test_stream_abort_and_budget_exhaustion_are_not_failed_over(self):
+        for error in (StreamAborted("글자수 초과", "부분"), BudgetExhausted('llm_calls', 'generation')):
+            alternate_calls = []
+
+            def call_route(provider, model):
+                if (provider, model) == ALTERNATE:
+                    alternate_calls.append(model)
+                    return "대체 응답"
+                raise error
+
+            with self.subTest(error=type(error).__name__):
+                with self.assertRaises(type(error)):
+                    HedgedRouter('generation', PRIMARY).call(call_route)
+                self.assertEqual(alternate_calls, [])
+                self.assertEqual(get_breaker(route_key(PRIMARY)).failures, 0)
+
+    def test_async_stream_abort_is_not_failed_over(self):
+        alternate_calls = []
+
+        async def call_route(provider, model):
+            if (provider, model) == ALTERNATE:
+                alternate_calls.append(model)
+                return "대체 응답"
+            raise StreamAborted("형태소 초과", "부분")
+
+        with self.assertRaises(StreamAborted):
+            asyncio.run(HedgedRouter('generation', PRIMARY).acall(call_route))
+        self.assertEqual(alternate_calls, [])
@@ -0,0 +1,96 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_llm_streaming.py
+import threading
+from types import SimpleNamespace
+from django.test import SimpleTestCase
+from content.services.job_budget import CallCancelled, cancellable_call
+from content.services.llm_streaming import (
+    StreamAborted, StreamingConstraintGuard, hedge_stream_guard, stream_anthropic_text, stream_gemini_text
+)
+from content.services.morpheme_automaton import get_automaton
+
+
+class AnthropicStream:
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.closed = True
+        return False
+
+    @property
+    def text_stream(self):
+        for chunk in self.chunks:
+            self.sent += 1
+            yield chunk
+
+
+def anthropic_client(stream):
+    return SimpleNamespace(messages=SimpleNamespace(stream=lambda **kwargs: stream))
+
+
+class StreamingConstraintGuardTests(SimpleTestCase):
+
+    def test_char_limit(self):
+        guard = StreamingConstraintGuard(max_chars=5)
+
+        self.assertIsNone(guard.feed("엔진 오일"))
+        self.assertIsNotNone(guard.feed("교체"))
+        self.assertEqual(guard.text, "엔진 오일교체")
+
+    def test_morpheme_counts_span_paragraphs_and_chunks(self):
+        automaton = get_automaton(['엔진'], [])
+        guard = StreamingConstraintGuard(automaton, max_morpheme_count=2)
+
+        self.assertIsNone(guard.feed("엔진을 봅니다.\n\n엔"))
+        self.assertIsNone(guard.feed("진도 봅니다."))
+        self.assertEqual(guard.counts, {'엔진': 2})
+        self.assertIn("엔진", guard.feed(" 엔진"))
+
+    def test_unconstrained_guard_never_aborts(self):
+        guard = StreamingConstraintGuard()
+
+        self.assertIsNone(guard.feed("엔진" * 1000))
+
+
+class StreamTextTests(SimpleTestCase):
+
+    def test_violation_closes_stream(self):
+        stream = AnthropicStream(["엔진 ", "오일 ", "교체 ", "주기"])
+
+        with self.assertRaises(StreamAborted) as raised:
+            stream_anthropic_text(anthropic_client(stream), StreamingConstraintGuard(max_chars=4), model='m')
+        self.assertEqual(raised.exception.partial_text, "엔진 오일 교체 ")
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.sent, 3)
+
+    def test_gemini_chunks_are_joined(self):
+        model = SimpleNamespace(generate_content=lambda *args, **kwargs: [SimpleNamespace(text="엔진 "), SimpleNamespace(text="오일")])
+
+        self.assertEqual(stream_gemini_text(model, "프롬프트", None, StreamingConstraintGuard()), "엔진 오일")
+
+    def test_cancelled_hedge_stops_between_chunks(self):
+        event = threading.Event()
+        stream = AnthropicStream(["엔진 ", "오일 ", "교체"])
+        guard = StreamingConstraintGuard()
+        original_feed = guard.feed
+
+        def feed(chunk):
+            event.set()
+            return original_feed(chunk)
+
+        guard.feed = feed
+        with cancellable_call(event), self.assertRaises(CallCancelled):
+            stream_anthropic_text(anthropic_client(stream), guard, model='m')
+        self.assertTrue(stream.closed)
+        self.assertEqual(stream.sent, 2)
+
+    def test_hedge_guard_only_inside_hedge_attempt(self):
+        self.assertIsNone(hedge_stream_guard())
+        with cancellable_call(threading.Event()):
+            self.assertIsInstance(hedge_stream_guard(), StreamingConstraintGuard)
@@ -0,0 +1,77 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_local_reducer.py
+from django.test import SimpleTestCase
+from content.services.local_reducer import LocalSentenceReducer, standalone_positions, substitute_word
+from content.services.morpheme_automaton import get_automaton
+from content.services.particles import attach_particle, fill_template, particle_after
+from content.services.template_registry import MORPHEME_SENTENCE_TEMPLATES, SENTENCE_PREFIX_TEMPLATE
+
+
+class ParticleTests(SimpleTestCase):
+
+    def test_particle_must_end_the_word(self):
+        self.assertEqual(particle_after("은 중요합니다"), ("은", ('은', '는')))
+        self.assertEqual(particle_after("으로 바꿉니다"), ("으로", ('으로', '로')))
+        self.assertEqual(particle_after("에서."), ("에서", None))
+        self.assertEqual(particle_after("가격이 오릅니다"), ("", None))
+
+    def test_particle_follows_final_consonant(self):
+        self.assertEqual(attach_particle("엔진", ('은', '는')), "엔진은")
+        self.assertEqual(attach_particle("오일", ('으로', '로')), "오일로")
+        self.assertEqual(attach_particle("차량", ('으로', '로')), "차량으로")
+        self.assertEqual(attach_particle("부품", ('과', '와')), "부품과")
+        self.assertEqual(attach_particle("SUV", ('이', '가')), "SUV가")
+
+    def test_fill_template_agrees_particles(self):
+        self.assertEqual(fill_template("{phrase}와 관련하여", phrase="해당 내용"), "해당 내용과 관련하여")
+        self.assertEqual(fill_template("{morpheme}은 핵심입니다.", morpheme="오일 교체"), "오일 교체는 핵심입니다.")
+        self.assertEqual(fill_template("{morpheme}의 가치", morpheme="엔진"), "엔진의 가치")
+
+
+class LocalSentenceReducerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.automaton = get_automaton(['엔진', '오일'], ['엔진오일'])
+
+    def reducer(self, substitutes=()):
+        return LocalSentenceReducer(self.automaton, lambda morpheme: list(substitutes))
+
+    def test_standalone_positions_skip_word_parts(self):
+        self.assertEqual(standalone_positions("엔진은 좋고 엔진가격은 비쌉니다.", "엔진"), [0])
+
+    def test_substitution_adjusts_particle(self):
+        self.assertEqual(substitute_word("엔진은 중요합니다.", "엔진", 0, "이 부품"), "이 부품은 중요합니다.")
+        self.assertEqual(substitute_word("엔진은 중요합니다.", "엔진", 0, "이 장치"), "이 장치는 중요합니다.")
+
+    def test_inserted_template_sentence_is_removed(self):
+        sentence = fill_template(MORPHEME_SENTENCE_TEMPLATES[0], morpheme="엔진")
+
+        self.assertTrue(self.reducer().is_inserted(sentence, "엔진"))
+        self.assertEqual(self.reducer().reduce(sentence, "엔진"), "")
+
+    def test_inserted_prefix_is_stripped(self):
+        prefix = fill_template(SENTENCE_PREFIX_TEMPLATE, morpheme="엔진")
+
+        self.assertEqual(self.reducer().reduce(prefix + "정기 점검이 필요합니다.", "엔진"), "정기 점검이 필요합니다.")
+
+    def test_modifier_is_dropped(self):
+        self.assertEqual(self.reducer().reduce("엔진의 소음이 커졌습니다.", "엔진"), "소음이 커졌습니다.")
+
+    def test_result_may_not_change_other_targets(self):
+        # 복합 키워드 안의 '엔진'은 독립된 단어가 아니므로 건드리지 않음
+        self.assertIsNone(self.reducer(["이 부품"]).reduce("엔진오일 교체 시기입니다.", "엔진"))
+        # 대체어가 다른 목표 형태소를 늘리면 거부
+        self.assertIsNone(self.reducer(["오일 장치"]).reduce("엔진은 중요합니다.", "엔진"))
+        self.assertEqual(self.reducer(["오일 장치", "동력 장치"]).reduce("엔진은 중요합니다.", "엔진"), "동력 장치는 중요합니다.")
+
+    def test_allowed_loss_permits_reducing_contained_morphemes(self):
+        # '엔진오일'을 바꾸면 포함된 '엔진'/'오일'도 함께 줄어드므로 허용량이 있어야 함
+        reducer = self.reducer(["이 제품"])
+        self.assertIsNone(reducer.reduce("엔진오일 교체 시기입니다.", "엔진오일"))
+        self.assertEqual(
+            reducer.reduce("엔진오일 교체 시기입니다.", "엔진오일", allowed_loss={'엔진': 1, '오일': 1}),
+            "교체 시기입니다."
+        )
+        self.assertEqual(
+            reducer.reduce("점검 항목은 엔진오일.", "엔진오일", allowed_loss={'엔진': 1, '오일': 1}),
+            "점검 항목은 이 제품."
+        )
@@ -0,0 +1,75 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_memo_cache.py
+import pickle
+from unittest import mock
+from django.test import SimpleTestCase
+from content.services.memo_cache import TwoTierMemoCache
+
+
+class DictCache:
+    """ Django 캐시 백엔드 대역 """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+
+
+class TwoTierMemoCacheTests(SimpleTestCase):
+
+    def test_keys_are_stable_and_namespaced(self):
+        cache = TwoTierMemoCache('analysis', cache_alias=None)
+
+        self.assertEqual(cache.make_key("본문", "키워드"), cache.make_key("본문", "키워드"))
+        self.assertNotEqual(cache.make_key("본문", "키워드"), cache.make_key("본문키워드"))
+        self.assertTrue(cache.make_key("본문").startswith("analysis:"))
+
+    def test_lru_evicts_oldest_entry(self):
+        cache = TwoTierMemoCache('test', max_entries=2, cache_alias=None)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_byte_limit_evicts_and_skips_oversized_values(self):
+        value = "가" * 100
+        size = len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        cache = TwoTierMemoCache('test', max_bytes=size * 2, cache_alias=None)
+        cache.set('a', value)
+        cache.set('b', value)
+        cache.set('c', value)
+        cache.set('huge', value * 3)
+
+        stats = cache.stats()
+        self.assertEqual(stats['entries'], 2)
+        self.assertLessEqual(stats['bytes'], size * 2)
+        self.assertIsNone(cache.get('huge'))
+
+    def test_shared_tier_fills_local_tier(self):
+        shared = DictCache()
+        with mock.patch('content.services.memo_cache.caches', {'default': shared}):
+            writer = TwoTierMemoCache('test')
+            reader = TwoTierMemoCache('test')
+            writer.set('k', {'count': 3})
+
+            self.assertEqual(reader.get('k'), {'count': 3})
+            self.assertEqual(reader.get('k'), {'count': 3})
+            self.assertEqual(reader.get('missing', 'default'), 'default')
+
+        stats = reader.stats()
+        self.assertEqual((stats['shared_hits'], stats['local_hits'], stats['misses']), (1, 1, 1))
+
+    def test_unavailable_shared_cache_is_skipped(self):
+        with mock.patch('content.services.memo_cache.caches', {}):
+            cache = TwoTierMemoCache('test', cache_alias='missing')
+            cache.set('k', 1)
+
+            self.assertEqual(cache.get('k'), 1)
+            self.assertIsNone(cache.get('other'))
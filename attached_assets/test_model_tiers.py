@@ -0,0 +1,83 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_model_tiers.py
+import asyncio
+from unittest import mock
+from django.test import SimpleTestCase, override_settings
+from content.services.job_budget import BudgetExhausted
+from content.services.model_tiers import DEFAULT_TIER, TieredModelRouter, TierResponseRejected, task_tiers, tier_chain
+
+FAST_FIRST = {'sentence_reduction': ['fast', DEFAULT_TIER]}
+
+
+class DefaultTierTests(SimpleTestCase):
+
+    def test_every_task_keeps_current_model_by_default(self):
+        for task in ('article_generation', 'verification_rewrite', 'sentence_reduction', 'title_generation'):
+            self.assertEqual(task_tiers(task), [DEFAULT_TIER])
+        self.assertEqual(tier_chain('sentence_reduction', 'gemini-2.5-pro'), 'gemini-2.5-pro')
+
+    @override_settings(LLM_TASK_TIERS=FAST_FIRST)
+    def test_configured_tiers_change_chain(self):
+        self.assertEqual(tier_chain('sentence_reduction', 'gemini-2.5-pro'), 'gemini:gemini-2.5-flash>gemini-2.5-pro')
+
+
+@mock.patch('content.services.model_tiers.complete_text')
+class TieredModelRouterTests(SimpleTestCase):
+
+    def call(self, validate, default_call):
+        return TieredModelRouter('sentence_reduction', client_registry=None).call("프롬프트", 0.3, 1024, validate, default_call)
+
+    def test_default_tier_answer_is_validated(self, complete_text):
+        self.assertEqual(self.call(lambda text: text == "좋음", lambda: "좋음"), "좋음")
+        with self.assertRaises(TierResponseRejected) as raised:
+            self.call(lambda text: text == "좋음", lambda: "나쁨")
+        self.assertEqual(raised.exception.text, "나쁨")
+        complete_text.assert_not_called()
+
+    def test_empty_answer_can_be_valid(self, complete_text):
+        self.assertEqual(self.call(lambda text: text == "", lambda: ""), "")
+
+    @override_settings(LLM_TASK_TIERS=FAST_FIRST)
+    def test_invalid_fast_answer_escalates(self, complete_text):
+        complete_text.return_value = "나쁨"
+        default_call = mock.Mock(return_value="좋음")
+
+        self.assertEqual(self.call(lambda text: text == "좋음", default_call), "좋음")
+        self.assertEqual(complete_text.call_args.args[1:3], ('gemini', 'gemini-2.5-flash'))
+        default_call.assert_called_once_with()
+
+    @override_settings(LLM_TASK_TIERS=FAST_FIRST)
+    def test_valid_fast_answer_skips_default_model(self, complete_text):
+        complete_text.return_value = "좋음"
+        default_call = mock.Mock()
+
+        self.assertEqual(self.call(lambda text: text == "좋음", default_call), "좋음")
+        default_call.assert_not_called()
+
+    @override_settings(LLM_TASK_TIERS=FAST_FIRST)
+    def test_failed_fast_call_escalates(self, complete_text):
+        complete_text.side_effect = TimeoutError("느림")
+
+        self.assertEqual(self.call(lambda text: True, lambda: "기본"), "기본")
+
+    @override_settings(LLM_TASK_TIERS=FAST_FIRST)
+    def test_budget_exhaustion_does_not_escalate(self, complete_text):
+        complete_text.side_effect = BudgetExhausted('llm_calls')
+        default_call = mock.Mock()
+
+        with self.assertRaises(BudgetExhausted):
+            self.call(lambda text: True, default_call)
+        default_call.assert_not_called()
+
+    @override_settings(LLM_TASK_TIERS=FAST_FIRST)
+    def test_async_call_rejects_invalid_last_answer(self, complete_text):
+        async def acomplete_text(*args, **kwargs):
+            return "나쁨"
+
+        async def default_call():
+            return "역시 나쁨"
+
+        with mock.patch('content.services.model_tiers.acomplete_text', acomplete_text):
+            router = TieredModelRouter('sentence_reduction', client_registry=None)
+            with self.assertRaises(TierResponseRejected) as raised:
+                asyncio.run(router.acall("프롬프트", 0.3, 1024, lambda text: text == "좋음", default_call))
+        self.assertEqual(raised.exception.text, "역시 나쁨")
@@ -0,0 +1,54 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_morpheme_automaton.py
+import re
+from django.test import SimpleTestCase
+from content.services.morpheme_automaton import MorphemeAutomaton, get_automaton
+
+
+class MorphemeAutomatonTests(SimpleTestCase):
+
+    def test_base_morphemes_count_as_substrings(self):
+        automaton = MorphemeAutomaton(['엔진', '오일'], ['엔진오일'])
+        text = "엔진오일 교체 전에 엔진 상태와 오일 색을 봅니다. 엔진오일은 중요합니다."
+
+        counts = automaton.count(text)
+        for morpheme in ('엔진', '오일'):
+            self.assertEqual(counts[morpheme], len(re.findall(morpheme, text)))
+
+    def test_hangul_compound_needs_non_hangul_boundaries(self):
+        automaton = MorphemeAutomaton([], ['엔진오일'])
+
+        self.assertEqual(automaton.count("엔진오일 교체")['엔진오일'], 1)
+        self.assertEqual(automaton.count("(엔진오일)")['엔진오일'], 1)
+        self.assertEqual(automaton.count("엔진오일은 중요")['엔진오일'], 0)
+        self.assertEqual(automaton.count("고급엔진오일")['엔진오일'], 0)
+
+    def test_spaced_compound_counts_as_substring(self):
+        automaton = MorphemeAutomaton([], ['엔진 오일'])
+
+        self.assertEqual(automaton.count("엔진 오일은 엔진 오일대로")['엔진 오일'], 2)
+
+    def test_latin_compound_uses_word_boundary(self):
+        automaton = MorphemeAutomaton([], ['SUV'])
+        text = "SUV 추천, SUVs 비교, (SUV) 소형SUV"
+
+        self.assertEqual(automaton.count(text)['SUV'], len(re.findall(r'\bSUV\b', text)))
+        self.assertEqual(automaton.count(text)['SUV'], 2)
+
+    def test_matches_do_not_overlap(self):
+        automaton = MorphemeAutomaton(['아아'])
+
+        self.assertEqual(automaton.count("아아아아아")['아아'], len(re.findall('아아', "아아아아아")))
+
+    def test_scan_splits_sentences_like_re_split(self):
+        automaton = MorphemeAutomaton(['엔진', '오일'])
+        text = "엔진을 봅니다. 오일도 봅니다!  엔진과 오일? 끝"
+
+        scan = automaton.scan(text)
+        self.assertEqual(scan.sentences, re.split(r'(?<=[.!?])\s+', text))
+        self.assertEqual(scan.counts, automaton.count(text))
+        self.assertEqual(scan.sentence_counts[2], {'엔진': 1, '오일': 1})
+        self.assertEqual(scan.hits, {'엔진': [0, 2], '오일': [1, 2]})
+
+    def test_automata_are_shared_per_target_set(self):
+        self.assertIs(get_automaton(['엔진'], ['엔진오일']), get_automaton(['엔진'], ['엔진오일']))
+        self.assertIsNot(get_automaton(['엔진'], ['엔진오일']), get_automaton(['오일'], ['엔진오일']))
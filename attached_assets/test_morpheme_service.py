@@ -0,0 +1,108 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_morpheme_service.py
+import os
+import sys
+import time
+import shutil
+import tempfile
+import textwrap
+import subprocess
+import socketserver
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from django.test import SimpleTestCase
+from content.services.morpheme_service import MorphemeServiceClient, RemoteMorphemeAnalyzer, RemoteTokenizer
+
+# 사이드카 프로세스: Okt/JVM 대신 공백 단위 토크나이저와 느린 analyze를 가진 분석기로 실제 서버 실행
+SIDECAR_SCRIPT = textwrap.dedent('''
+    import sys
+    import time
+    from content.services.morpheme_service import MorphemeServiceServer
+
+    class WhitespaceTokenizer:
+        def pos(self, text, norm=False, stem=False):
+            return [(word, 'Noun' if word.endswith('엔진') else 'Josa') for word in text.split()]
+
+    class SlowAnalyzer:
+        target_min_chars = 1700
+        target_max_chars = 2000
+        target_min_base_count = 17
+        target_max_base_count = 20
+        target_min_compound_count = 17
+        target_max_compound_count = 20
+
+        def analyze(self, content, keyword, custom_morphemes=None):
+            time.sleep(float(content) if content.replace('.', '').isdigit() else 0)
+            return {'char_count': len(content.replace(' ', '')), 'keyword': keyword}
+
+        def is_better_optimization(self, candidate, best):
+            return candidate['char_count'] > best['char_count']
+
+    server = MorphemeServiceServer(sys.argv[1], WhitespaceTokenizer(), SlowAnalyzer(), batch_window=0.01)
+    print('ready', flush=True)
+    server.serve_forever()
+''')
+
+
+@unittest.skipUnless(hasattr(socketserver, 'ThreadingUnixStreamServer'), "Unix 소켓을 지원하지 않는 플랫폼")
+class MorphemeServiceRoundTripTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.directory = tempfile.mkdtemp()
+        cls.socket_path = os.path.join(cls.directory, 'morpheme.sock')
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+        cls.process = subprocess.Popen(
+            [sys.executable, '-c', SIDECAR_SCRIPT, cls.socket_path],
+            stdout=subprocess.PIPE, env=env, text=True
+        )
+        if cls.process.stdout.readline().strip() != 'ready':
+            cls.tearDownClass()
+            raise RuntimeError("형태소 분석 사이드카를 시작하지 못했습니다")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.process.kill()
+        cls.process.wait()
+        cls.process.stdout.close()
+        shutil.rmtree(cls.directory, ignore_errors=True)
+        super().tearDownClass()
+
+    def client(self):
+        return MorphemeServiceClient(self.socket_path, timeout=5)
+
+    def test_tokenizer_round_trip(self):
+        tokenizer = RemoteTokenizer(self.client())
+        self.assertEqual(tokenizer.pos("자동차 엔진 점검"), [('자동차', 'Josa'), ('엔진', 'Noun'), ('점검', 'Josa')])
+        self.assertEqual(tokenizer.pos("엔진 점검", join=True), ["엔진/Noun", "점검/Josa"])
+        self.assertEqual(tokenizer.nouns("자동차 엔진 점검"), ['엔진'])
+
+    def test_concurrent_requests_are_batched_and_split(self):
+        tokenizer = RemoteTokenizer(self.client())
+        texts = [f"문장{i} 엔진" for i in range(8)]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(tokenizer.nouns, texts))
+        self.assertEqual(results, [['엔진']] * 8)
+
+    def test_analyzer_runs_in_sidecar(self):
+        analyzer = RemoteMorphemeAnalyzer(self.client())
+        self.assertEqual(analyzer.analyze("엔진 오일", "엔진"), {'char_count': 4, 'keyword': '엔진'})
+        self.assertEqual(analyzer.target_max_chars, 2000)
+        self.assertTrue(analyzer.is_better_optimization({'char_count': 5}, {'char_count': 4}))
+        self.assertFalse(analyzer.is_better_optimization({'char_count': 3}, {'char_count': 4}))
+        with self.assertRaises(AttributeError):
+            analyzer.analyze_for_seo
+        # 사이드카가 처리했으므로 프로세스 내 분석기(JVM)를 만들지 않음
+        self.assertIsNone(analyzer._local_analyzer)
+
+    def test_slow_analyze_does_not_block_tokenizing(self):
+        analyzer = RemoteMorphemeAnalyzer(self.client())
+        tokenizer = RemoteTokenizer(self.client())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(analyzer.analyze, "1.0", "엔진")
+            time.sleep(0.1)
+            started = time.monotonic()
+            self.assertEqual(tokenizer.nouns("엔진"), ['엔진'])
+            self.assertLess(time.monotonic() - started, 0.5)
+            self.assertFalse(pending.done())
+            self.assertEqual(pending.result()['char_count'], 3)
@@ -0,0 +1,98 @@
+# d:\BlogCheatKey\blog_cheatkey_v2\blog_cheatkey\backend\content\tests\test_rate_limiter.py
+import os
+import time
+import shutil
+import tempfile
+import threading
+from types import SimpleNamespace
+from django.test import SimpleTestCase, override_settings
+from content.services.job_budget import CallCancelled, cancellable_call
+from content.services.rate_limiter import RateLimitTimeout, SharedRateLimiter, is_overload_error, retry_after_seconds
+
+KEY = 'anthropic:claude-sonnet-4-20250514'
+
+
+class OverloadedError(Exception):
+
+    def __init__(self, headers=None):
+        super().__init__("overloaded")
+        self.status_code = 529
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class SharedRateLimiterTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'limits.sqlite3')
+        self.limiter = SharedRateLimiter(self.path)
+
+    @override_settings(LLM_RATE_LIMITS={KEY: {'rate': 0.5, 'burst': 2, 'initial_concurrency': 10}})
+    def test_token_bucket_allows_burst_then_waits(self):
+        first, _ = self.limiter.try_acquire(KEY)
+        second, _ = self.limiter.try_acquire(KEY)
+        third, wait = self.limiter.try_acquire(KEY)
+
+        self.assertIsNotNone(first)
+        self.assertIsNotNone(second)
+        self.assertIsNone(third)
+        self.assertAlmostEqual(wait, 2, delta=0.1)
+
+    @override_settings(LLM_RATE_LIMITS={KEY: {'burst': 10, 'initial_concurrency': 1}})
+    def test_concurrency_limit_is_shared_between_instances(self):
+        lease_id, _ = self.limiter.try_acquire(KEY)
+        other_process = SharedRateLimiter(self.path)
+
+        self.assertIsNone(other_process.try_acquire(KEY)[0])
+        self.limiter.release(KEY, lease_id)
+        self.assertIsNotNone(other_process.try_acquire(KEY)[0])
+
+    @override_settings(LLM_RATE_LIMITS={KEY: {'burst': 10, 'initial_concurrency': 4, 'default_backoff': 5}})
+    def test_overload_halves_concurrency_and_honors_retry_after(self):
+        lease_id, _ = self.limiter.try_acquire(KEY)
+        self.limiter.release(KEY, lease_id, OverloadedError({'retry-after': '3'}))
+
+        with self.limiter._transaction() as connection:
+            concurrency_limit, blocked_until = connection.execute(
+                "SELECT concurrency_limit, blocked_until FROM llm_rate_limit WHERE key = ?", (KEY,)
+            ).fetchone()
+        self.assertEqual(concurrency_limit, 2)
+        self.assertAlmostEqual(blocked_until - time.time(), 3, delta=0.5)
+        self.assertIsNone(self.limiter.try_acquire(KEY)[0])
+
+    @override_settings(LLM_RATE_LIMITS={KEY: {'burst': 10, 'initial_concurrency': 1, 'max_wait': 0.3}})
+    def test_acquire_times_out(self):
+        self.limiter.try_acquire(KEY)
+
+        with self.assertRaises(RateLimitTimeout):
+            self.limiter.acquire(KEY)
+
+    @override_settings(LLM_RATE_LIMITS={KEY: {'burst': 10, 'initial_concurrency': 1}})
+    def test_cancelled_call_stops_waiting_without_slot(self):
+        held, _ = self.limiter.try_acquire(KEY)
+        event = threading.Event()
+        threading.Timer(0.1, event.set).start()
+
+        started = time.monotonic()
+        with cancellable_call(event), self.assertRaises(CallCancelled):
+            with self.limiter.slot('anthropic', 'claude-sonnet-4-20250514'):
+                pass
+        self.assertLess(time.monotonic() - started, 1)
+        with self.limiter._transaction() as connection:
+            leases = connection.execute("SELECT id FROM llm_rate_limit_lease").fetchall()
+        self.assertEqual(leases, [(held,)])
+
+
+class OverloadDetectionTests(SimpleTestCase):
+
+    def test_overload_errors(self):
+        self.assertTrue(is_overload_error(OverloadedError()))
+        self.assertTrue(is_overload_error(type('RateLimitError', (Exception,), {})()))
+        self.assertFalse(is_overload_error(ValueError("잘못된 요청")))
+
+    def test_retry_after_header_formats(self):
+        self.assertEqual(retry_after_seconds(OverloadedError({'retry-after-ms': '1500'})), 1.5)
+        self.assertEqual(retry_after_seconds(OverloadedError({'retry-after': '7'})), 7)
+        self.assertIsNone(retry_after_seconds(OverloadedError()))
+        self.assertIsNone(retry_after_seconds(ValueError()))